@@ -0,0 +1,208 @@
+"""
+Ödünç geçmişinin sıcak/soğuk ayrımı.
+
+`odunc_kayitlari` her ödünçle büyüyor ve teslim edilmiş yılların kayıtları, sadece güncel
+ödünçlerle ilgilenen sorgulara da indeks ve cache maliyeti olarak yansıyor. `ARSIV_YOLU`
+verilirse bu dosya her bağlantıya `arsiv` adıyla ATTACH edilir (bkz. database.arsiv_bagla) ve
+
+    python -m app.arsiv durum           # sıcak/arşiv satır sayıları, taşınmayı bekleyenler
+    python -m app.arsiv tasi [gun]      # `gun` günden (ARSIV_YAS_GUN) önce teslim edilenleri taşır
+
+eski ödünçleri aynı id'leriyle arşive taşır. Taşıma `ARSIV_PARCA_BOYUTU`'luk partilerle, her parti
+iki kısa transaction'da yapılır: önce arşive kopyalanır, sonra ana tablodan silinir. Yazma kilidi
+parti başına tutulur, partiler arasında diğer yazarlar araya girebilir.
+
+Dosyalar arası commit (WAL'de) tek parça değil; kopyalama ile silme arasında ya da yarıda kalmış
+bir taşımada satır iki yerde birden bulunabilir. Okumalar ve sayaçlar bu durumda ana tablodaki
+kopyayı esas alır, sonraki çalıştırma taşımayı tamamlar. Kopyadan sonra değişen satır silinmez.
+
+Kitap sayaçları (`toplam_odunc`, `son_odunc_tarihi`) ve istatistik raporları arşivi de sayar,
+taşıma onları değiştirmez. Bu ancak arşiv bağlıyken doğru: taşıma ana veritabanına bir iz bırakır
+(`degisiklik_sayaclari`'nda ARSIV_IZI satırı); iz varken arşiv bağlı değilse uygulama açılmaz,
+`python -m app.sayaclar kontrol|yenile` çalışmaz (bkz. `bagli_olmali`).
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import Row, and_, delete, exists, func, insert, or_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from . import database, models
+
+ARSIV_YAS_GUN = int(os.getenv("ARSIV_YAS_GUN", 365))
+ARSIV_PARCA_BOYUTU = int(os.getenv("ARSIV_PARCA_BOYUTU", 1000))
+# Partiler arası bekleme; bekleyen yazarlar kilidi bu arada alır
+ARSIV_ARA_MS = float(os.getenv("ARSIV_ARA_MS", 10))
+
+OK = models.OduncKayit
+A = models.arsiv_odunc
+
+# Ana veritabanında arşivin kullanıldığının izi; her taşıma bu satırın sürümünü artırır
+ARSIV_IZI = "arsiv.odunc_kayitlari"
+
+
+def acik() -> bool:
+    return bool(database.ARSIV_YOLU)
+
+
+def kullanildi(conn) -> bool:
+    """Bu veritabanından arşive hiç ödünç taşındı mı (arşiv bağlı olmasa da bilinir)."""
+    sayac = models.DegisiklikSayaci
+    return conn.execute(select(sayac.tablo).where(sayac.tablo == ARSIV_IZI)).first() is not None
+
+
+def bagli_olmali(conn):
+    """Arşive taşıma yapılmışsa ama arşiv bağlı değilse sayaçlar ve raporlar geçmişi eksik sayar; durdurur."""
+    if not acik() and kullanildi(conn):
+        raise RuntimeError(
+            "Bu veritabanının eski ödünçleri arşive taşınmış ama ARSIV_YOLU verilmemiş; "
+            "sayaçlar ve raporlar arşivsiz eksik hesaplanır. ARSIV_YOLU'nu arşiv dosyasına yönlendirin."
+        )
+
+
+def _iz_birak(conn):
+    sayac = models.DegisiklikSayaci
+    zaman = func.strftime("%Y-%m-%d %H:%M:%f", "now")
+    guncellenen = conn.execute(
+        update(sayac).where(sayac.tablo == ARSIV_IZI).values(surum=sayac.surum + 1, degisme_zamani=zaman)
+    ).rowcount
+    if not guncellenen:
+        conn.execute(insert(sayac).values(tablo=ARSIV_IZI, surum=1, degisme_zamani=zaman))
+
+
+def arsiv_kur(conn):
+    """Bağlı arşiv dosyasında tabloyu ve indekslerini (yoksa) kurar."""
+    models.ARSIV_METADATA.create_all(conn)
+
+
+def _sadece_arsivde():
+    # Satır ana tabloda da varsa (taşıma yarıda) o kopya esas alınır
+    arsivdeki = A.alias("arsiv_odunc")
+    return arsivdeki, ~exists().where(OK.id == arsivdeki.c.id)
+
+
+def birlesik_model():
+    """
+    Ana tablo ile arşivin UNION ALL'ı üzerine kurulu OduncKayit. Filtre ve sayfalama ifadeleri
+    `ListeFiltresi.uyarla` ile bu modele taşınır. Arşiv kapalıysa OduncKayit'in kendisi.
+    """
+    if not acik():
+        return OK
+    arsivdeki, kosul = _sadece_arsivde()
+    sutunlar = OK.__table__.c
+    birlesik = select(*sutunlar).union_all(
+        select(*(arsivdeki.c[sutun.name] for sutun in sutunlar)).where(kosul)
+    ).subquery("odunc_tumu")
+    return aliased(OK, birlesik)
+
+
+def arsivde_bul(db: Session, id: int) -> Optional[Row]:
+    if not acik():
+        return None
+    return db.execute(select(A).where(A.c.id == id)).first()
+
+
+def kitap_gecmisi(kitap_id):
+    """Kitabın arşivdeki (ödünç sayısı, son alış tarihi) alt sorguları; sayaçlar için."""
+    arsivdeki, kosul = _sadece_arsivde()
+    def sec(ifade):
+        return select(ifade).where(arsivdeki.c.kitap_id == kitap_id, kosul).scalar_subquery()
+    return sec(func.count(arsivdeki.c.id)), sec(func.max(arsivdeki.c.alis_tarihi))
+
+
+def bagli_kayitlari_sil(conn, yazarlar, kitaplar, kullanicilar) -> set:
+    """
+    Silinen yazar, kitap ve kullanıcıların arşivdeki ödünçlerini siler; ana tablodaki ON DELETE
+    CASCADE'in karşılığı. Geçmişi kısalan (silinmeyen) kitapların id'lerini döner.
+    """
+    kosullar = []
+    if kitaplar:
+        kosullar.append(A.c.kitap_id.in_(kitaplar))
+    if yazarlar:
+        kosullar.append(A.c.kitap_id.in_(select(models.Kitap.id).where(models.Kitap.yazar_id.in_(yazarlar))))
+    if kullanicilar:
+        kosullar.append(A.c.kullanici_id.in_(kullanicilar))
+    if not kosullar:
+        return set()
+    silinen = conn.execute(delete(A).where(or_(*kosullar)).returning(A.c.kitap_id, A.c.kullanici_id)).all()
+    if silinen:
+        # Ana tablo değişmediği için trigger'ı çalışmadı; arşivli listelerin ETag'i de değişmeli
+        conn.execute(
+            update(models.DegisiklikSayaci).where(models.DegisiklikSayaci.tablo == OK.__tablename__)
+            .values(surum=models.DegisiklikSayaci.surum + 1,
+                    degisme_zamani=func.strftime("%Y-%m-%d %H:%M:%f", "now"))
+        )
+    return {kitap_id for kitap_id, kullanici_id in silinen if kullanici_id in kullanicilar}
+
+
+def tasi(engine, yas_gun: int = ARSIV_YAS_GUN, parca: int = ARSIV_PARCA_BOYUTU, ara_ms: float = ARSIV_ARA_MS) -> int:
+    """`yas_gun` günden önce teslim edilmiş ödünçleri arşive taşır, taşınan satır sayısını döner."""
+    sinir = date.today() - timedelta(days=yas_gun)
+    eski = and_(OK.teslim_tarihi.is_not(None), OK.teslim_tarihi < sinir)
+    sutunlar = list(OK.__table__.c)
+    tasinan, son_id = 0, 0
+    with engine.connect() as conn:
+        with conn.begin():
+            arsiv_kur(conn)
+            # Satırlar arşive geçmeden önce; yarıda kalan bir taşımadan sonra da iz kalır
+            _iz_birak(conn)
+        while True:
+            with conn.begin():
+                parti = select(OK.id).where(eski, OK.id > son_id).order_by(OK.id).limit(parca).subquery()
+                ust = conn.execute(select(func.max(parti.c.id))).scalar()
+                if ust is None:
+                    break
+                aralik = and_(eski, OK.id > son_id, OK.id <= ust)
+                # Önceki yarım kalmış bir taşımanın kopyası varsa güncel hâliyle değişir
+                conn.execute(
+                    insert(A).prefix_with("OR REPLACE")
+                    .from_select([sutun.name for sutun in sutunlar], select(*sutunlar).where(aralik))
+                )
+            with conn.begin():
+                # Takma ad şart: iki tablonun adı aynı, niteliksiz `odunc_kayitlari` iç sorguda arşivi gösterirdi
+                kopya = A.alias("arsiv_odunc")
+                ayni = exists().where(kopya.c.id == OK.id,
+                                      *(kopya.c[s.name].is_(s) for s in sutunlar if s.name != "id"))
+                tasinan += conn.execute(delete(OK).where(aralik, ayni)).rowcount
+            son_id = ust
+            time.sleep(ara_ms / 1000)
+    return tasinan
+
+
+def durum(conn) -> dict:
+    sinir = date.today() - timedelta(days=ARSIV_YAS_GUN)
+    return {
+        "sicak": conn.execute(select(func.count()).select_from(OK)).scalar(),
+        "arsiv": conn.execute(select(func.count()).select_from(A)).scalar(),
+        "tasinabilir": conn.execute(
+            select(func.count()).select_from(OK).where(OK.teslim_tarihi.is_not(None), OK.teslim_tarihi < sinir)
+        ).scalar(),
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    komut = argv[0] if argv else "durum"
+    if not acik():
+        print("ARSIV_YOLU verilmemiş, arşiv kapalı.")
+        return 1
+    if komut == "durum":
+        with database.engine.begin() as conn:
+            arsiv_kur(conn)
+            sayilar = durum(conn)
+        print(f"Ana tablo: {sayilar['sicak']}, arşiv: {sayilar['arsiv']}, "
+              f"{ARSIV_YAS_GUN} günden eski teslim edilmiş: {sayilar['tasinabilir']}")
+        return 0
+    if komut == "tasi":
+        gun = int(argv[1]) if len(argv) > 1 else ARSIV_YAS_GUN
+        print(f"{tasi(database.engine, gun)} ödünç kaydı arşive taşındı.")
+        return 0
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+DB_MODU=async için router dönüştürücü.
+
+Handler'ları ikinci kez async olarak yazmak yerine mevcut sync handler'lar
+AsyncSession.run_sync ile çalıştırılıyor. SQLAlchemy sync kodu aiosqlite
+bağlantısı üzerinde bir greenlet içinde koşturuyor; sorgu beklenirken event
+loop başka isteklere bakıyor ve FastAPI threadpool'u hiç kullanılmıyor.
+Böylece iş mantığı tek yerde kalıyor ve sync yol aynen çalışmaya devam ediyor.
+"""
+import inspect
+
+from fastapi import APIRouter, Depends, Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+from .database import get_async_db
+
+
+def senkron_kalsin(endpoint):
+    """Async moda çevrilmeyecek endpoint'leri işaretler (örn. streaming cevaplar)."""
+    endpoint.senkron_kalsin = True
+    return endpoint
+
+
+def _cevrilebilir_mi(endpoint) -> bool:
+    if getattr(endpoint, "senkron_kalsin", False):
+        return False
+    if inspect.iscoroutinefunction(endpoint):
+        return False
+    return "db" in inspect.signature(endpoint).parameters
+
+
+def _asenkron_sarmala(route: APIRoute):
+    endpoint = route.endpoint
+    imza = inspect.signature(endpoint)
+    adaptor = TypeAdapter(route.response_model) if route.response_model else None
+
+    async def sarmal(**kwargs):
+        db = kwargs.pop("db")
+
+        def calistir(oturum):
+            sonuc = endpoint(db=oturum, **kwargs)
+            # Lazy ilişkiler greenlet dışında yüklenemez, serileştirme burada yapılmalı
+            if adaptor is not None and not isinstance(sonuc, Response):
+                sonuc = adaptor.validate_python(sonuc, from_attributes=True)
+            return sonuc
+
+        return await db.run_sync(calistir)
+
+    parametreler = [
+        p.replace(default=Depends(get_async_db)) if p.name == "db" else p
+        for p in imza.parameters.values()
+    ]
+    sarmal.__signature__ = imza.replace(parameters=parametreler)
+    sarmal.__name__ = endpoint.__name__
+    sarmal.__doc__ = endpoint.__doc__
+    return sarmal
+
+
+def asenkron_router(router: APIRouter) -> APIRouter:
+    """Router'ın bir kopyasını döner; db kullanan sync endpoint'ler async'e çevrilir."""
+    yeni = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            yeni.routes.append(route)
+            continue
+        endpoint = route.endpoint
+        if _cevrilebilir_mi(endpoint):
+            endpoint = _asenkron_sarmala(route)
+        yeni.add_api_route(
+            route.path,
+            endpoint,
+            methods=list(route.methods),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=route.dependencies,
+            summary=route.summary,
+            description=route.description,
+            responses=route.responses,
+            response_class=route.response_class,
+            name=route.name,
+            include_in_schema=route.include_in_schema,
+        )
+    return yeni
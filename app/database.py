@@ -1,11 +1,148 @@
-from sqlalchemy import create_engine
+import os
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./kutuphane.db"
+from .metrikler import METRIKLER, metrikler
+
+load_dotenv()
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./kutuphane.db")
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 )
+
+# "sync": handler'lar FastAPI threadpool'unda Session ile çalışır
+# "async": aynı handler'lar AsyncSession üzerinden event loop'ta çalışır (bkz. asenkron.py)
+DB_MODU = os.getenv("DB_MODU", "sync")
+
+# Açılışta şema kontrolü. Şema artık import sırasında kurulmuyor, `python -m app.migrasyon` ile yükseltiliyor.
+# "dogrula": veritabanı son migrasyonda değilse uygulama başlamaz
+# "kapali": kontrol yok (testler kendi şemasını kurar)
+SEMA_KONTROLU = os.getenv("SEMA_KONTROLU", "dogrula")
+
+# Teslim edilmiş eski ödünçlerin taşındığı arşiv dosyası (bkz. arsiv.py). Verilirse her bağlantıya
+# `arsiv` adıyla ATTACH edilir; boşsa arşiv kapalı.
+ARSIV_YOLU = os.getenv("ARSIV_YOLU", "")
+
+# Profilden bağımsız, her bağlantıda açılır. SQLite foreign key'leri varsayılan olarak zorlamıyor;
+# kitap/ödünç silmelerindeki ON DELETE CASCADE ve SET NULL ancak bununla çalışır.
+TEMEL_PRAGMALAR = {"foreign_keys": "ON"}
+
+# SQLite bağlantı profilleri.
+# "varsayilan": SQLite'ın kendi ayarları (rollback journal, her commit'te tam fsync)
+# "uretim": WAL ile okuyucular yazarı beklemez, commit'ler daha ucuz
+SQLITE_PROFILLERI = {
+    "varsayilan": {},
+    "uretim": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,     # 256 MB
+        "cache_size": -65536,       # negatif değer KB demek: 64 MB
+        "busy_timeout": 5000,       # ms, "database is locked" yerine bekle
+        "temp_store": "MEMORY",
+    },
+}
+
+def sqlite_pragmalari(profil: str) -> dict:
+    """
+    Profilin pragmalarını döner. Her pragma ortam değişkeniyle ezilebilir,
+    örn. SQLITE_SYNCHRONOUS=FULL veya SQLITE_MMAP_SIZE=0.
+    """
+    if profil not in SQLITE_PROFILLERI:
+        raise ValueError(f"Bilinmeyen SQLite profili: {profil}")
+    pragmalar = dict(TEMEL_PRAGMALAR)
+    pragmalar.update(SQLITE_PROFILLERI[profil])
+    for ad in SQLITE_PROFILLERI["uretim"]:
+        deger = os.getenv(f"SQLITE_{ad.upper()}")
+        if deger is not None:
+            pragmalar[ad] = deger
+    return pragmalar
+
+def sqlite_pragmalarini_uygula(engine, pragmalar: dict):
+    """Her yeni DBAPI bağlantısında pragmaları çalıştıran connect kancasını ekler."""
+    if not pragmalar:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _pragma_ayarla(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for ad, deger in pragmalar.items():
+            cursor.execute(f"PRAGMA {ad}={deger}")
+        cursor.close()
+
+def arsiv_bagla(engine, yol: str, journal_mode: str = None):
+    """
+    Her yeni DBAPI bağlantısına arşiv dosyasını `arsiv` şeması olarak bağlar.
+    journal_mode pragması şema başına; ana dosyayla aynı kipe alınır, arşivi okuyanlar taşımayı beklemesin.
+    """
+    @event.listens_for(engine, "connect")
+    def _arsivi_bagla(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("ATTACH DATABASE ? AS arsiv", (yol,))
+        if journal_mode:
+            cursor.execute(f"PRAGMA arsiv.journal_mode={journal_mode}")
+        cursor.close()
+
+def sql_olcumu_ekle(engine):
+    """Her sorgunun süresini metriklere (ve o anki isteğin ölçümüne) yazan cursor kancaları."""
+    if METRIKLER != "acik":
+        return
+
+    # Başlangıç zamanı sorgunun kendi execution context'inde tutulur; hata veren sorguda kendiliğinden düşer
+    @event.listens_for(engine, "before_cursor_execute")
+    def _sorgu_basladi(conn, cursor, statement, parameters, context, executemany):
+        context._sorgu_baslangic = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _sorgu_bitti(conn, cursor, statement, parameters, context, executemany):
+        metrikler.sorgu_kaydet(statement, time.perf_counter() - context._sorgu_baslangic)
+
+def _motor_ayarlari(url: str) -> dict:
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    if ":memory:" not in url:
+        # SQLite tek yazarlı; havuzu CPU'dan çok eşzamanlı okuyucu sayısına göre boyutlandırın
+        kwargs["pool_size"] = int(os.getenv("DB_POOL_SIZE", 10))
+        kwargs["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", 20))
+        kwargs["pool_timeout"] = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    return kwargs
+
+def motor_olustur(url: str = SQLALCHEMY_DATABASE_URL, profil: str = None):
+    """
+    Ayarlanmış bir engine oluşturur. Profil ve havuz boyutları ortam
+    değişkenlerinden (veya .env dosyasından) okunur.
+    """
+    profil = profil or os.getenv("SQLITE_PROFILI", "uretim")
+    engine = create_engine(url, **_motor_ayarlari(url))
+    pragmalar = sqlite_pragmalari(profil)
+    sqlite_pragmalarini_uygula(engine, pragmalar)
+    if ARSIV_YOLU:
+        arsiv_bagla(engine, ARSIV_YOLU, pragmalar.get("journal_mode"))
+    sql_olcumu_ekle(engine)
+    return engine
+
+def async_motor_olustur(url: str = ASYNC_DATABASE_URL, profil: str = None, **kwargs):
+    """
+    motor_olustur'un async karşılığı. Sürücü URL'den seçilir (varsayılan aiosqlite),
+    pragmalar alttaki sync engine'in connect kancasıyla aynı şekilde uygulanır.
+    """
+    # greenlet/aiosqlite yalnızca async modda gerekli
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    profil = profil or os.getenv("SQLITE_PROFILI", "uretim")
+    ayarlar = _motor_ayarlari(url)
+    ayarlar.update(kwargs)
+    engine = create_async_engine(url, **ayarlar)
+    pragmalar = sqlite_pragmalari(profil)
+    sqlite_pragmalarini_uygula(engine.sync_engine, pragmalar)
+    if ARSIV_YOLU:
+        arsiv_bagla(engine.sync_engine, ARSIV_YOLU, pragmalar.get("journal_mode"))
+    sql_olcumu_ekle(engine.sync_engine)
+    return engine
+
+engine = motor_olustur()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -17,6 +154,23 @@ def get_db():
     finally:
         db.close()
 
+# Async engine sadece DB_MODU=async iken ilk istekte kurulur
+_async_oturum_fabrikasi = None
+
+def async_oturum_fabrikasi():
+    global _async_oturum_fabrikasi
+    if _async_oturum_fabrikasi is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_oturum_fabrikasi = async_sessionmaker(
+            async_motor_olustur(), autoflush=False, expire_on_commit=False
+        )
+    return _async_oturum_fabrikasi
+
+async def get_async_db():
+    async with async_oturum_fabrikasi()() as db:
+        yield db
+
 def seed_data():
     """
     Veritabanına başlangıç verilerini ekler.
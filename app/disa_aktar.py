@@ -0,0 +1,62 @@
+"""
+Büyük tabloları sayfa sayfa çekmeden dışa aktarmak için akış (streaming) yardımcıları.
+
+Satırlar ORM nesnesine ya da Pydantic modeline çevrilmeden, sunucu tarafı cursor
+üzerinden `yield_per` partileriyle okunur ve hemen NDJSON/CSV olarak yazılır.
+Bellek kullanımı tablo boyutundan bağımsız, parti boyutuyla sınırlı kalır.
+"""
+import csv
+import io
+import json
+import os
+from typing import Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+PARTI_BOYUTU = int(os.getenv("DISA_AKTARMA_PARTI_BOYUTU", 1000))
+
+Bicim = Literal["ndjson", "csv"]
+
+MEDYA_TURLERI = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _partiler(db: Session, model, alanlar: list):
+    sorgu = select(*(getattr(model, alan) for alan in alanlar)).order_by(model.id)
+    sonuc = db.execute(sorgu.execution_options(yield_per=PARTI_BOYUTU))
+    for parti in sonuc.partitions():
+        yield parti
+
+
+def _ndjson(db: Session, model, alanlar: list):
+    for parti in _partiler(db, model, alanlar):
+        yield "".join(
+            json.dumps(dict(zip(alanlar, satir)), ensure_ascii=False, default=str) + "\n"
+            for satir in parti
+        )
+
+
+def _csv(db: Session, model, alanlar: list):
+    tampon = io.StringIO()
+    yazici = csv.writer(tampon)
+    # Başlık satırı sorgu beklenmeden gitsin
+    yazici.writerow(alanlar)
+    yield tampon.getvalue()
+    for parti in _partiler(db, model, alanlar):
+        tampon.seek(0)
+        tampon.truncate()
+        yazici.writerows(parti)
+        yield tampon.getvalue()
+
+
+def akis_yaniti(db: Session, model, sema: type[BaseModel], bicim: Bicim, dosya_adi: str) -> StreamingResponse:
+    """`model` tablosunun tamamını `sema` alanlarıyla NDJSON ya da CSV olarak akıtır."""
+    alanlar = list(sema.model_fields)
+    uretec = _csv(db, model, alanlar) if bicim == "csv" else _ndjson(db, model, alanlar)
+    return StreamingResponse(
+        uretec,
+        media_type=MEDYA_TURLERI[bicim],
+        headers={"Content-Disposition": f'attachment; filename="{dosya_adi}.{bicim}"'},
+    )
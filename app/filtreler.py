@@ -0,0 +1,157 @@
+"""
+Liste endpointleri için bildirimsel (declarative) filtre ve sıralama katmanı.
+
+Her router hangi sütunlara göre süzülebileceğini ve sıralanabileceğini bir
+`FiltreTanimi` ile bildirir; tanım FastAPI bağımlılığı olarak query
+parametrelerini üretir ve bunları SQL WHERE / ORDER BY ifadelerine çevirir:
+
+    KITAP_FILTRESI = FiltreTanimi(models.Kitap, esit=("yazar_id",), aralik=("yayin_yili",),
+                                  siralanabilir=("id", "baslik"))
+
+    GET /api/kitaplar/?yazar_id=3&yayin_yili_min=1950&siralama=-yayin_yili,baslik
+
+Alanlar tanım sırasında modele karşı doğrulanır. Sıralamaya sadece kendi
+indeksi olan alanlarda izin verilir; indekssiz bir sıralama tüm tabloyu
+geçici bir B-tree'de sıralatır ve gecikme tablo boyutuyla büyür.
+"""
+import inspect
+from typing import Dict, Optional, Sequence
+
+from fastapi import HTTPException, Query
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.sql.util import ClauseAdapter
+
+
+class ListeFiltresi:
+    """İsteğe ait WHERE ve ORDER BY ifadeleri."""
+
+    def __init__(self, kosullar: list, siralama: list):
+        self.kosullar = kosullar
+        self.siralama = siralama
+
+    def uygula(self, query, after_id: Optional[int] = None, cursor: Optional[str] = None):
+        # Parametre verilmediyse sorguya dokunulmaz
+        if self.kosullar:
+            query = query.filter(*self.kosullar)
+        if self.siralama:
+            if after_id is not None or cursor is not None:
+                # Cursor sayfalama id sırasına dayanıyor
+                raise HTTPException(status_code=400, detail="Cursor sayfalama ile siralama birlikte kullanılamaz")
+            query = query.order_by(*self.siralama)
+        return query
+
+    def uyarla(self, hedef) -> "ListeFiltresi":
+        """
+        İfadeleri modelin tablosundan aynı sütunları taşıyan bir alt sorgu üzerine kurulu
+        `aliased` modele taşır (ör. ana tablo + arşiv UNION'ı, bkz. arsiv.birlesik_model).
+        """
+        adaptor = ClauseAdapter(sa_inspect(hedef).selectable)
+        return ListeFiltresi([adaptor.traverse(k) for k in self.kosullar],
+                             [adaptor.traverse(s) for s in self.siralama])
+
+
+def filtrele(query, filtre: Optional[ListeFiltresi], after_id: Optional[int] = None, cursor: Optional[str] = None):
+    """Handler doğrudan (bağımlılıksız) çağrıldığında filtre None gelir."""
+    return filtre.uygula(query, after_id, cursor) if filtre is not None else query
+
+
+def _indeksli_sutunlar(model) -> set:
+    tablo = model.__table__
+    sutunlar = {c.name for c in tablo.primary_key.columns}
+    for indeks in tablo.indexes:
+        # Tek sütunlu indeks (alan, rowid) sırasını verir, id ile eşit bozma da indeksten çıkar.
+        # Kısmi indeksler sadece koşullarını sağlayan satırları içerir, sıralamaya yaramaz.
+        if len(indeks.columns) == 1 and indeks.dialect_options["sqlite"]["where"] is None:
+            sutunlar.add(indeks.columns[0].name)
+    return sutunlar
+
+
+class FiltreTanimi:
+    """
+    esit: `?alan=deger` ile eşitlik filtresi
+    aralik: `?alan_min=&alan_max=` ile (uçlar dahil) aralık filtresi
+    bos_mu: {parametre: alan}; `?parametre=true` alanı NULL, `false` dolu olanları seçer
+    siralanabilir: `?siralama=alan,-alan` ile izin verilen alanlar (- azalan)
+    """
+
+    def __init__(self, model, esit: Sequence[str] = (), aralik: Sequence[str] = (),
+                 bos_mu: Optional[Dict[str, str]] = None, siralanabilir: Sequence[str] = ("id",)):
+        self.model = model
+        sutunlar = sa_inspect(model).columns
+        bos_mu = bos_mu or {}
+        for alan in (*esit, *aralik, *bos_mu.values(), *siralanabilir):
+            if alan not in sutunlar:
+                raise ValueError(f"{model.__name__} modelinde '{alan}' alanı yok")
+        indeksli = _indeksli_sutunlar(model)
+        for alan in siralanabilir:
+            if alan not in indeksli:
+                raise ValueError(f"{model.__name__}.{alan} indeksli değil, sıralanabilir yapılamaz")
+
+        self.siralanabilir = tuple(siralanabilir)
+        self._parametreler = []  # (parametre adı, sütun, işlem)
+        imza = []
+
+        def ekle(ad, tip, islem, sutun, aciklama):
+            self._parametreler.append((ad, sutun, islem))
+            imza.append(inspect.Parameter(
+                ad, inspect.Parameter.KEYWORD_ONLY,
+                default=Query(None, description=aciklama), annotation=Optional[tip],
+            ))
+
+        for alan in esit:
+            sutun = getattr(model, alan)
+            ekle(alan, sutunlar[alan].type.python_type, "esit", sutun, f"{alan} eşittir")
+        for alan in aralik:
+            sutun = getattr(model, alan)
+            tip = sutunlar[alan].type.python_type
+            ekle(f"{alan}_min", tip, "en_az", sutun, f"{alan} en az (dahil)")
+            ekle(f"{alan}_max", tip, "en_cok", sutun, f"{alan} en çok (dahil)")
+        for parametre, alan in bos_mu.items():
+            ekle(parametre, bool, "bos_mu", getattr(model, alan), f"true: {alan} boş, false: dolu")
+
+        imza.append(inspect.Parameter(
+            "siralama", inspect.Parameter.KEYWORD_ONLY, annotation=Optional[str],
+            default=Query(None, description=(
+                "Virgülle ayrılmış alanlar, azalan için başına '-' koyun. "
+                f"Sıralanabilir: {', '.join(self.siralanabilir)}"
+            )),
+        ))
+        # FastAPI bağımlılığın parametrelerini bu imzadan okur
+        self.__signature__ = inspect.Signature(imza)
+
+    def _siralama(self, deger: str) -> list:
+        ifadeler, alanlar = [], []
+        for parca in deger.split(","):
+            parca = parca.strip()
+            alan = parca.lstrip("-")
+            if alan not in self.siralanabilir:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"'{alan}' alanına göre sıralanamaz. Sıralanabilir alanlar: {', '.join(self.siralanabilir)}",
+                )
+            sutun = getattr(self.model, alan)
+            ifadeler.append(sutun.desc() if parca.startswith("-") else sutun.asc())
+            alanlar.append(alan)
+        # Eşit değerlerde sayfalar arası sıra sabit kalsın. İndeks (alan, rowid) sırasında
+        # tutulduğu için id son alanla aynı yönde olmalı, yoksa eşitler ayrıca sıralanır.
+        if "id" not in alanlar:
+            son_azalan = deger.split(",")[-1].strip().startswith("-")
+            ifadeler.append(self.model.id.desc() if son_azalan else self.model.id.asc())
+        return ifadeler
+
+    def __call__(self, **degerler) -> ListeFiltresi:
+        kosullar = []
+        for ad, sutun, islem in self._parametreler:
+            deger = degerler.get(ad)
+            if deger is None:
+                continue
+            if islem == "esit":
+                kosullar.append(sutun == deger)
+            elif islem == "en_az":
+                kosullar.append(sutun >= deger)
+            elif islem == "en_cok":
+                kosullar.append(sutun <= deger)
+            elif islem == "bos_mu":
+                kosullar.append(sutun.is_(None) if deger else sutun.is_not(None))
+        siralama = degerler.get("siralama")
+        return ListeFiltresi(kosullar, self._siralama(siralama) if siralama else [])
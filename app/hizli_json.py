@@ -0,0 +1,89 @@
+"""
+Liste endpointleri için hızlı JSON yolu (JSON_MODU=hizli).
+
+Standart yolda her satır önce ORM nesnesine, sonra `from_attributes` ile
+Pydantic modeline çevrilip doğrulanır, en son JSON'a yazılır. 100 satırlık
+sayfalarda CPU'nun çoğu buraya gidiyor. Hızlı yolda:
+
+- sorgu ORM nesnesi yerine cevap şemasının sütunlarını düz tuple olarak çeker,
+- satırlar doğrulanmadan, şemadan bir kez üretilen serileştiriciyle JSON'a yazılır
+  (orjson kuruluysa orjson, değilse TypedDict üzerinden Pydantic TypeAdapter).
+
+Veri doğrudan veritabanından geldiği ve sütun tipleri şemayla aynı olduğu için
+satır başına doğrulama atlanıyor. JSON çıktısı standart yolla aynıdır.
+"""
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from typing_extensions import TypedDict
+
+try:
+    import orjson
+except ImportError:  # orjson isteğe bağlı
+    orjson = None
+
+# "standart" | "hizli"
+JSON_MODU = os.getenv("JSON_MODU", "standart")
+
+
+class HizliJSONResponse(Response):
+    """orjson ile yazan JSON cevabı; orjson yoksa Pydantic'in JSON serileştiricisine düşer."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if orjson is not None:
+            return orjson.dumps(content)
+        return TypeAdapter(type(content)).dump_json(content)
+
+
+@lru_cache(maxsize=None)
+def _alanlar(model, sema: type) -> tuple:
+    # aliased modeller (ör. arşivli ödünç listesi) için de mapper üzerinden
+    sutunlar = sa_inspect(model).mapper.columns
+    eksik = [alan for alan in sema.model_fields if alan not in sutunlar]
+    if eksik:
+        raise ValueError(f"{sema.__name__} alanları {model.__name__} sütunu değil: {eksik}")
+    return tuple(sema.model_fields)
+
+
+@lru_cache(maxsize=None)
+def satir_adaptoru(sema: type) -> TypeAdapter:
+    """Şemanın alanlarıyla aynı TypedDict listesi için önceden kurulmuş serileştirici."""
+    satir = TypedDict(f"{sema.__name__}Satiri", {ad: alan.annotation for ad, alan in sema.model_fields.items()})
+    return TypeAdapter(List[satir])
+
+
+def serilestir(satirlar: list, sema: type) -> bytes:
+    """Düz satırları (dict) doğrulamadan JSON'a yazar."""
+    if orjson is not None:
+        return orjson.dumps(satirlar)
+    return satir_adaptoru(sema).dump_json(satirlar)
+
+
+def sorgu(db: Session, model, sema: type):
+    """Liste sorgusunun başlangıcı: hızlı modda sadece şemanın sütunları seçilir."""
+    if JSON_MODU != "hizli":
+        return db.query(model)
+    return db.query(*(getattr(model, alan) for alan in _alanlar(model, sema)))
+
+
+def yanit(kayitlar: list, sema: type, response: Optional[Response] = None):
+    """
+    Standart modda kayıtları olduğu gibi döner (FastAPI response_model ile serileştirir).
+    Hızlı modda hazır JSON cevabı döner; handler'ın response'una yazılan başlıklar
+    (ETag, X-Next-Cursor ...) kopyalanır, çünkü doğrudan dönen cevaplara eklenmezler.
+    """
+    if JSON_MODU != "hizli":
+        return kayitlar
+    govde = serilestir([satir._asdict() for satir in kayitlar], sema)
+    basliklar = dict(response.headers) if response is not None else None
+    if basliklar:
+        basliklar.pop("content-length", None)
+    return HizliJSONResponse(govde, headers=basliklar)
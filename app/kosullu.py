@@ -0,0 +1,126 @@
+"""
+ETag / koşullu GET desteği.
+
+Detay endpointleri: ETag cevabın içerik özetidir ve önbellekte cevapla birlikte
+saklanır; If-None-Match eşleşirse 304 döner, gövde serileştirilmez.
+
+Liste endpointleri: tablo başına değişiklik sayacından (models.DegisiklikSayaci)
+üretilir. Kontrol liste sorgusundan önce yapıldığı için değişmeyen bir
+koleksiyon tek bir birincil anahtar okumasına mal olur.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+def etag_hesapla(model: BaseModel) -> str:
+    ozet = hashlib.blake2b(model.model_dump_json().encode(), digest_size=12).hexdigest()
+    # Zayıf ETag: sıkıştırılmış ve sıkıştırılmamış gösterim aynı kabul edilsin
+    return f'W/"{ozet}"'
+
+
+def etagli(model: Optional[BaseModel]):
+    """Önbelleğe (cevap, etag) ikilisi olarak koymak için."""
+    return (model, etag_hesapla(model)) if model is not None else None
+
+
+def _etag_eslesiyor(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match zayıf karşılaştırma kullanır (RFC 9110 13.1.2)
+    istenenler = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+    return etag.removeprefix("W/") in istenenler
+
+
+def _son_degisiklik(sayaclar: dict) -> Optional[datetime]:
+    """
+    Last-Modified saniye çözünürlüklü, sayaçların zamanı milisaniyeli: değer bir sonraki saniyeye
+    yuvarlanır. Yuvarlanan an henüz gelmediyse (değişiklik bu saniyede) None; o saniyedeki sonraki
+    bir yazma aynı değeri üretir ve If-Modified-Since onu ayırt edemezdi (RFC 9110 8.8.2.1).
+    """
+    son = max(datetime.fromisoformat(s.degisme_zamani).replace(tzinfo=timezone.utc) for s in sayaclar.values())
+    if son.microsecond:
+        son = son.replace(microsecond=0) + timedelta(seconds=1)
+    return son if son <= datetime.now(timezone.utc) else None
+
+
+def _degismedi(basliklar: dict) -> Response:
+    return Response(status_code=304, headers=basliklar)
+
+
+def kayit_kosullu(kayit: tuple, request: Optional[Request], response: Optional[Response]):
+    """
+    (cevap, etag) ikilisinden cevabı döner. İstemcinin elindeki sürüm güncelse
+    gövdesiz 304 döner.
+    """
+    model, etag = kayit
+    if request is None:
+        return model
+    basliklar = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_eslesiyor(request.headers.get("if-none-match", ""), etag):
+        return _degismedi(basliklar)
+    response.headers.update(basliklar)
+    return model
+
+
+def sayaclari_oku(db: Session, tablolar) -> Optional[dict]:
+    """
+    Tabloların değişiklik sayaçlarını {tablo: DegisiklikSayaci} olarak döner.
+    Sayaç satırını ilk yazmada trigger oluşturur. Satır yoksa ya tabloya hiç
+    yazılmamıştır ya da triggerlar kurulmamıştır; emin olamadığımız için None döner.
+    """
+    sayaclar = {
+        s.tablo: s for s in
+        db.query(models.DegisiklikSayaci).filter(models.DegisiklikSayaci.tablo.in_(tablolar))
+    }
+    return sayaclar if len(sayaclar) == len(set(tablolar)) else None
+
+
+def liste_kosullu(db: Session, request: Optional[Request], response: Optional[Response],
+                  *tablolar: str) -> Optional[Response]:
+    """
+    Liste sorgusundan önce çağrılır. Koleksiyon değişmediyse 304 cevabını döner,
+    değiştiyse ETag/Last-Modified başlıklarını yazıp None döner.
+    """
+    if request is None:
+        return None
+
+    sayaclar = sayaclari_oku(db, tablolar)
+    if sayaclar is None:
+        # Sayaç yoksa değişip değişmediğini bilemeyiz, ETag vermiyoruz
+        return None
+    surumler = "-".join(str(sayaclar[t].surum) for t in tablolar)
+    # Aynı tablo sürümünde farklı parametreler (sayfa, filtre) farklı içerik demek
+    parametreler = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    ozet = hashlib.blake2b(parametreler.encode(), digest_size=6).hexdigest()
+    etag = f'W/"{"+".join(tablolar)}-{surumler}-{ozet}"'
+
+    basliklar = {"ETag": etag, "Cache-Control": "no-cache"}
+    son_degisiklik = _son_degisiklik(sayaclar)
+    if son_degisiklik is not None:
+        basliklar["Last-Modified"] = format_datetime(son_degisiklik, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # İkisi birden gelirse If-Modified-Since yok sayılır (RFC 9110 13.2.2)
+        if _etag_eslesiyor(if_none_match, etag):
+            return _degismedi(basliklar)
+    elif son_degisiklik is not None and "if-modified-since" in request.headers:
+        try:
+            istemci_zamani = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            istemci_zamani = None
+        if istemci_zamani is not None and istemci_zamani.tzinfo is None:
+            istemci_zamani = istemci_zamani.replace(tzinfo=timezone.utc)
+        if istemci_zamani is not None and son_degisiklik <= istemci_zamani:
+            return _degismedi(basliklar)
+
+    response.headers.update(basliklar)
+    return None
@@ -1,23 +1,60 @@
-from fastapi import FastAPI
-from .database import engine, Base
-from .routers import kitaplar, yazarlar, kategoriler, kullanicilar, odunc
+from contextlib import asynccontextmanager
 
-# Veritabanı tablolarını oluştur
-Base.metadata.create_all(bind=engine)
+from fastapi import FastAPI, Response
+from .database import engine, DB_MODU, SEMA_KONTROLU
+from .migrasyon import sema_dogrula
+from . import sayaclar  # noqa: F401  (ödünç sayaçlarının oturum olaylarını kaydeder)
+from .onbellek import onbellek
+from .sikistirma import SikistirmaMiddleware
+from .metrikler import METRIKLER, MetrikMiddleware, metrikler
+from .asenkron import asenkron_router
+from . import arsiv, yazma_kuyrugu
+from .routers import kitaplar, yazarlar, kategoriler, kullanicilar, odunc, istatistik
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tablolar migrasyonlarla kuruluyor (python -m app.migrasyon), burada sadece sürüm kontrolü var
+    if SEMA_KONTROLU == "dogrula":
+        sema_dogrula(engine)
+        with engine.connect() as conn:
+            arsiv.bagli_olmali(conn)
+    if arsiv.acik():
+        # Arşiv dosyası migrasyonların dışında; tablosu yoksa kurulur
+        with engine.begin() as conn:
+            arsiv.arsiv_kur(conn)
+    yield
+    if yazma_kuyrugu.kuyruk is not None:
+        # Kuyrukta bekleyen ödünç yazmaları kapanmadan commit edilir
+        yazma_kuyrugu.kuyruk.durdur()
 
 app = FastAPI(
     title="Kütüphane Yönetim Sistemi API",
     description="Kitap, yazar, kategori, kullanıcılar ve ödünç işlemlerini yöneten RESTful API.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-# Router'ları dahil et
-app.include_router(kitaplar.router)
-app.include_router(yazarlar.router)
-app.include_router(kategoriler.router)
-app.include_router(kullanicilar.router)
-app.include_router(odunc.router)
+# Büyük liste ve export cevapları gzip/brotli ile sıkıştırılır (SIKISTIRMA_* ayarları)
+app.add_middleware(SikistirmaMiddleware)
+# En dışta: süre sıkıştırmayı da kapsar, Server-Timing başlığı her cevaba eklenir
+if METRIKLER != "kapali":
+    app.add_middleware(MetrikMiddleware)
+
+# Router'ları dahil et (DB_MODU=async ise AsyncSession üzerinden çalışan kopyaları)
+for router in (kitaplar.router, yazarlar.router, kategoriler.router, kullanicilar.router, odunc.router,
+               istatistik.router):
+    app.include_router(asenkron_router(router) if DB_MODU == "async" else router)
 
 @app.get("/")
 def read_root():
     return {"message": "Kütüphane API'ye Hoşgeldiniz! Dokümantasyon için /docs adresine gidin."}
+
+@app.get("/api/onbellek", tags=["Sistem"])
+def onbellek_istatistik():
+    # GET-by-id önbelleğinin isabet/ıska sayaçları (bu worker için)
+    return onbellek.istatistik()
+
+@app.get("/metrics", tags=["Sistem"], response_class=Response)
+def prometheus_metrikleri():
+    # Route başına süre histogramları, istek başına sorgu sayısı/SQL süresi ve en yavaş sorgular (bu worker için)
+    return Response(metrikler.prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,226 @@
+"""
+İstek süresi ve SQL ölçümleri.
+
+- `MetrikMiddleware` her isteğin süresini route şablonuna göre (`/api/kitaplar/{kitap_id}`)
+  histograma yazar ve cevaba `Server-Timing` başlığı ekler (tarayıcı geliştirici araçlarında görünür).
+- Engine'e takılan cursor kancaları (bkz. `database.sql_olcumu_ekle`) her sorgunun süresini
+  o anki isteğin ölçümüne ekler; istek başına sorgu sayısı ve toplam SQL süresi buradan gelir.
+- En yavaş `YAVAS_SORGU_SAYISI` farklı SQL ifadesi en yüksek süreleriyle tutulur.
+
+Hepsi `GET /metrics` altında Prometheus metin biçiminde. Sayaçlar süreç içi; birden fazla
+worker varsa her worker kendi değerlerini verir.
+
+Maliyet: istek başına bir kilit ve birkaç mikrosaniye. Sorgu başına maliyetin çoğu SQLAlchemy'nin
+cursor olaylarını çağırmasından geliyor (bkz. `python -m benchmarks.bench_metrikler`).
+`METRIKLER=istek` SQL kancalarını takmadan sadece istek metriklerini tutar, `kapali` hepsini kapatır.
+"""
+import bisect
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+# "acik" | "istek" (SQL kancaları yok) | "kapali"
+METRIKLER = os.getenv("METRIKLER", "acik")
+YAVAS_SORGU_SAYISI = int(os.getenv("YAVAS_SORGU_SAYISI", 10))
+
+SURE_KOVALARI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SORGU_KOVALARI = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class IstekOlcumu:
+    __slots__ = ("sorgu_sayisi", "sql_suresi")
+
+    def __init__(self):
+        self.sorgu_sayisi = 0
+        self.sql_suresi = 0.0
+
+
+# Handler threadpool'da çalışsa da context kopyalandığı için aynı nesneyi görür
+_istek: ContextVar[Optional[IstekOlcumu]] = ContextVar("istek_olcumu", default=None)
+
+
+def aktif_olcum() -> Optional[IstekOlcumu]:
+    return _istek.get()
+
+
+class Histogram:
+    __slots__ = ("kovalar", "sayilar", "toplam", "adet")
+
+    def __init__(self, kovalar: tuple):
+        self.kovalar = kovalar
+        self.sayilar = [0] * len(kovalar)
+        self.toplam = 0.0
+        self.adet = 0
+
+    def gozlem(self, deger: float):
+        # Kovalar kümülatif değil, yazdırırken toplanır
+        i = bisect.bisect_left(self.kovalar, deger)
+        if i < len(self.sayilar):
+            self.sayilar[i] += 1
+        self.toplam += deger
+        self.adet += 1
+
+    def satirlar(self, ad: str, etiketler: str) -> list:
+        satirlar, kumulatif = [], 0
+        for sinir, sayi in zip(self.kovalar, self.sayilar):
+            kumulatif += sayi
+            satirlar.append(f'{ad}_bucket{{{etiketler},le="{sinir}"}} {kumulatif}')
+        satirlar.append(f'{ad}_bucket{{{etiketler},le="+Inf"}} {self.adet}')
+        satirlar.append(f"{ad}_sum{{{etiketler}}} {self.toplam:.6f}")
+        satirlar.append(f"{ad}_count{{{etiketler}}} {self.adet}")
+        return satirlar
+
+
+def _etiket(deger: str) -> str:
+    return deger.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_BOSLUK = re.compile(r"\s+")
+
+
+def sql_ozeti(sql: str) -> str:
+    """Etiket olarak kullanılacak tek satırlık, kısaltılmış SQL."""
+    sql = _BOSLUK.sub(" ", sql).strip()
+    return sql if len(sql) <= 300 else sql[:297] + "..."
+
+
+class Metrikler:
+    def __init__(self, yavas_sorgu_sayisi: int = YAVAS_SORGU_SAYISI):
+        self.yavas_sorgu_sayisi = yavas_sorgu_sayisi
+        self._kilit = threading.Lock()
+        self.sifirla()
+
+    def sifirla(self):
+        with self._kilit:
+            # (method, route) -> [süre, sorgu sayısı, sql süresi histogramları]; (method, route, durum) -> adet
+            self._routelar = {}
+            self._durumlar = {}
+            # SQL metni -> [en yüksek süre, adet]
+            self._yavaslar = {}
+            self._yavas_esik = 0.0
+
+    def sorgu_kaydet(self, sql: str, sure: float):
+        olcum = _istek.get()
+        if olcum is not None:
+            olcum.sorgu_sayisi += 1
+            olcum.sql_suresi += sure
+        # Çoğu sorgu listenin en hızlısından da hızlı; kilide hiç girmeden çıkar
+        if sure <= self._yavas_esik and sql not in self._yavaslar:
+            return
+        with self._kilit:
+            kayit = self._yavaslar.get(sql)
+            if kayit is not None:
+                kayit[0] = max(kayit[0], sure)
+                kayit[1] += 1
+            else:
+                if len(self._yavaslar) >= self.yavas_sorgu_sayisi:
+                    en_hizli = min(self._yavaslar, key=lambda s: self._yavaslar[s][0])
+                    if self._yavaslar[en_hizli][0] >= sure:
+                        return
+                    del self._yavaslar[en_hizli]
+                self._yavaslar[sql] = [sure, 1]
+            if len(self._yavaslar) >= self.yavas_sorgu_sayisi:
+                self._yavas_esik = min(k[0] for k in self._yavaslar.values())
+
+    def istek_kaydet(self, method: str, route: str, durum: int, sure: float, olcum: IstekOlcumu):
+        with self._kilit:
+            histogramlar = self._routelar.get((method, route))
+            if histogramlar is None:
+                histogramlar = self._routelar[(method, route)] = (
+                    Histogram(SURE_KOVALARI), Histogram(SORGU_KOVALARI), Histogram(SURE_KOVALARI),
+                )
+            histogramlar[0].gozlem(sure)
+            histogramlar[1].gozlem(olcum.sorgu_sayisi)
+            histogramlar[2].gozlem(olcum.sql_suresi)
+            anahtar = (method, route, durum)
+            self._durumlar[anahtar] = self._durumlar.get(anahtar, 0) + 1
+
+    def yavas_sorgular(self) -> list:
+        """(sql, en yüksek süre, adet) listesi, en yavaştan başlayarak."""
+        with self._kilit:
+            kayitlar = [(s, k[0], k[1]) for s, k in self._yavaslar.items()]
+        # Sadece boşlukları farklı ifadeler tek satırda birleşir
+        ozetler = {}
+        for sql, sure, adet in kayitlar:
+            ozet = sql_ozeti(sql)
+            eski = ozetler.get(ozet, (0.0, 0))
+            ozetler[ozet] = (max(eski[0], sure), eski[1] + adet)
+        return sorted(((s, k[0], k[1]) for s, k in ozetler.items()), key=lambda x: -x[1])
+
+    def prometheus(self) -> str:
+        with self._kilit:
+            routelar = list(self._routelar.items())
+            durumlar = list(self._durumlar.items())
+        satirlar = [
+            "# HELP kutuphane_istek_toplam İşlenen istek sayısı",
+            "# TYPE kutuphane_istek_toplam counter",
+        ]
+        for (method, route, durum), adet in sorted(durumlar):
+            satirlar.append(f'kutuphane_istek_toplam{{method="{method}",route="{_etiket(route)}",durum="{durum}"}} {adet}')
+        tanimlar = [
+            ("kutuphane_istek_suresi_saniye", "İstek süresi (saniye)"),
+            ("kutuphane_istek_sorgu_sayisi", "İstek başına SQL sorgusu sayısı"),
+            ("kutuphane_istek_sql_suresi_saniye", "İstek başına toplam SQL süresi (saniye)"),
+        ]
+        for i, (ad, aciklama) in enumerate(tanimlar):
+            satirlar += [f"# HELP {ad} {aciklama}", f"# TYPE {ad} histogram"]
+            for (method, route), histogramlar in sorted(routelar):
+                satirlar += histogramlar[i].satirlar(ad, f'method="{method}",route="{_etiket(route)}"')
+
+        satirlar += [
+            "# HELP kutuphane_yavas_sorgu_saniye En yavaş SQL ifadelerinin gözlenen en yüksek süresi",
+            "# TYPE kutuphane_yavas_sorgu_saniye gauge",
+        ]
+        yavaslar = self.yavas_sorgular()
+        for sql, sure, _ in yavaslar:
+            satirlar.append(f'kutuphane_yavas_sorgu_saniye{{sql="{_etiket(sql)}"}} {sure:.6f}')
+        satirlar += [
+            "# HELP kutuphane_yavas_sorgu_adet En yavaş SQL ifadelerinin çalışma sayısı (listeye girdikten sonra)",
+            "# TYPE kutuphane_yavas_sorgu_adet gauge",
+        ]
+        for sql, _, adet in yavaslar:
+            satirlar.append(f'kutuphane_yavas_sorgu_adet{{sql="{_etiket(sql)}"}} {adet}')
+        return "\n".join(satirlar) + "\n"
+
+
+metrikler = Metrikler()
+
+class MetrikMiddleware:
+    def __init__(self, app, kayit: Metrikler = metrikler):
+        self.app = app
+        self.kayit = kayit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        olcum = IstekOlcumu()
+        token = _istek.set(olcum)
+        basla = time.perf_counter()
+        durum = [500]
+
+        async def gonder(mesaj):
+            if mesaj["type"] == "http.response.start":
+                durum[0] = mesaj["status"]
+                gecen = (time.perf_counter() - basla) * 1000
+                MutableHeaders(scope=mesaj).append(
+                    "Server-Timing",
+                    f'db;dur={olcum.sql_suresi * 1000:.2f};desc="{olcum.sorgu_sayisi} sorgu", app;dur={gecen:.2f}',
+                )
+            await send(mesaj)
+
+        try:
+            await self.app(scope, receive, gonder)
+        finally:
+            _istek.reset(token)
+            route = scope.get("route")
+            # Eşleşmeyen yollar tek etikette toplanır, rastgele URL'ler metrik sayısını şişirmesin
+            self.kayit.istek_kaydet(
+                scope["method"], getattr(route, "path", "eslesmeyen"), durum[0],
+                time.perf_counter() - basla, olcum,
+            )
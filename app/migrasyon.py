@@ -0,0 +1,117 @@
+"""
+Alembic migrasyonları için yardımcılar ve komut satırı.
+
+    python -m app.migrasyon               # veritabanını son sürüme yükseltir
+    python -m app.migrasyon durum         # mevcut ve son sürümü gösterir
+    python -m app.migrasyon olustur "kitaplara dil sütunu"   # modellerden yeni migrasyon
+
+Migrasyonlardan önce create_all ile kurulmuş bir veritabanında sürüm tablosu
+yoktur; yükseltme önce onu ilk sürümle damgalar, sonra kalan migrasyonları uygular.
+"""
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+
+from .database import engine as varsayilan_engine
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+ILK_SURUM = "0001"
+
+
+def autogenerate_filtresi(ad, tur, ust_adlar) -> bool:
+    # kitap_ara (FTS5) ve gölge tabloları metadata'da yok, elle yönetiliyor
+    if tur == "table" and ad is not None and ad.startswith("kitap_ara"):
+        return False
+    return True
+
+
+def alembic_ayarlari(baglanti=None) -> Config:
+    ayarlar = Config(str(ALEMBIC_INI))
+    if baglanti is not None:
+        ayarlar.attributes["connection"] = baglanti
+        # Uygulama içinden çağrılınca uygulamanın log ayarlarına dokunma
+        ayarlar.attributes["loglama"] = False
+    return ayarlar
+
+
+def son_surum() -> str:
+    return ScriptDirectory.from_config(alembic_ayarlari()).get_current_head()
+
+
+def mevcut_surum(engine=None) -> Optional[str]:
+    with (engine or varsayilan_engine).connect() as baglanti:
+        return MigrationContext.configure(baglanti).get_current_revision()
+
+
+@contextmanager
+def yabanci_anahtarlar_kapali(baglanti):
+    """
+    Blok boyunca SQLite foreign key zorlamasını kapatır, sonra eski hâline döndürür.
+    Batch migrasyonlar tabloyu kopyalayıp eskisini DROP ediyor; zorlama açıkken bu
+    DROP bağlı satırları ON DELETE CASCADE ile silerdi. PRAGMA transaction içinde
+    etkisiz olduğu için bağlantıda henüz yazma yapılmamış olmalı.
+    """
+    onceki = baglanti.exec_driver_sql("PRAGMA foreign_keys").scalar()
+    baglanti.exec_driver_sql("PRAGMA foreign_keys=OFF")
+    baglanti.commit()
+    try:
+        yield
+    finally:
+        baglanti.rollback()
+        baglanti.exec_driver_sql(f"PRAGMA foreign_keys={onceki}")
+        baglanti.commit()
+
+
+def yukselt(engine=None, hedef: str = "head"):
+    """Veritabanını `hedef` sürüme yükseltir, sürümsüz eski veritabanlarını önce damgalar."""
+    engine = engine or varsayilan_engine
+    with engine.connect() as baglanti, yabanci_anahtarlar_kapali(baglanti):
+        with baglanti.begin():
+            ayarlar = alembic_ayarlari(baglanti)
+            surum = MigrationContext.configure(baglanti).get_current_revision()
+            if surum is None and inspect(baglanti).has_table("kitaplar"):
+                command.stamp(ayarlar, ILK_SURUM)
+            command.upgrade(ayarlar, hedef)
+
+
+def damgala(engine=None, hedef: str = "head"):
+    """Şemayı migrasyon çalıştırmadan `hedef` sürümde işaretler (create_all ile kurulmuş şemalar için)."""
+    with (engine or varsayilan_engine).begin() as baglanti:
+        command.stamp(alembic_ayarlari(baglanti), hedef)
+
+
+def sema_dogrula(engine=None):
+    """Uygulama açılışında çağrılır; veritabanı son sürümde değilse başlatmayı durdurur."""
+    surum, son = mevcut_surum(engine), son_surum()
+    if surum != son:
+        raise RuntimeError(
+            f"Veritabanı şeması güncel değil (mevcut: {surum}, beklenen: {son}). "
+            "Önce `python -m app.migrasyon` çalıştırın."
+        )
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    komut = argv[0] if argv else "yukselt"
+    if komut == "yukselt":
+        yukselt(hedef=argv[1] if len(argv) > 1 else "head")
+        print(f"Veritabanı {mevcut_surum()} sürümünde.")
+    elif komut == "durum":
+        print(f"mevcut: {mevcut_surum()}, son: {son_surum()}")
+    elif komut == "olustur" and len(argv) > 1:
+        command.revision(alembic_ayarlari(), message=argv[1], autogenerate=True)
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
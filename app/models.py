@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date, Index, DDL, MetaData, Table, event
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -10,8 +10,9 @@ class Yazar(Base):
     soyad = Column(String, index=True, nullable=False)
     biyografi = Column(String, nullable=True)
 
-    # yazar silinirse kitapları da gitsin
-    kitaplar = relationship("Kitap", back_populates="yazar", cascade="all, delete")
+    # yazar silinirse kitapları da gitsin. Silmeyi veritabanı yapıyor (ON DELETE CASCADE);
+    # passive_deletes ile ORM yüklenmemiş kitapları silmek için belleğe çekmez.
+    kitaplar = relationship("Kitap", back_populates="yazar", cascade="all, delete", passive_deletes=True)
 
 class Kategori(Base):
     __tablename__ = "kategoriler"
@@ -19,7 +20,8 @@ class Kategori(Base):
     id = Column(Integer, primary_key=True, index=True)
     ad = Column(String, unique=True, index=True, nullable=False)
 
-    kitaplar = relationship("Kitap", back_populates="kategori")
+    # kategori silinince kitapların kategori_id'si veritabanında boşaltılır (ON DELETE SET NULL)
+    kitaplar = relationship("Kitap", back_populates="kategori", passive_deletes=True)
 
 class Kitap(Base):
     __tablename__ = "kitaplar"
@@ -27,13 +29,18 @@ class Kitap(Base):
     id = Column(Integer, primary_key=True, index=True)
     baslik = Column(String, index=True, nullable=False)
     isbn = Column(String, unique=True, index=True, nullable=False)
-    yayin_yili = Column(Integer, nullable=True)
-    yazar_id = Column(Integer, ForeignKey("yazarlar.id"))
-    kategori_id = Column(Integer, ForeignKey("kategoriler.id"), nullable=True)
+    yayin_yili = Column(Integer, nullable=True, index=True)
+    yazar_id = Column(Integer, ForeignKey("yazarlar.id", ondelete="CASCADE"), index=True)
+    kategori_id = Column(Integer, ForeignKey("kategoriler.id", ondelete="SET NULL"), nullable=True, index=True)
+
+    # Ödünç kayıtlarından türetilen sayaçlar, ödünç yazılırken aynı transaction'da güncellenir (bkz. sayaclar.py)
+    odunc_acik = Column(Boolean, nullable=False, default=False, server_default="0")
+    toplam_odunc = Column(Integer, nullable=False, default=0, server_default="0")
+    son_odunc_tarihi = Column(Date, nullable=True)
 
     yazar = relationship("Yazar", back_populates="kitaplar")
     kategori = relationship("Kategori", back_populates="kitaplar")
-    odunc_kayitlari = relationship("OduncKayit", back_populates="kitap", cascade="all, delete")
+    odunc_kayitlari = relationship("OduncKayit", back_populates="kitap", cascade="all, delete", passive_deletes=True)
 
 class Kullanici(Base):
     __tablename__ = "kullanicilar"
@@ -43,17 +50,130 @@ class Kullanici(Base):
     soyad = Column(String, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     aktif_mi = Column(Boolean, default=True)
+    # Henüz teslim edilmemiş ödünç sayısı (bkz. sayaclar.py)
+    acik_odunc_sayisi = Column(Integer, nullable=False, default=0, server_default="0")
 
-    odunc_kayitlari = relationship("OduncKayit", back_populates="kullanici", cascade="all, delete")
+    odunc_kayitlari = relationship("OduncKayit", back_populates="kullanici", cascade="all, delete", passive_deletes=True)
 
 class OduncKayit(Base):
     __tablename__ = "odunc_kayitlari"
 
     id = Column(Integer, primary_key=True, index=True)
-    kullanici_id = Column(Integer, ForeignKey("kullanicilar.id"))
-    kitap_id = Column(Integer, ForeignKey("kitaplar.id"))
-    alis_tarihi = Column(Date, nullable=False)
+    kullanici_id = Column(Integer, ForeignKey("kullanicilar.id", ondelete="CASCADE"))
+    kitap_id = Column(Integer, ForeignKey("kitaplar.id", ondelete="CASCADE"))
+    alis_tarihi = Column(Date, nullable=False, index=True)
     teslim_tarihi = Column(Date, nullable=True) # Null ise henüz teslim edilmemiş
 
     kullanici = relationship("Kullanici", back_populates="odunc_kayitlari")
     kitap = relationship("Kitap", back_populates="odunc_kayitlari")
+
+    __table_args__ = (
+        # bir kitabın aynı anda tek bir açık ödüncü olabilir (yarış durumuna karşı DB garantisi)
+        Index("ux_odunc_acik_kitap", "kitap_id", unique=True, sqlite_where=teslim_tarihi.is_(None)),
+        # kitabın ödünç geçmişi / müsaitlik kontrolü
+        Index("ix_odunc_kitap_teslim", "kitap_id", "teslim_tarihi"),
+        # kullanıcının ödünç geçmişi, alış tarihine göre sıralı
+        Index("ix_odunc_kullanici_alis", "kullanici_id", "alis_tarihi"),
+        # kullanıcının elindeki kitaplar; açık ödünçler tablonun küçük bir kısmı
+        Index("ix_odunc_acik_kullanici", "kullanici_id", sqlite_where=teslim_tarihi.is_(None)),
+    )
+
+class DegisiklikSayaci(Base):
+    """
+    Tablo başına değişiklik sayacı. Aşağıdaki triggerlar her INSERT/UPDATE/DELETE'te
+    artırır; liste endpointlerinin ETag ve Last-Modified başlıkları buradan hesaplanır.
+    """
+    __tablename__ = "degisiklik_sayaclari"
+
+    tablo = Column(String, primary_key=True)
+    surum = Column(Integer, nullable=False, default=0)
+    degisme_zamani = Column(String, nullable=False)  # UTC, "YYYY-MM-DD HH:MM:SS.SSS"
+
+IZLENEN_TABLOLAR = ("yazarlar", "kategoriler", "kitaplar", "kullanicilar", "odunc_kayitlari")
+
+def sayac_trigger_ddl(tablo: str, olay: str) -> str:
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{tablo}_{olay.lower()}_sayac AFTER {olay} ON {tablo}
+        BEGIN
+            INSERT INTO degisiklik_sayaclari (tablo, surum, degisme_zamani)
+            VALUES ('{tablo}', 1, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+            ON CONFLICT(tablo) DO UPDATE SET surum = surum + 1, degisme_zamani = excluded.degisme_zamani;
+        END
+    """
+
+def _ddl(sql: str) -> DDL:
+    # DDL ifadeleri %-biçimlendirmeden geçiyor, strftime kalıpları kaçırılmalı
+    return DDL(sql.replace("%", "%%"))
+
+# Tablo drop edilince triggerları da gider, create_all'da yeniden kurulur
+for _tablo in IZLENEN_TABLOLAR:
+    for _olay in ("INSERT", "UPDATE", "DELETE"):
+        event.listen(Base.metadata.tables[_tablo], "after_create", _ddl(sayac_trigger_ddl(_tablo, _olay)))
+
+# --- Tam metin arama (FTS5) ---
+# kitap_ara, kitap başlığı ve yazar adının aranabilir kopyasını tutar (rowid = kitaplar.id).
+# SQLite'ın unicode61 tokenizer'ı büyük/küçük harfi katlar ama Türkçe İ/I'yı bilmez;
+# triggerlar bu iki harfi önceden çeviriyor (İ->i, I->ı). Sorgu tarafı utils.tr_katla ile aynısını yapar.
+def _tr_katla_sql(ifade: str) -> str:
+    return f"replace(replace({ifade}, 'İ', 'i'), 'I', 'ı')"
+
+_YAZAR_ADI_SQL = "coalesce((SELECT ad || ' ' || soyad FROM yazarlar WHERE id = NEW.yazar_id), '')"
+
+# Sorgularda join için; metadata'ya bağlı değil, create_all ile oluşturulmaz
+kitap_ara = Table("kitap_ara", MetaData(), Column("rowid", Integer), Column("baslik", String), Column("yazar", String))
+
+ARAMA_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS kitap_ara
+    USING fts5(baslik, yazar, tokenize = 'unicode61 remove_diacritics 0')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_kitaplar_ara_ekle AFTER INSERT ON kitaplar
+    BEGIN
+        INSERT INTO kitap_ara (rowid, baslik, yazar)
+        VALUES (NEW.id, {_tr_katla_sql("NEW.baslik")}, {_tr_katla_sql(_YAZAR_ADI_SQL)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_kitaplar_ara_guncelle AFTER UPDATE OF baslik, yazar_id ON kitaplar
+    BEGIN
+        UPDATE kitap_ara SET baslik = {_tr_katla_sql("NEW.baslik")}, yazar = {_tr_katla_sql(_YAZAR_ADI_SQL)}
+        WHERE rowid = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_kitaplar_ara_sil AFTER DELETE ON kitaplar
+    BEGIN
+        DELETE FROM kitap_ara WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_yazarlar_ara_guncelle AFTER UPDATE OF ad, soyad ON yazarlar
+    BEGIN
+        UPDATE kitap_ara SET yazar = {_tr_katla_sql("NEW.ad || ' ' || NEW.soyad")}
+        WHERE rowid IN (SELECT id FROM kitaplar WHERE yazar_id = NEW.id);
+    END
+    """,
+]
+
+for _sql in ARAMA_DDL:
+    event.listen(Kitap.__table__, "after_create", _ddl(_sql))
+# kitap_ara metadata'da yok; kitaplar ile birlikte düşmeli
+event.listen(Kitap.__table__, "before_drop", DDL("DROP TABLE IF EXISTS kitap_ara"))
+
+# --- Ödünç arşivi ---
+# Teslim edilmiş eski ödünçler ATTACH edilen `arsiv` dosyasına taşınır (bkz. arsiv.py).
+# Ana metadata'da değil: migrasyonlar ve create_all bu tabloyu görmez, `arsiv.arsiv_kur` kurar.
+# Aynı id'ler korunur; dosyalar arası foreign key olamadığı için bağlı satırları arsiv.py siler.
+ARSIV_METADATA = MetaData(schema="arsiv")
+arsiv_odunc = Table(
+    "odunc_kayitlari", ARSIV_METADATA,
+    Column("id", Integer, primary_key=True),
+    Column("kullanici_id", Integer),
+    Column("kitap_id", Integer),
+    Column("alis_tarihi", Date, nullable=False),
+    Column("teslim_tarihi", Date),
+    Index("ix_arsiv_odunc_kitap", "kitap_id"),
+    Index("ix_arsiv_odunc_kullanici_alis", "kullanici_id", "alis_tarihi"),
+    Index("ix_arsiv_odunc_alis", "alis_tarihi"),
+)
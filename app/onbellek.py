@@ -0,0 +1,110 @@
+"""
+GET-by-id endpointleri için süreç içi (in-process) okuma önbelleği.
+
+Anahtarlar (varlık, id) ikilisi, değerler session'dan bağımsız Pydantic
+cevap modelleridir. Güncelleme/silme handler'ları commit'ten sonra ilgili
+anahtarları geçersiz kılar. Her uvicorn worker'ının kendi önbelleği olduğu için
+diğer worker'lardaki kopyalar en fazla ONBELLEK_TTL saniye eski kalabilir.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+_YOK = object()
+
+
+class Onbellek:
+    """Thread-safe, boyutu sınırlı LRU önbellek; kayıtlar `ttl` saniye sonra düşer."""
+
+    def __init__(self, boyut: int = 10000, ttl: float = 60.0, saat: Callable[[], float] = time.monotonic):
+        self.boyut = boyut
+        self.ttl = ttl
+        self._saat = saat
+        self._veriler: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._kilit = threading.Lock()
+        # Her geçersiz kılmada artar; yükleme sürerken veri değiştiyse eski sonuç yazılmaz
+        self._nesil = 0
+        self.isabet = 0
+        self.iska = 0
+
+    def getir(self, anahtar: Hashable, varsayilan=None):
+        with self._kilit:
+            kayit = self._veriler.get(anahtar)
+            if kayit is not None:
+                deger, son_gecerlilik = kayit
+                if son_gecerlilik > self._saat():
+                    self._veriler.move_to_end(anahtar)
+                    self.isabet += 1
+                    return deger
+                del self._veriler[anahtar]
+            self.iska += 1
+            return varsayilan
+
+    def koy(self, anahtar: Hashable, deger, nesil: Optional[int] = None):
+        if self.boyut <= 0:
+            return
+        with self._kilit:
+            if nesil is not None and nesil != self._nesil:
+                return
+            self._veriler[anahtar] = (deger, self._saat() + self.ttl)
+            self._veriler.move_to_end(anahtar)
+            while len(self._veriler) > self.boyut:
+                self._veriler.popitem(last=False)
+
+    def getir_veya_yukle(self, anahtar: Hashable, yukle: Callable[[], object]):
+        """
+        Önbellekte varsa döner, yoksa `yukle()` ile getirip saklar.
+        None sonuçlar (bulunamadı) önbelleğe alınmaz.
+        """
+        deger = self.getir(anahtar, _YOK)
+        if deger is not _YOK:
+            return deger
+        nesil = self._nesil
+        deger = yukle()
+        if deger is not None:
+            self.koy(anahtar, deger, nesil)
+        return deger
+
+    def sil(self, *anahtarlar: Hashable):
+        with self._kilit:
+            self._nesil += 1
+            for anahtar in anahtarlar:
+                self._veriler.pop(anahtar, None)
+
+    def temizle(self, varlik: Optional[str] = None):
+        """Tüm önbelleği ya da sadece bir varlık türünün kayıtlarını siler."""
+        with self._kilit:
+            self._nesil += 1
+            if varlik is None:
+                self._veriler.clear()
+                return
+            for anahtar in [a for a in self._veriler if a[0] == varlik]:
+                del self._veriler[anahtar]
+
+    def istatistik(self) -> dict:
+        with self._kilit:
+            toplam = self.isabet + self.iska
+            return {
+                "isabet": self.isabet,
+                "iska": self.iska,
+                "isabet_orani": round(self.isabet / toplam, 4) if toplam else 0.0,
+                "kayit_sayisi": len(self._veriler),
+                "kapasite": self.boyut,
+                "ttl": self.ttl,
+            }
+
+
+# ONBELLEK_BOYUT=0 önbelleği kapatır
+onbellek = Onbellek(
+    boyut=int(os.getenv("ONBELLEK_BOYUT", 10000)),
+    ttl=float(os.getenv("ONBELLEK_TTL", 60)),
+)
+
+# Kapalı tarih aralıklarının istatistikleri. Anahtarlar tablo sürümlerini içerdiği için
+# veri değişince eski sonuçlar kendiliğinden kullanılmaz olur; TTL sadece bellek için.
+istatistik_onbellegi = Onbellek(
+    boyut=int(os.getenv("ISTATISTIK_ONBELLEK_BOYUT", 1000)),
+    ttl=float(os.getenv("ISTATISTIK_ONBELLEK_TTL", 3600)),
+)
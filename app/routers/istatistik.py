@@ -0,0 +1,142 @@
+import os
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..arsiv import birlesik_model
+from ..database import get_db
+from ..kosullu import sayaclari_oku
+from ..onbellek import istatistik_onbellegi
+
+router = APIRouter(
+    prefix="/api/istatistik",
+    tags=["İstatistik"]
+)
+
+# Bir ödüncün gecikmiş sayılması için geçmesi gereken gün sayısı
+ODUNC_SURESI_GUN = int(os.getenv("ODUNC_SURESI_GUN", 14))
+
+
+# Raporlar `ok` üzerinden yazılı: arşiv bağlıysa (bkz. arsiv.py) ana tablo ile arşivin birleşimi,
+# değilse OduncKayit. Eski ödünçleri arşive taşımak geçmiş aralıkların sonuçlarını değiştirmez.
+def _aralik_filtresi(query, ok, baslangic: Optional[date], bitis: Optional[date]):
+    # Aralık alış tarihine göre, iki uç da dahil
+    if baslangic is not None and bitis is not None and baslangic > bitis:
+        raise HTTPException(status_code=400, detail="Başlangıç tarihi bitişten sonra olamaz")
+    if baslangic is not None:
+        query = query.filter(ok.alis_tarihi >= baslangic)
+    if bitis is not None:
+        query = query.filter(ok.alis_tarihi <= bitis)
+    return query
+
+
+def _onbellekli(db: Session, anahtar: tuple, kesinlesme: Optional[date], tablolar: tuple, hesapla):
+    """
+    Sonuç `kesinlesme` gününden sonra artık değişmeyecekse önbellekten döner.
+    Geçmiş bir kayıt sonradan düzeltilirse tablo sürümü değişir ve anahtar da değişir.
+    """
+    if kesinlesme is None or kesinlesme >= date.today():
+        return hesapla()
+    sayaclar = sayaclari_oku(db, tablolar)
+    if sayaclar is None:
+        return hesapla()
+    surumler = tuple(sayaclar[t].surum for t in tablolar)
+    return istatistik_onbellegi.getir_veya_yukle(("istatistik",) + anahtar + surumler, hesapla)
+
+
+@router.get("/en-cok-odunc-alinan", response_model=List[schemas.EnCokOduncAlinan])
+def en_cok_odunc_alinan(baslangic: Optional[date] = None, bitis: Optional[date] = None,
+                        limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    """Aralıkta en çok ödünç alınan kitaplar."""
+    def hesapla():
+        ok = birlesik_model()
+        sayi = func.count(ok.id).label("odunc_sayisi")
+        query = (
+            db.query(models.Kitap.id.label("kitap_id"), models.Kitap.baslik, sayi)
+            .join(ok, ok.kitap_id == models.Kitap.id)
+        )
+        query = _aralik_filtresi(query, ok, baslangic, bitis)
+        satirlar = query.group_by(models.Kitap.id).order_by(sayi.desc(), models.Kitap.id).limit(limit).all()
+        return [schemas.EnCokOduncAlinan.model_validate(s, from_attributes=True) for s in satirlar]
+
+    return _onbellekli(db, ("en_cok_odunc_alinan", baslangic, bitis, limit), bitis,
+                       ("odunc_kayitlari", "kitaplar"), hesapla)
+
+
+@router.get("/aktif-okuyucular", response_model=List[schemas.AktifOkuyucu])
+def aktif_okuyucular(baslangic: Optional[date] = None, bitis: Optional[date] = None,
+                     limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    """Aralıkta en çok kitap alan kullanıcılar."""
+    def hesapla():
+        ok = birlesik_model()
+        sayi = func.count(ok.id).label("odunc_sayisi")
+        acik = func.count(ok.id).filter(ok.teslim_tarihi.is_(None)).label("acik_odunc")
+        query = (
+            db.query(models.Kullanici.id.label("kullanici_id"), models.Kullanici.ad, models.Kullanici.soyad,
+                     sayi, acik)
+            .join(ok, ok.kullanici_id == models.Kullanici.id)
+        )
+        query = _aralik_filtresi(query, ok, baslangic, bitis)
+        satirlar = query.group_by(models.Kullanici.id).order_by(sayi.desc(), models.Kullanici.id).limit(limit).all()
+        return [schemas.AktifOkuyucu.model_validate(s, from_attributes=True) for s in satirlar]
+
+    # Teslimler de ödünç tablosunun sürümünü artırdığı için önbellekteki açık ödünç sayısı eskimez
+    return _onbellekli(db, ("aktif_okuyucular", baslangic, bitis, limit), bitis,
+                       ("odunc_kayitlari", "kullanicilar"), hesapla)
+
+
+@router.get("/geciken-kategoriler", response_model=List[schemas.KategoriGecikme])
+def geciken_kategoriler(baslangic: Optional[date] = None, bitis: Optional[date] = None,
+                        gun: int = Query(ODUNC_SURESI_GUN, ge=0, le=3650), db: Session = Depends(get_db)):
+    """
+    Kategori başına ödünç ve gecikme sayıları. `gun` günden geç teslim edilen ya da
+    bugün itibarıyla `gun` günü geçtiği hâlde teslim edilmemiş ödünçler gecikmiş sayılır.
+    """
+    def hesapla():
+        ok = birlesik_model()
+        son_gun = date.today() - timedelta(days=gun)
+        gecikmis = or_(
+            and_(ok.teslim_tarihi.is_(None), ok.alis_tarihi < son_gun),
+            func.julianday(ok.teslim_tarihi) - func.julianday(ok.alis_tarihi) > gun,
+        )
+        query = (
+            db.query(
+                models.Kategori.id.label("kategori_id"),
+                models.Kategori.ad.label("kategori"),
+                func.count(ok.id).label("toplam_odunc"),
+                func.sum(case((gecikmis, 1), else_=0)).label("geciken"),
+            )
+            .select_from(ok)
+            .join(models.Kitap, ok.kitap_id == models.Kitap.id)
+            .outerjoin(models.Kategori, models.Kitap.kategori_id == models.Kategori.id)
+        )
+        query = _aralik_filtresi(query, ok, baslangic, bitis)
+        satirlar = query.group_by(models.Kategori.id).order_by(models.Kategori.ad).all()
+        return [schemas.KategoriGecikme.model_validate(s, from_attributes=True) for s in satirlar]
+
+    # Aralığın son ödüncünün süresi dolana kadar gecikme sayısı bugünün tarihine bağlı
+    kesinlesme = None
+    if bitis is not None:
+        try:
+            kesinlesme = bitis + timedelta(days=gun)
+        except OverflowError:
+            pass  # date.max'ı aşıyor: hiç kesinleşmez
+    return _onbellekli(db, ("geciken_kategoriler", baslangic, bitis, gun), kesinlesme,
+                       ("odunc_kayitlari", "kitaplar", "kategoriler"), hesapla)
+
+
+@router.get("/aylik", response_model=List[schemas.AylikOdunc])
+def aylik_odunc(baslangic: Optional[date] = None, bitis: Optional[date] = None, db: Session = Depends(get_db)):
+    """Aylara göre ödünç sayıları (alış tarihine göre)."""
+    def hesapla():
+        ok = birlesik_model()
+        ay = func.strftime("%Y-%m", ok.alis_tarihi).label("ay")
+        query = _aralik_filtresi(db.query(ay, func.count(ok.id).label("odunc_sayisi")), ok, baslangic, bitis)
+        satirlar = query.group_by(ay).order_by(ay).all()
+        return [schemas.AylikOdunc.model_validate(s, from_attributes=True) for s in satirlar]
+
+    return _onbellekli(db, ("aylik", baslangic, bitis), bitis, ("odunc_kayitlari",), hesapla)
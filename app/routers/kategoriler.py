@@ -1,18 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas
+from typing import Annotated, List, Optional
+from .. import hizli_json, models, schemas, tek_sorgu
 from ..database import get_db
+from ..filtreler import FiltreTanimi, ListeFiltresi, filtrele
+from ..kosullu import etagli, kayit_kosullu, liste_kosullu
+from ..onbellek import onbellek
+from ..sayfalama import sayfala
+from ..toplu_getir import idlerle_getir
 
 router = APIRouter(
     prefix="/api/kategoriler",
     tags=["Kategoriler"]
 )
 
+KATEGORI_FILTRESI = FiltreTanimi(models.Kategori, esit=("ad",), siralanabilir=("id", "ad"))
+
 @router.get("/", response_model=List[schemas.KategoriResponse])
-def get_kategoriler(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_kategoriler(skip: int = 0, limit: int = 100, after_id: Optional[int] = None, cursor: Optional[str] = None,
+                    filtre: Annotated[ListeFiltresi, Depends(KATEGORI_FILTRESI)] = None,
+                    request: Request = None, response: Response = None, db: Session = Depends(get_db)):
     # Kategorileri listele
-    return db.query(models.Kategori).offset(skip).limit(limit).all()
+    degismedi = liste_kosullu(db, request, response, "kategoriler")
+    if degismedi is not None:
+        return degismedi
+    query = filtrele(hizli_json.sorgu(db, models.Kategori, schemas.KategoriResponse), filtre, after_id, cursor)
+    kayitlar = sayfala(query, models.Kategori, skip, limit, after_id, cursor, response)
+    return hizli_json.yanit(kayitlar, schemas.KategoriResponse, response)
 
 @router.post("/", response_model=schemas.KategoriResponse, status_code=201)
 def create_kategori(kategori: schemas.KategoriCreate, db: Session = Depends(get_db)):
@@ -22,32 +36,38 @@ def create_kategori(kategori: schemas.KategoriCreate, db: Session = Depends(get_
     db.refresh(new_kat)
     return new_kat
 
-@router.get("/{id}", response_model=schemas.KategoriResponse)
-def get_kategori(id: int, db: Session = Depends(get_db)):
+@router.post("/batch-get", response_model=schemas.TopluGetirSonucu[schemas.KategoriResponse])
+def batch_get_kategoriler(istek: schemas.TopluGetirIstek, db: Session = Depends(get_db)):
+    """Birden fazla kategori id'si tek istekte; sonuçlar istek sırasıyla, bulunamayanlar `bulundu: false`."""
+    return idlerle_getir(db, models.Kategori, schemas.KategoriResponse, istek.ids)
+
+def _kategori_yukle(db: Session, id: int):
     kat = db.query(models.Kategori).filter(models.Kategori.id == id).first()
+    return schemas.KategoriResponse.model_validate(kat) if kat is not None else None
+
+@router.get("/{id}", response_model=schemas.KategoriResponse)
+def get_kategori(id: int, request: Request = None, response: Response = None, db: Session = Depends(get_db)):
+    kat = onbellek.getir_veya_yukle(("kategori", id), lambda: etagli(_kategori_yukle(db, id)))
     if kat is None:
         raise HTTPException(status_code=404, detail="Kategori bulunamadı")
-    return kat
+    return kayit_kosullu(kat, request, response)
 
 @router.patch("/{id}", response_model=schemas.KategoriResponse)
 def update_kategori(id: int, kategori_update: schemas.KategoriUpdate, db: Session = Depends(get_db)):
-    db_kategori = db.query(models.Kategori).filter(models.Kategori.id == id).first()
-    if db_kategori is None:
+    satir = tek_sorgu.guncelle(db, models.Kategori, id, kategori_update.model_dump(exclude_unset=True))
+    if satir is None:
         raise HTTPException(status_code=404, detail="Kategori bulunamadı")
-    
-    update_data = kategori_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_kategori, key, value)
-    
     db.commit()
-    db.refresh(db_kategori)
-    return db_kategori
+    onbellek.sil(("kategori", id))
+    return schemas.KategoriResponse.model_validate(satir)
 
 @router.delete("/{id}", status_code=204)
 def delete_kategori(id: int, db: Session = Depends(get_db)):
-    kat = db.query(models.Kategori).filter(models.Kategori.id == id).first()
-    if kat is None:
+    # Kitapların kategori_id'sini veritabanı boşaltıyor (ON DELETE SET NULL), nesneyi yüklemeye gerek yok
+    if tek_sorgu.sil(db, models.Kategori, id) is None:
         raise HTTPException(status_code=404, detail="Silinecek kategori yok")
-    db.delete(kat)
     db.commit()
+    # kategorinin kitaplarında kategori_id boşaltıldı
+    onbellek.sil(("kategori", id))
+    onbellek.temizle("kitap")
     return None
@@ -1,48 +1,141 @@
-from fastapi import APIRouter, Depends, HTTPException
+from contextlib import contextmanager
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas
+from typing import Annotated, List, Optional
+from .. import hizli_json, models, schemas, tek_sorgu, utils
+from ..asenkron import senkron_kalsin
 from ..database import get_db
+from ..disa_aktar import Bicim, akis_yaniti
+from ..filtreler import FiltreTanimi, ListeFiltresi, filtrele
+from ..kosullu import etagli, kayit_kosullu, liste_kosullu
+from ..onbellek import onbellek
+from ..sayfalama import sayfala
+from ..toplu import toplu_yukle
+from ..toplu_getir import idlerle_getir
 
 router = APIRouter(
     prefix="/api/kitaplar",
     tags=["Kitaplar"]
 )
 
+KITAP_FILTRESI = FiltreTanimi(
+    models.Kitap,
+    esit=("yazar_id", "kategori_id", "yayin_yili", "odunc_acik"),
+    aralik=("yayin_yili",),
+    siralanabilir=("id", "baslik", "yayin_yili"),
+)
+
 @router.get("/", response_model=List[schemas.KitapResponse])
-def get_kitaplar(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_kitaplar(skip: int = 0, limit: int = 100, after_id: Optional[int] = None, cursor: Optional[str] = None,
+                 filtre: Annotated[ListeFiltresi, Depends(KITAP_FILTRESI)] = None,
+                 request: Request = None, response: Response = None, db: Session = Depends(get_db)):
     # Tüm kitapları çekelim
-    query = db.query(models.Kitap)
-    return query.offset(skip).limit(limit).all()
+    degismedi = liste_kosullu(db, request, response, "kitaplar")
+    if degismedi is not None:
+        return degismedi
+    query = filtrele(hizli_json.sorgu(db, models.Kitap, schemas.KitapResponse), filtre, after_id, cursor)
+    kayitlar = sayfala(query, models.Kitap, skip, limit, after_id, cursor, response)
+    return hizli_json.yanit(kayitlar, schemas.KitapResponse, response)
+
+@contextmanager
+def _referans_kontrolu(db: Session):
+    # foreign key'ler zorlanıyor; olmayan yazar ya da kategoriye kitap bağlanamaz
+    try:
+        yield
+    except IntegrityError as e:
+        db.rollback()
+        if "FOREIGN KEY constraint failed" in str(e.orig):
+            raise HTTPException(status_code=404, detail="Yazar ya da kategori bulunamadı")
+        raise
 
 @router.post("/", response_model=schemas.KitapResponse, status_code=201)
 def create_kitap(kitap: schemas.KitapCreate, db: Session = Depends(get_db)):
     new_kitap = models.Kitap(**kitap.model_dump())
     db.add(new_kitap)
-    db.commit()
+    with _referans_kontrolu(db):
+        db.commit()
     db.refresh(new_kitap)
+    onbellek.sil(("yazar", new_kitap.yazar_id))
     return new_kitap
 
-@router.get("/{id}", response_model=schemas.KitapResponse)
-def get_kitap(id: int, db: Session = Depends(get_db)):
+def _isbn_kontrol(kitap: schemas.KitapCreate):
+    if not utils.isbn_dogrula(kitap.isbn):
+        return "Geçersiz ISBN-13"
+    return None
+
+@router.post("/bulk", response_model=schemas.TopluYuklemeSonucu)
+async def bulk_create_kitaplar(request: Request, db: Session = Depends(get_db)):
+    """
+    Toplu kitap ekleme. Gövde JSON dizi ya da `application/x-ndjson` (her satırda bir kayıt) olabilir.
+    Hatalı satırlar atlanır ve cevapta satır numarasıyla listelenir.
+    """
+    sonuc = await toplu_yukle(request, db, models.Kitap, schemas.KitapCreate, _isbn_kontrol)
+    onbellek.temizle("yazar")
+    return sonuc
+
+@router.get("/export")
+@senkron_kalsin
+def export_kitaplar(bicim: Bicim = "ndjson", db: Session = Depends(get_db)):
+    """Kitap kataloğunun tamamını NDJSON ya da CSV olarak akış hâlinde indirir."""
+    return akis_yaniti(db, models.Kitap, schemas.KitapResponse, bicim, "kitaplar")
+
+@router.get("/ara", response_model=List[schemas.KitapResponse])
+def ara_kitaplar(q: str = Query(..., min_length=1, max_length=200), skip: int = 0, limit: int = 20,
+                 request: Request = None, response: Response = None, db: Session = Depends(get_db)):
+    """
+    Kitap başlığı ve yazar adında tam metin arama (SQLite FTS5).
+    Türkçe büyük/küçük harf duyarsızdır, kelimeler önek olarak eşleşir ("pam" -> "Pamuk")
+    ve sonuçlar alaka sırasıyla (bm25, başlık eşleşmesi daha ağır) döner.
+    """
+    eslesme = utils.fts_sorgusu(q)
+    if not eslesme:
+        return []
+    degismedi = liste_kosullu(db, request, response, "kitaplar", "yazarlar")
+    if degismedi is not None:
+        return degismedi
+    return (
+        db.query(models.Kitap)
+        .join(models.kitap_ara, models.kitap_ara.c.rowid == models.Kitap.id)
+        .filter(text("kitap_ara MATCH :eslesme"))
+        .order_by(text("bm25(kitap_ara, 2.0, 1.0)"))
+        .params(eslesme=eslesme)
+        .offset(skip).limit(limit)
+        .all()
+    )
+
+@router.post("/batch-get", response_model=schemas.TopluGetirSonucu[schemas.KitapResponse])
+def batch_get_kitaplar(istek: schemas.TopluGetirIstek, db: Session = Depends(get_db)):
+    """Birden fazla kitap id'si tek istekte; sonuçlar istek sırasıyla, bulunamayanlar `bulundu: false`."""
+    return idlerle_getir(db, models.Kitap, schemas.KitapResponse, istek.ids)
+
+def _kitap_yukle(db: Session, id: int):
     k = db.query(models.Kitap).filter(models.Kitap.id == id).first()
+    return schemas.KitapResponse.model_validate(k) if k is not None else None
+
+@router.get("/{id}", response_model=schemas.KitapResponse)
+def get_kitap(id: int, request: Request = None, response: Response = None, db: Session = Depends(get_db)):
+    k = onbellek.getir_veya_yukle(("kitap", id), lambda: etagli(_kitap_yukle(db, id)))
     if k is None:
         raise HTTPException(status_code=404, detail="Aradığınız kitap sistemde yok")
-    return k
+    return kayit_kosullu(k, request, response)
 
 @router.patch("/{id}", response_model=schemas.KitapResponse)
 def update_kitap(id: int, kitap_update: schemas.KitapUpdate, db: Session = Depends(get_db)):
-    db_kitap = db.query(models.Kitap).filter(models.Kitap.id == id).first()
-    if db_kitap is None:
-        raise HTTPException(status_code=404, detail="Kitap bulunamadı")
-    
     update_data = kitap_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_kitap, key, value)
-    
-    db.commit()
-    db.refresh(db_kitap)
-    return db_kitap
+    # Tek ifade: UPDATE ... RETURNING (bkz. tek_sorgu.py)
+    with _referans_kontrolu(db):
+        satir = tek_sorgu.guncelle(db, models.Kitap, id, update_data)
+        if satir is None:
+            raise HTTPException(status_code=404, detail="Kitap bulunamadı")
+        db.commit()
+    onbellek.sil(("kitap", id), ("yazar", satir.yazar_id))
+    if "yazar_id" in update_data:
+        # Eski yazar RETURNING'de yok; kitabı listesinde tutan yazar detayı da düşmeli
+        onbellek.temizle("yazar")
+    return schemas.KitapResponse.model_validate(satir)
 
 @router.delete("/{id}", status_code=204)
 def delete_kitap(id: int, db: Session = Depends(get_db)):
@@ -50,6 +143,8 @@ def delete_kitap(id: int, db: Session = Depends(get_db)):
     if k is None:
         raise HTTPException(status_code=404, detail="Silinecek kitap bulunamadı")
     
+    # ORM yolu: ödünçleri veritabanı siliyor, elinde tutan kullanıcıların sayaçları flush olaylarında düzeltiliyor
     db.delete(k)
     db.commit()
+    onbellek.sil(("kitap", id), ("yazar", k.yazar_id))
     return None
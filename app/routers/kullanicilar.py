@@ -1,18 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas
+from typing import Annotated, List, Optional
+from .. import hizli_json, models, schemas, tek_sorgu
 from ..database import get_db
+from ..filtreler import FiltreTanimi, ListeFiltresi, filtrele
+from ..kosullu import etagli, kayit_kosullu, liste_kosullu
+from ..onbellek import onbellek
+from ..sayfalama import sayfala
+from ..toplu import toplu_yukle
+from ..toplu_getir import idlerle_getir
 
 router = APIRouter(
     prefix="/api/kullanicilar",
     tags=["Kullanıcılar"]
 )
 
+KULLANICI_FILTRESI = FiltreTanimi(
+    models.Kullanici,
+    esit=("ad", "soyad", "email", "aktif_mi"),
+    siralanabilir=("id", "ad", "soyad", "email"),
+)
+
 @router.get("/", response_model=List[schemas.KullaniciResponse])
-def get_kullanicilar(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_kullanicilar(skip: int = 0, limit: int = 100, after_id: Optional[int] = None, cursor: Optional[str] = None,
+                     filtre: Annotated[ListeFiltresi, Depends(KULLANICI_FILTRESI)] = None,
+                     request: Request = None, response: Response = None, db: Session = Depends(get_db)):
     # Listeyi çek
-    return db.query(models.Kullanici).offset(skip).limit(limit).all()
+    degismedi = liste_kosullu(db, request, response, "kullanicilar")
+    if degismedi is not None:
+        return degismedi
+    query = filtrele(hizli_json.sorgu(db, models.Kullanici, schemas.KullaniciResponse), filtre, after_id, cursor)
+    kayitlar = sayfala(query, models.Kullanici, skip, limit, after_id, cursor, response)
+    return hizli_json.yanit(kayitlar, schemas.KullaniciResponse, response)
 
 @router.post("/", response_model=schemas.KullaniciResponse, status_code=201)
 def create_kullanici(kullanici: schemas.KullaniciCreate, db: Session = Depends(get_db)):
@@ -22,32 +41,46 @@ def create_kullanici(kullanici: schemas.KullaniciCreate, db: Session = Depends(g
     db.refresh(new_user)
     return new_user
 
-@router.get("/{id}", response_model=schemas.KullaniciResponse)
-def get_kullanici(id: int, db: Session = Depends(get_db)):
+@router.post("/bulk", response_model=schemas.TopluYuklemeSonucu)
+async def bulk_create_kullanicilar(request: Request, db: Session = Depends(get_db)):
+    """
+    Toplu kullanıcı ekleme. Gövde JSON dizi ya da `application/x-ndjson` (her satırda bir kayıt) olabilir.
+    Hatalı satırlar atlanır ve cevapta satır numarasıyla listelenir.
+    """
+    return await toplu_yukle(request, db, models.Kullanici, schemas.KullaniciCreate)
+
+@router.post("/batch-get", response_model=schemas.TopluGetirSonucu[schemas.KullaniciResponse])
+def batch_get_kullanicilar(istek: schemas.TopluGetirIstek, db: Session = Depends(get_db)):
+    """Birden fazla kullanıcı id'si tek istekte; sonuçlar istek sırasıyla, bulunamayanlar `bulundu: false`."""
+    return idlerle_getir(db, models.Kullanici, schemas.KullaniciResponse, istek.ids)
+
+def _kullanici_yukle(db: Session, id: int):
     user = db.query(models.Kullanici).filter(models.Kullanici.id == id).first()
+    return schemas.KullaniciResponse.model_validate(user) if user is not None else None
+
+@router.get("/{id}", response_model=schemas.KullaniciResponse)
+def get_kullanici(id: int, request: Request = None, response: Response = None, db: Session = Depends(get_db)):
+    user = onbellek.getir_veya_yukle(("kullanici", id), lambda: etagli(_kullanici_yukle(db, id)))
     if user is None:
         raise HTTPException(status_code=404, detail="Böyle bir kullanıcı yok")
-    return user
+    return kayit_kosullu(user, request, response)
 
 @router.patch("/{id}", response_model=schemas.KullaniciResponse)
 def update_kullanici(id: int, kullanici_update: schemas.KullaniciUpdate, db: Session = Depends(get_db)):
-    db_kullanici = db.query(models.Kullanici).filter(models.Kullanici.id == id).first()
-    if db_kullanici is None:
+    satir = tek_sorgu.guncelle(db, models.Kullanici, id, kullanici_update.model_dump(exclude_unset=True))
+    if satir is None:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
-    
-    update_data = kullanici_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_kullanici, key, value)
-    
     db.commit()
-    db.refresh(db_kullanici)
-    return db_kullanici
+    onbellek.sil(("kullanici", id))
+    return schemas.KullaniciResponse.model_validate(satir)
 
 @router.delete("/{id}", status_code=204)
 def delete_kullanici(id: int, db: Session = Depends(get_db)):
     user = db.query(models.Kullanici).filter(models.Kullanici.id == id).first()
     if user is None:
         raise HTTPException(status_code=404, detail="Silinecek kullanıcı yok")
+    # ORM yolu: ödünçleri veritabanı siliyor, kitap sayaçları flush olaylarında düzeltiliyor
     db.delete(user)
     db.commit()
+    onbellek.sil(("kullanici", id))
     return None
@@ -1,61 +1,147 @@
-from fastapi import APIRouter, Depends, HTTPException
+from functools import partial
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas
+from typing import Annotated, List, Optional
+from .. import hizli_json, models, sayaclar, schemas, tek_sorgu, yazma_kuyrugu
+from ..arsiv import arsivde_bul, birlesik_model
+from ..asenkron import senkron_kalsin
 from ..database import get_db
+from ..disa_aktar import Bicim, akis_yaniti
+from ..filtreler import FiltreTanimi, ListeFiltresi, filtrele
+from ..kosullu import etagli, kayit_kosullu, liste_kosullu
+from ..sayfalama import sayfala
+from ..toplu_getir import idlerle_getir
 
 router = APIRouter(
     prefix="/api/odunc",
     tags=["Ödünç İşlemleri"]
 )
 
+ODUNC_FILTRESI = FiltreTanimi(
+    models.OduncKayit,
+    esit=("kullanici_id", "kitap_id"),
+    aralik=("alis_tarihi",),
+    bos_mu={"acik": "teslim_tarihi"},
+    siralanabilir=("id", "alis_tarihi"),
+)
+
 @router.get("/", response_model=List[schemas.OduncResponse])
-def get_odunc_kayitlari(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    # Kayıtları getir
-    return db.query(models.OduncKayit).offset(skip).limit(limit).all()
+def get_odunc_kayitlari(skip: int = 0, limit: int = 100, after_id: Optional[int] = None, cursor: Optional[str] = None,
+                        filtre: Annotated[ListeFiltresi, Depends(ODUNC_FILTRESI)] = None, arsiv: bool = False,
+                        request: Request = None, response: Response = None, db: Session = Depends(get_db)):
+    # Kayıtları getir; kullanıcıya/kitaba, alış tarihine ve açık (teslim edilmemiş) olmasına göre süzülebilir
+    degismedi = liste_kosullu(db, request, response, "odunc_kayitlari")
+    if degismedi is not None:
+        return degismedi
+    model = models.OduncKayit
+    if arsiv:
+        # Arşive taşınmış eski ödünçler de listeye girer; filtre ve sıralama birleşik sorguya taşınır
+        model = birlesik_model()
+        filtre = filtre.uyarla(model) if filtre is not None else None
+    query = filtrele(hizli_json.sorgu(db, model, schemas.OduncResponse), filtre, after_id, cursor)
+    if arsiv and not (filtre and filtre.siralama) and after_id is None and cursor is None:
+        # UNION ana tablo gibi kendiliğinden id sırasında gelmez; skip/limit sayfaları kaymasın
+        query = query.order_by(model.id)
+    kayitlar = sayfala(query, model, skip, limit, after_id, cursor, response)
+    return hizli_json.yanit(kayitlar, schemas.OduncResponse, response)
+
+def _acik_odunc_cakismasi(hata: IntegrityError) -> bool:
+    # ux_odunc_acik_kitap indeksine takılan INSERT/UPDATE'ler
+    return "UNIQUE constraint failed: odunc_kayitlari.kitap_id" in str(hata.orig)
+
+def _referans_hatasi(hata: IntegrityError) -> Optional[HTTPException]:
+    if _acik_odunc_cakismasi(hata):
+        return HTTPException(status_code=400, detail="Kitap şu an başkasında")
+    # foreign key'ler zorlanıyor; olmayan kitap ya da kullanıcıya ödünç yazılamaz
+    if "FOREIGN KEY constraint failed" in str(hata.orig):
+        return HTTPException(status_code=404, detail="Kitap ya da kullanıcı bulunamadı")
+    return None
+
+def _yaz(db: Session, is_):
+    # Kuyruk açıksa iş grup commit'ine katılır (bkz. yazma_kuyrugu.py), kapalıysa bu isteğin oturumunda commit edilir
+    try:
+        if yazma_kuyrugu.kuyruk is not None:
+            return yazma_kuyrugu.kuyruk.calistir(is_)
+        sonuc = is_(db)
+        db.commit()
+        return sonuc
+    except IntegrityError as e:
+        db.rollback()
+        hata = _referans_hatasi(e)
+        if hata is not None:
+            raise hata
+        raise
 
 @router.post("/", response_model=schemas.OduncResponse, status_code=201)
+@yazma_kuyrugu.kuyruk_varsa_senkron
 def create_odunc(odunc: schemas.OduncCreate, db: Session = Depends(get_db)):
-    # Kitap müsait mi kontrol et
-    aktif_odunc = db.query(models.OduncKayit).filter(
-        models.OduncKayit.kitap_id == odunc.kitap_id,
-        models.OduncKayit.teslim_tarihi == None
-    ).first()
-    if aktif_odunc:
-        raise HTTPException(status_code=400, detail="Kitap şu an başkasında")
+    return _yaz(db, partial(_odunc_ekle, odunc=odunc))
 
+def _odunc_ekle(db: Session, odunc: schemas.OduncCreate) -> schemas.OduncResponse:
+    # Müsaitlik kontrolünü ayrı bir SELECT ile yapmıyoruz; açık ödünçler üzerindeki
+    # kısmi unique indeks çakışmayı tek INSERT içinde, atomik olarak yakalıyor.
     new_odunc = models.OduncKayit(**odunc.model_dump())
     db.add(new_odunc)
-    db.commit()
-    db.refresh(new_odunc)
-    return new_odunc
+    db.flush()
+    # id INSERT ... RETURNING ile geldi, commit sonrası refresh SELECT'ine gerek yok
+    return schemas.OduncResponse.model_validate(new_odunc)
+
+@router.get("/export")
+@senkron_kalsin
+def export_odunc_kayitlari(bicim: Bicim = "ndjson", db: Session = Depends(get_db)):
+    """Ödünç geçmişinin tamamını NDJSON ya da CSV olarak akış hâlinde indirir."""
+    return akis_yaniti(db, models.OduncKayit, schemas.OduncResponse, bicim, "odunc_kayitlari")
+
+@router.post("/batch-get", response_model=schemas.TopluGetirSonucu[schemas.OduncResponse])
+def batch_get_odunc(istek: schemas.TopluGetirIstek, db: Session = Depends(get_db)):
+    """Birden fazla ödünç kaydı id'si tek istekte; sonuçlar istek sırasıyla, bulunamayanlar `bulundu: false`."""
+    return idlerle_getir(db, models.OduncKayit, schemas.OduncResponse, istek.ids)
 
 @router.get("/{id}", response_model=schemas.OduncResponse)
-def get_odunc(id: int, db: Session = Depends(get_db)):
+def get_odunc(id: int, arsiv: bool = False, request: Request = None, response: Response = None,
+              db: Session = Depends(get_db)):
     kayit = db.query(models.OduncKayit).filter(models.OduncKayit.id == id).first()
+    if kayit is None and arsiv:
+        kayit = arsivde_bul(db, id)
     if kayit is None:
         raise HTTPException(status_code=404, detail="Kayıt bulunamadı")
-    return kayit
+    # Ödünç kayıtları önbelleğe alınmıyor, ETag her istekte hesaplanır
+    return kayit_kosullu(etagli(schemas.OduncResponse.model_validate(kayit)), request, response)
 
 @router.patch("/{id}", response_model=schemas.OduncResponse)
+@yazma_kuyrugu.kuyruk_varsa_senkron
 def update_odunc(id: int, odunc_update: schemas.OduncUpdate, db: Session = Depends(get_db)):
+    return _yaz(db, partial(_odunc_guncelle, id=id, update_data=odunc_update.model_dump(exclude_unset=True)))
+
+def _odunc_guncelle(db: Session, id: int, update_data: dict) -> schemas.OduncResponse:
+    if "kitap_id" in update_data or "kullanici_id" in update_data:
+        return _odunc_tasi(db, id, update_data)
+    # Teslim gibi kayıt yerinde kalan değişiklikler: UPDATE ... RETURNING, sonra iki sayaç güncellemesi
+    satir = tek_sorgu.guncelle(db, models.OduncKayit, id, update_data)
+    if satir is None:
+        raise HTTPException(status_code=404, detail="Ödünç kaydı bulunamadı")
+    if update_data:
+        sayaclar.odunc_sayaclarini_yenile(db, [satir.kitap_id], [satir.kullanici_id])
+    return schemas.OduncResponse.model_validate(satir)
+
+def _odunc_tasi(db: Session, id: int, update_data: dict) -> schemas.OduncResponse:
+    # Kayıt başka kitap/kullanıcıya geçiyor; eski tarafın sayaçları da düzelmeli.
+    # RETURNING sadece yeni değerleri verdiği için ORM yolu: eski değerleri flush olayları okuyor.
     db_odunc = db.query(models.OduncKayit).filter(models.OduncKayit.id == id).first()
     if db_odunc is None:
         raise HTTPException(status_code=404, detail="Ödünç kaydı bulunamadı")
-    
-    update_data = odunc_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_odunc, key, value)
-    
-    db.commit()
-    db.refresh(db_odunc)
-    return db_odunc
+    db.flush()
+    return schemas.OduncResponse.model_validate(db_odunc)
 
 @router.delete("/{id}", status_code=204)
 def delete_odunc(id: int, db: Session = Depends(get_db)):
-    kayit = db.query(models.OduncKayit).filter(models.OduncKayit.id == id).first()
-    if kayit is None:
+    satir = tek_sorgu.sil(db, models.OduncKayit, id, models.OduncKayit.kitap_id, models.OduncKayit.kullanici_id)
+    if satir is None:
         raise HTTPException(status_code=404, detail="Silinecek kayıt yok")
-    db.delete(kayit)
+    sayaclar.odunc_sayaclarini_yenile(db, [satir.kitap_id], [satir.kullanici_id])
     db.commit()
     return None
@@ -1,18 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas
+from typing import Annotated, List, Optional
+from .. import hizli_json, models, schemas, tek_sorgu
 from ..database import get_db
+from ..filtreler import FiltreTanimi, ListeFiltresi, filtrele
+from ..kosullu import etagli, kayit_kosullu, liste_kosullu
+from ..onbellek import onbellek
+from ..sayfalama import sayfala
+from ..toplu import toplu_yukle
+from ..yukleme import Strateji, iliski_yukle
+from ..toplu_getir import idlerle_getir
 
 router = APIRouter(
     prefix="/api/yazarlar",
     tags=["Yazarlar"]
 )
 
+YAZAR_FILTRESI = FiltreTanimi(models.Yazar, esit=("ad", "soyad"), siralanabilir=("id", "ad", "soyad"))
+
 @router.get("/", response_model=List[schemas.YazarResponse])
-def get_yazarlar(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_yazarlar(skip: int = 0, limit: int = 100, after_id: Optional[int] = None, cursor: Optional[str] = None,
+                 filtre: Annotated[ListeFiltresi, Depends(YAZAR_FILTRESI)] = None,
+                 request: Request = None, response: Response = None, db: Session = Depends(get_db)):
     # Yazarları getir
-    return db.query(models.Yazar).offset(skip).limit(limit).all()
+    degismedi = liste_kosullu(db, request, response, "yazarlar")
+    if degismedi is not None:
+        return degismedi
+    query = filtrele(hizli_json.sorgu(db, models.Yazar, schemas.YazarResponse), filtre, after_id, cursor)
+    kayitlar = sayfala(query, models.Yazar, skip, limit, after_id, cursor, response)
+    return hizli_json.yanit(kayitlar, schemas.YazarResponse, response)
 
 @router.post("/", response_model=schemas.YazarResponse, status_code=201)
 def create_yazar(yazar: schemas.YazarCreate, db: Session = Depends(get_db)):
@@ -22,32 +38,68 @@ def create_yazar(yazar: schemas.YazarCreate, db: Session = Depends(get_db)):
     db.refresh(new_yazar)
     return new_yazar
 
+@router.post("/bulk", response_model=schemas.TopluYuklemeSonucu)
+async def bulk_create_yazarlar(request: Request, db: Session = Depends(get_db)):
+    """
+    Toplu yazar ekleme. Gövde JSON dizi ya da `application/x-ndjson` (her satırda bir kayıt) olabilir.
+    Hatalı satırlar atlanır ve cevapta satır numarasıyla listelenir.
+    """
+    return await toplu_yukle(request, db, models.Yazar, schemas.YazarCreate)
+
+@router.get("/detay", response_model=List[schemas.YazarDetayResponse])
+def get_yazarlar_detay(skip: int = 0, limit: int = 100, after_id: Optional[int] = None, cursor: Optional[str] = None,
+                       yukleme: Optional[Strateji] = None, filtre: Annotated[ListeFiltresi, Depends(YAZAR_FILTRESI)] = None,
+                       request: Request = None, response: Response = None, db: Session = Depends(get_db)):
+    # Yazarları kitaplarıyla birlikte getir; selectin ile yazar sayısından bağımsız 2 sorgu
+    degismedi = liste_kosullu(db, request, response, "yazarlar", "kitaplar")
+    if degismedi is not None:
+        return degismedi
+    query = db.query(models.Yazar).options(iliski_yukle(models.Yazar.kitaplar, yukleme))
+    query = filtrele(query, filtre, after_id, cursor)
+    return sayfala(query, models.Yazar, skip, limit, after_id, cursor, response)
+
+@router.post("/batch-get", response_model=schemas.TopluGetirSonucu[schemas.YazarResponse])
+def batch_get_yazarlar(istek: schemas.TopluGetirIstek, db: Session = Depends(get_db)):
+    """Birden fazla yazar id'si tek istekte; sonuçlar istek sırasıyla, bulunamayanlar `bulundu: false`."""
+    return idlerle_getir(db, models.Yazar, schemas.YazarResponse, istek.ids)
+
+def _yazar_yukle(db: Session, id: int, yukleme: Optional[Strateji] = None):
+    yazar = (
+        db.query(models.Yazar)
+        .options(iliski_yukle(models.Yazar.kitaplar, yukleme))
+        .filter(models.Yazar.id == id)
+        .first()
+    )
+    return schemas.YazarDetayResponse.model_validate(yazar) if yazar is not None else None
+
 @router.get("/{id}", response_model=schemas.YazarDetayResponse)
-def get_yazar(id: int, db: Session = Depends(get_db)):
-    yazar = db.query(models.Yazar).filter(models.Yazar.id == id).first()
+def get_yazar(id: int, yukleme: Optional[Strateji] = None, request: Request = None, response: Response = None,
+              db: Session = Depends(get_db)):
+    yazar = onbellek.getir_veya_yukle(("yazar", id), lambda: etagli(_yazar_yukle(db, id, yukleme)))
     if yazar is None:
         raise HTTPException(status_code=404, detail="Yazar sistemde yok")
-    return yazar
+    return kayit_kosullu(yazar, request, response)
 
 @router.patch("/{id}", response_model=schemas.YazarResponse)
 def update_yazar(id: int, yazar_update: schemas.YazarUpdate, db: Session = Depends(get_db)):
-    db_yazar = db.query(models.Yazar).filter(models.Yazar.id == id).first()
-    if db_yazar is None:
+    # Tek ifade: UPDATE ... RETURNING (bkz. tek_sorgu.py)
+    satir = tek_sorgu.guncelle(db, models.Yazar, id, yazar_update.model_dump(exclude_unset=True))
+    if satir is None:
         raise HTTPException(status_code=404, detail="Yazar bulunamadı")
-    
-    update_data = yazar_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_yazar, key, value)
-    
     db.commit()
-    db.refresh(db_yazar)
-    return db_yazar
+    onbellek.sil(("yazar", id))
+    return schemas.YazarResponse.model_validate(satir)
 
 @router.delete("/{id}", status_code=204)
 def delete_yazar(id: int, db: Session = Depends(get_db)):
     yazar = db.query(models.Yazar).filter(models.Yazar.id == id).first()
     if yazar is None:
         raise HTTPException(status_code=404, detail="Silinecek yazar yok")
+    # ORM yolu: kitapları ve ödünçleri veritabanı siliyor ama etkilenen kullanıcı sayaçları
+    # flush olaylarında düzeltiliyor (bkz. sayaclar.py)
     db.delete(yazar)
     db.commit()
+    # kitaplar da cascade ile silindi
+    onbellek.sil(("yazar", id))
+    onbellek.temizle("kitap")
     return None
@@ -0,0 +1,281 @@
+"""
+Ödünç kayıtlarından türetilen sayaçlar.
+
+Kitap: odunc_acik, toplam_odunc, son_odunc_tarihi
+Kullanıcı: acik_odunc_sayisi
+
+Sayaçlar ORM oturum olaylarıyla, ödünç kaydını yazan flush'ın hemen ardından
+aynı transaction içinde güncellenir; böylece create/update/delete handler'ları
+aynı yoldan geçer. Yeni ödünçte sayaçlar artırılır, güncelleme ve silmede
+etkilenen kitap/kullanıcı satırları indeksli alt sorgularla yeniden hesaplanır.
+
+Yazar, kitap ve kullanıcı silinince ödünçleri veritabanı siler (ON DELETE CASCADE);
+bu satırlar oturuma hiç yüklenmediği için ORM olayları onları görmez. Etkilenecek
+karşı taraf id'leri silmeden önce tek bir sorguyla okunur ve flush'tan sonra
+yeniden hesaplanır. Arşiv bağlıysa (bkz. arsiv.py) arşivdeki ödünçler de sayılır ve
+silinenlerinkiler aynı anda arşivden silinir.
+
+ORM'den geçmeyen tek ifadelik güncelleme ve silmeler (bkz. tek_sorgu.py) RETURNING ile
+dönen kitap/kullanıcı id'leri için `odunc_sayaclarini_yenile`'yi kendileri çağırır.
+
+Core `insert()` ile yapılan toplu yüklemeler bu olaylardan geçmez; sonrasında
+
+    python -m app.sayaclar kontrol     # tutarsız satırları listeler
+    python -m app.sayaclar yenile      # tüm sayaçları ödünç tablosundan yeniden hesaplar
+"""
+import sys
+
+from sqlalchemy import case, event, exists, func, inspect, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import arsiv, models
+from .database import SessionLocal
+from .onbellek import onbellek
+
+OK = models.OduncKayit
+
+_BEKLEYEN = "odunc_sayac_bekleyen"
+# Commit'te düşecek önbellek anahtarları: sayacı değişen kitaplar ve detayında o kitapları gösteren yazarlar
+_DUSECEKLER = "odunc_sayac_onbellek"
+
+
+# --- Tam hesaplama ifadeleri (yenileme ve kontrol için) ---
+
+def _kitap_hesaplanan(kitap_id):
+    toplam = select(func.count(OK.id)).where(OK.kitap_id == kitap_id).scalar_subquery()
+    son = select(func.max(OK.alis_tarihi)).where(OK.kitap_id == kitap_id).scalar_subquery()
+    if arsiv.acik():
+        # Arşive taşınan (teslim edilmiş) ödünçler de geçmişe dahil; açık ödünç arşivde olmaz
+        arsiv_toplam, arsiv_son = arsiv.kitap_gecmisi(kitap_id)
+        toplam = toplam + arsiv_toplam
+        # SQLite'ın çok argümanlı max'ı NULL görünce NULL döner
+        son = func.max(func.coalesce(son, arsiv_son), func.coalesce(arsiv_son, son))
+    return {
+        "odunc_acik": exists().where(OK.kitap_id == kitap_id, OK.teslim_tarihi.is_(None)),
+        "toplam_odunc": toplam,
+        "son_odunc_tarihi": son,
+    }
+
+
+def _kullanici_hesaplanan(kullanici_id):
+    return {
+        "acik_odunc_sayisi": select(func.count(OK.id))
+        .where(OK.kullanici_id == kullanici_id, OK.teslim_tarihi.is_(None))
+        .scalar_subquery(),
+    }
+
+
+# Çok kitap ödünç almış bir kullanıcının silinmesi binlerce id getirebilir; SQLite'ın parametre sınırının altında kal
+_PARCA_BOYUTU = 500
+
+
+def _yeniden_hesapla(conn, model, hesaplanan, idler, donecek=None) -> list:
+    """`idler` verilirse güncellenen satırların `donecek` sütununu (RETURNING) döner."""
+    sorgu = update(model).values(**hesaplanan(model.id))
+    if idler is None:
+        conn.execute(sorgu)
+        return []
+    if donecek is not None:
+        sorgu = sorgu.returning(donecek)
+    idler, sonuc = list(idler), []
+    for i in range(0, len(idler), _PARCA_BOYUTU):
+        parca = conn.execute(sorgu.where(model.id.in_(idler[i:i + _PARCA_BOYUTU])))
+        if donecek is not None:
+            sonuc.extend(parca.scalars())
+    return sonuc
+
+
+def kitaplari_yeniden_hesapla(conn, kitap_idler=None) -> list:
+    """Verilen kitapların yazar id'lerini döner (önbellekteki yazar detayları için)."""
+    return _yeniden_hesapla(conn, models.Kitap, _kitap_hesaplanan, kitap_idler, models.Kitap.yazar_id)
+
+
+def kullanicilari_yeniden_hesapla(conn, kullanici_idler=None):
+    _yeniden_hesapla(conn, models.Kullanici, _kullanici_hesaplanan, kullanici_idler)
+
+
+def odunc_sayaclarini_yenile(session, kitap_idler, kullanici_idler):
+    """
+    ORM olaylarından geçmeden yazılan ödünçler için: sayaçları aynı transaction'da yeniden
+    hesaplar, kitapların ve yazarlarının önbellekteki cevapları commit'te düşer.
+    """
+    conn = session.connection()
+    yazarlar = kitaplari_yeniden_hesapla(conn, kitap_idler)
+    kullanicilari_yeniden_hesapla(conn, kullanici_idler)
+    _onbellekten_dusecek(session, kitap_idler, yazarlar)
+
+
+def _onbellekten_dusecek(session, kitaplar, yazarlar):
+    dusecek = session.info.setdefault(_DUSECEKLER, set())
+    dusecek.update(("kitap", kitap_id) for kitap_id in kitaplar)
+    dusecek.update(("yazar", yazar_id) for yazar_id in yazarlar if yazar_id is not None)
+
+
+# --- Oturum olayları ---
+
+def _eski_deger(durum, alan):
+    gecmis = durum.attrs[alan].history
+    return gecmis.deleted[0] if gecmis.deleted else getattr(durum.object, alan)
+
+
+def _cascade_etkilenenler(session, silinenler):
+    """
+    Veritabanının ON DELETE CASCADE ile sileceği ödünçlerin sayaçlarını etkilediği
+    (kitap id'leri, kullanıcı id'leri). Satırlar henüz yerindeyken okunur.
+    """
+    def idler(model):
+        return [n.id for n in silinenler if isinstance(n, model)]
+
+    yazarlar, kitaplar, kullanicilar = idler(models.Yazar), idler(models.Kitap), idler(models.Kullanici)
+    etkilenen_kitaplar, etkilenen_kullanicilar = set(), set()
+    if not (yazarlar or kitaplar or kullanicilar):
+        return etkilenen_kitaplar, etkilenen_kullanicilar
+    conn = session.connection()
+    # Silinen kitapların sayaçları kitapla birlikte gidiyor; elinde açık ödüncü olan kullanıcılar düzelmeli
+    acik = OK.teslim_tarihi.is_(None)
+    if kitaplar:
+        etkilenen_kullanicilar.update(conn.execute(
+            select(OK.kullanici_id).where(OK.kitap_id.in_(kitaplar), acik).distinct()
+        ).scalars())
+    if yazarlar:
+        etkilenen_kullanicilar.update(conn.execute(
+            select(OK.kullanici_id).join(models.Kitap, models.Kitap.id == OK.kitap_id)
+            .where(models.Kitap.yazar_id.in_(yazarlar), acik).distinct()
+        ).scalars())
+    # Silinen kullanıcının ödünç aldığı her kitabın geçmişi kısalıyor
+    if kullanicilar:
+        etkilenen_kitaplar.update(conn.execute(
+            select(OK.kitap_id).where(OK.kullanici_id.in_(kullanicilar)).distinct()
+        ).scalars())
+    if arsiv.acik():
+        # Arşivde foreign key yok; silinenlerin arşivdeki ödünçleri burada gider
+        etkilenen_kitaplar.update(arsiv.bagli_kayitlari_sil(conn, yazarlar, kitaplar, kullanicilar))
+    return etkilenen_kitaplar - set(kitaplar), etkilenen_kullanicilar - set(kullanicilar)
+
+
+@event.listens_for(Session, "before_flush")
+def _odunc_degisikliklerini_topla(session, flush_context, instances):
+    # Silinen/güncellenen kayıtların eski değerleri satır hâlâ yerindeyken okunur
+    yeni, yeniden_hesapla_kitap, yeniden_hesapla_kullanici = [], set(), set()
+    for nesne in session.new:
+        if isinstance(nesne, OK):
+            yeni.append(nesne)
+    # session.dirty/deleted her erişimde yeniden kuruluyor; döngüde sorulursa çok silmede kareye çıkar
+    kirli, silinen = session.dirty, session.deleted
+    for nesne in list(kirli) + list(silinen):
+        if not isinstance(nesne, OK) or (nesne in kirli and not session.is_modified(nesne)):
+            continue
+        durum = inspect(nesne)
+        for alan, hedef in (("kitap_id", yeniden_hesapla_kitap), ("kullanici_id", yeniden_hesapla_kullanici)):
+            hedef.add(_eski_deger(durum, alan))
+            if nesne not in silinen:
+                hedef.add(getattr(nesne, alan))
+    cascade_kitaplar, cascade_kullanicilar = _cascade_etkilenenler(session, silinen)
+    yeniden_hesapla_kitap |= cascade_kitaplar
+    yeniden_hesapla_kullanici |= cascade_kullanicilar
+    # Her flush'ta baştan yazılır; başarısız bir flush'ın kaydı sonrakine taşınmaz
+    session.info[_BEKLEYEN] = (yeni, yeniden_hesapla_kitap - {None}, yeniden_hesapla_kullanici - {None})
+
+
+@event.listens_for(Session, "after_flush")
+def _sayaclari_guncelle(session, flush_context):
+    yeni, kitaplar, kullanicilar = session.info.pop(_BEKLEYEN, ((), set(), set()))
+    if not (yeni or kitaplar or kullanicilar):
+        return
+    conn = session.connection()
+    yazarlar = []
+    for kayit in yeni:
+        if kayit.kitap_id in kitaplar:
+            continue
+        acik = kayit.teslim_tarihi is None
+        Kitap = models.Kitap
+        degerler = {
+            "toplam_odunc": Kitap.toplam_odunc + 1,
+            "son_odunc_tarihi": case(
+                (or_(Kitap.son_odunc_tarihi.is_(None), Kitap.son_odunc_tarihi < kayit.alis_tarihi), kayit.alis_tarihi),
+                else_=Kitap.son_odunc_tarihi,
+            ),
+        }
+        if acik:
+            degerler["odunc_acik"] = True
+        # Yazar detayı kitabın sayaçlarını da gösteriyor; yazar id'si ayrı sorgu olmadan RETURNING ile gelir
+        yazarlar.extend(conn.execute(
+            update(Kitap).where(Kitap.id == kayit.kitap_id).values(**degerler).returning(Kitap.yazar_id)
+        ).scalars())
+        if acik and kayit.kullanici_id not in kullanicilar:
+            conn.execute(
+                update(models.Kullanici).where(models.Kullanici.id == kayit.kullanici_id)
+                .values(acik_odunc_sayisi=models.Kullanici.acik_odunc_sayisi + 1)
+            )
+    if kitaplar:
+        yazarlar.extend(kitaplari_yeniden_hesapla(conn, kitaplar))
+    if kullanicilar:
+        kullanicilari_yeniden_hesapla(conn, kullanicilar)
+
+    _onbellekten_dusecek(session, kitaplar | {k.kitap_id for k in yeni}, yazarlar)
+
+
+@event.listens_for(Session, "after_commit")
+def _onbellegi_dusur(session):
+    # Önbellekteki kitap cevapları ve yazar detaylarındaki kitaplar sayaçları da içeriyor
+    dusecek = session.info.pop(_DUSECEKLER, None)
+    if dusecek:
+        onbellek.sil(*dusecek)
+
+
+@event.listens_for(Session, "after_rollback")
+def _bekleyenleri_unut(session):
+    session.info.pop(_DUSECEKLER, None)
+
+
+# --- Tutarlılık kontrolü ---
+
+def tutarsizliklar(conn) -> dict:
+    """Saklanan değeri hesaplanandan farklı olan kitap ve kullanıcı id'lerini döner."""
+    def farkli(model, hesaplanan):
+        return or_(*(getattr(model, alan).is_not(ifade) for alan, ifade in hesaplanan.items()))
+
+    kitaplar = conn.execute(
+        select(models.Kitap.id).where(farkli(models.Kitap, _kitap_hesaplanan(models.Kitap.id)))
+    ).scalars().all()
+    kullanicilar = conn.execute(
+        select(models.Kullanici.id).where(farkli(models.Kullanici, _kullanici_hesaplanan(models.Kullanici.id)))
+    ).scalars().all()
+    return {"kitaplar": kitaplar, "kullanicilar": kullanicilar}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    komut = argv[0] if argv else "kontrol"
+    db = SessionLocal()
+    try:
+        if komut in ("kontrol", "yenile"):
+            try:
+                # Arşive taşınmış ödünçler görünmeden yenilemek toplam_odunc'u eksik yazar
+                arsiv.bagli_olmali(db.connection())
+            except RuntimeError as hata:
+                print(hata)
+                return 2
+        if komut == "kontrol":
+            bulunan = tutarsizliklar(db.connection())
+            print(f"Tutarsız kitap: {len(bulunan['kitaplar'])}, kullanıcı: {len(bulunan['kullanicilar'])}")
+            for tur, idler in bulunan.items():
+                if idler:
+                    print(f"  {tur}: {idler[:20]}{' ...' if len(idler) > 20 else ''}")
+            return 1 if any(bulunan.values()) else 0
+        if komut == "yenile":
+            kitaplari_yeniden_hesapla(db.connection())
+            kullanicilari_yeniden_hesapla(db.connection())
+            db.commit()
+            onbellek.temizle("kitap")
+            onbellek.temizle("yazar")
+            print("Sayaçlar yeniden hesaplandı.")
+            return 0
+    finally:
+        db.close()
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import base64
+import binascii
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Response
+
+
+def cursor_olustur(son_id: int) -> str:
+    """
+    Son görülen kaydın id'sinden opak bir cursor üretir.
+    İstemci bu değeri çözmeye çalışmamalı, olduğu gibi geri göndermeli.
+    """
+    ham = json.dumps({"id": son_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(ham).decode().rstrip("=")
+
+
+def cursor_coz(cursor: str) -> int:
+    """
+    Cursor'ı çözüp son görülen id'yi döner. Bozuk cursor için 400 fırlatır.
+    """
+    try:
+        dolgu = "=" * (-len(cursor) % 4)
+        veri = json.loads(base64.urlsafe_b64decode(cursor + dolgu))
+        return int(veri["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Geçersiz cursor")
+
+
+def sayfala(query, model, skip: int = 0, limit: int = 100,
+            after_id: Optional[int] = None, cursor: Optional[str] = None,
+            response: Optional[Response] = None):
+    """
+    Listeyi sayfalar.
+
+    cursor / after_id verilmezse eski skip/limit davranışı aynen korunur.
+    Verilirse OFFSET yerine birincil anahtar indeksinde `id > son_id` ile arama
+    yapılır; böylece sayfa derinliği ne olursa olsun sorgu süresi sabit kalır.
+    Bir sonraki sayfa varsa cursor `X-Next-Cursor` başlığında döner.
+    """
+    if after_id is None and cursor is None:
+        return query.offset(skip).limit(limit).all()
+
+    son_id = after_id if after_id is not None else cursor_coz(cursor)
+    kayitlar = query.filter(model.id > son_id).order_by(model.id).limit(limit).all()
+
+    if response is not None and kayitlar and len(kayitlar) == limit:
+        response.headers["X-Next-Cursor"] = cursor_olustur(kayitlar[-1].id)
+    return kayitlar
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict, field_validator
-from typing import List, Optional
+from typing import Generic, List, Optional, TypeVar
 from datetime import date
 
 # --- Yazar Şemaları ---
@@ -54,6 +54,9 @@ class KitapUpdate(BaseModel):
 
 class KitapResponse(KitapBase):
     id: int
+    odunc_acik: bool = Field(False, description="Kitap şu an ödünçte mi")
+    toplam_odunc: int = Field(0, description="Bugüne kadar kaç kez ödünç alındı")
+    son_odunc_tarihi: Optional[date] = Field(None, description="En son ödünç alındığı tarih")
     model_config = ConfigDict(from_attributes=True)
 
 # --- Kullanıcı Şemaları ---
@@ -107,3 +110,52 @@ class OduncResponse(OduncBase):
 # İlişkileri göstermek için genişletilmiş şemalar
 class YazarDetayResponse(YazarResponse):
     kitaplar: List[KitapResponse] = []
+
+# --- Toplu Yükleme Şemaları ---
+class TopluHata(BaseModel):
+    satir: int = Field(..., description="Hatalı kaydın gönderilen veri içindeki sırası (1'den başlar)")
+    hata: str = Field(..., description="Hatanın açıklaması")
+
+class TopluYuklemeSonucu(BaseModel):
+    eklenen: int = Field(0, description="Veritabanına yazılan kayıt sayısı")
+    hatali: int = Field(0, description="Reddedilen kayıt sayısı")
+    hatalar: List[TopluHata] = []
+
+# --- Toplu Getirme Şemaları ---
+T = TypeVar("T")
+
+class TopluGetirIstek(BaseModel):
+    ids: List[int] = Field(..., description="Getirilecek kayıtların id'leri; cevap aynı sırada döner",
+                           json_schema_extra={"example": [3, 1, 42]})
+
+class TopluGetirOge(BaseModel, Generic[T]):
+    id: int
+    bulundu: bool = Field(..., description="Kayıt yoksa false, `kayit` boş gelir")
+    kayit: Optional[T] = None
+
+class TopluGetirSonucu(BaseModel, Generic[T]):
+    sonuclar: List[TopluGetirOge[T]] = Field(..., description="İstekteki id sırasıyla, tekrarlar dahil")
+    bulunamayan: List[int] = Field([], description="Bulunamayan id'ler (tekrarsız)")
+
+# --- İstatistik Şemaları ---
+class EnCokOduncAlinan(BaseModel):
+    kitap_id: int
+    baslik: str
+    odunc_sayisi: int = Field(..., description="Seçilen aralıkta ödünç alınma sayısı")
+
+class AktifOkuyucu(BaseModel):
+    kullanici_id: int
+    ad: str
+    soyad: str
+    odunc_sayisi: int = Field(..., description="Seçilen aralıkta aldığı kitap sayısı")
+    acik_odunc: int = Field(..., description="Bu ödünçlerden henüz teslim edilmeyenler")
+
+class KategoriGecikme(BaseModel):
+    kategori_id: Optional[int] = Field(None, description="Kategorisiz kitaplar için boş")
+    kategori: Optional[str] = None
+    toplam_odunc: int
+    geciken: int = Field(..., description="Süresinde teslim edilmeyen ödünçler")
+
+class AylikOdunc(BaseModel):
+    ay: str = Field(..., description="YYYY-AA", json_schema_extra={"example": "2026-03"})
+    odunc_sayisi: int
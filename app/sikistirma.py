@@ -0,0 +1,199 @@
+"""
+Cevap sıkıştırma (gzip, kuruluysa brotli) için ASGI middleware'i.
+
+- İstemcinin `Accept-Encoding` başlığına göre kodlama seçilir (`SIKISTIRMA` sırasıyla, q=0 reddedilir).
+- `SIKISTIRMA_MIN_BOYUT` bayttan küçük cevaplar olduğu gibi gider; sıkıştırma küçük gövdelerde
+  kazandırdığından fazla CPU harcıyor.
+- Akış (streaming) cevaplarında gövde eşik aşılana kadar bekletilir, sonra her parça
+  sıkıştırılıp hemen flush edilir. Export türlerinde (`AKIS_TURLERI`) beklenmez: başlıklar ve
+  ilk parça (CSV başlık satırı) hemen gider, istemci ilk satırı eşiği beklemeden alır.
+- 304 cevapları içerik türü taşımaz ama 200'ün `Vary: Accept-Encoding`'ini taşımalı (RFC 9110 15.4.5).
+- Sadece metin/JSON türleri sıkıştırılır. Zaten kodlanmış ya da `Cache-Control: no-transform`
+  taşıyan cevaplara dokunulmaz.
+- Uygulamanın ETag'leri zayıf (`W/`), sıkıştırılmış ve düz gösterim için aynı kalır; böylece
+  `If-None-Match` kontrolü handler'da değişmeden çalışır. Güçlü bir ETag gelirse sıkıştırılan
+  cevapta zayıfa çevrilir, çünkü bayt bayt aynı gövdeyi artık temsil etmez.
+"""
+import os
+import zlib
+from typing import Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli isteğe bağlı
+    brotli = None
+
+# Tercih sırasıyla; boş ya da "kapali" sıkıştırmayı kapatır
+SIKISTIRMA = os.getenv("SIKISTIRMA", "br,gzip")
+SIKISTIRMA_MIN_BOYUT = int(os.getenv("SIKISTIRMA_MIN_BOYUT", 1024))
+SIKISTIRMA_GZIP_SEVIYESI = int(os.getenv("SIKISTIRMA_GZIP_SEVIYESI", 6))
+SIKISTIRMA_BROTLI_SEVIYESI = int(os.getenv("SIKISTIRMA_BROTLI_SEVIYESI", 4))
+
+SIKISTIRILABILIR_TURLER = {
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+}
+# Parça parça üretilen export türleri; ilk parça eşik beklenmeden gönderilir
+AKIS_TURLERI = {"application/x-ndjson", "text/csv"}
+
+
+def desteklenen_kodlamalar(ayar: str = SIKISTIRMA) -> tuple:
+    """Ayardaki kodlamalardan bu ortamda kullanılabilenler (brotli modülü yoksa br düşer)."""
+    if not ayar or ayar.strip().lower() == "kapali":
+        return ()
+    kodlamalar = []
+    for kodlama in ayar.split(","):
+        kodlama = kodlama.strip().lower()
+        if kodlama == "gzip" or (kodlama == "br" and brotli is not None):
+            kodlamalar.append(kodlama)
+    return tuple(kodlamalar)
+
+
+def kodlama_sec(accept_encoding: str, kodlamalar: Sequence[str]) -> Optional[str]:
+    """`Accept-Encoding` başlığına göre kullanılacak kodlama; uygun yoksa None."""
+    kabul = {}
+    for parca in accept_encoding.split(","):
+        ad, _, parametreler = parca.strip().partition(";")
+        q = 1.0
+        for parametre in parametreler.split(";"):
+            anahtar, _, deger = parametre.strip().partition("=")
+            if anahtar == "q":
+                try:
+                    q = float(deger)
+                except ValueError:
+                    q = 0.0
+        if ad:
+            kabul[ad.lower()] = q
+    for kodlama in kodlamalar:
+        q = kabul.get(kodlama, kabul.get("*", 0.0))
+        if q > 0:
+            return kodlama
+    return None
+
+
+def _tur(content_type: str) -> str:
+    return content_type.split(";")[0].strip().lower()
+
+
+def sikistirilabilir_mi(content_type: str) -> bool:
+    tur = _tur(content_type)
+    return tur.startswith("text/") or tur in SIKISTIRILABILIR_TURLER or tur.endswith("+json")
+
+
+class Sikistirici:
+    """Tek bir cevabın gövdesini parça parça sıkıştırır."""
+
+    def __init__(self, kodlama: str, gzip_seviyesi: int = SIKISTIRMA_GZIP_SEVIYESI,
+                 brotli_seviyesi: int = SIKISTIRMA_BROTLI_SEVIYESI):
+        self.kodlama = kodlama
+        if kodlama == "br":
+            self._nesne = brotli.Compressor(quality=brotli_seviyesi)
+        else:
+            # wbits 16+15: zlib yerine gzip başlığı
+            self._nesne = zlib.compressobj(gzip_seviyesi, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def parca(self, veri: bytes) -> bytes:
+        """Parçayı sıkıştırıp flush eder; istemci şimdiye kadarki her şeyi açabilir."""
+        if self.kodlama == "br":
+            return self._nesne.process(veri) + self._nesne.flush()
+        return self._nesne.compress(veri) + self._nesne.flush(zlib.Z_SYNC_FLUSH)
+
+    def bitir(self, veri: bytes = b"") -> bytes:
+        if self.kodlama == "br":
+            return self._nesne.process(veri) + self._nesne.finish()
+        return self._nesne.compress(veri) + self._nesne.flush()
+
+
+class SikistirmaMiddleware:
+    def __init__(self, app, min_boyut: int = SIKISTIRMA_MIN_BOYUT, kodlamalar: Optional[Sequence[str]] = None,
+                 gzip_seviyesi: int = SIKISTIRMA_GZIP_SEVIYESI, brotli_seviyesi: int = SIKISTIRMA_BROTLI_SEVIYESI):
+        self.app = app
+        self.min_boyut = min_boyut
+        self.kodlamalar = desteklenen_kodlamalar() if kodlamalar is None else tuple(kodlamalar)
+        self.gzip_seviyesi = gzip_seviyesi
+        self.brotli_seviyesi = brotli_seviyesi
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.kodlamalar:
+            await self.app(scope, receive, send)
+            return
+        kodlama = kodlama_sec(Headers(scope=scope).get("accept-encoding", ""), self.kodlamalar)
+        await self.app(scope, receive, _Cevap(self, kodlama, send).gonder)
+
+
+class _Cevap:
+    """Tek bir cevabın ASGI mesajlarını yakalayıp gerekirse sıkıştırarak iletir."""
+
+    def __init__(self, ayar: SikistirmaMiddleware, kodlama: Optional[str], send):
+        self.ayar = ayar
+        self.kodlama = kodlama
+        self.send = send
+        self.baslangic = None   # bekletilen http.response.start
+        self.tampon = b""
+        self.sikistirici = None
+        self.aktar = True       # True: mesajlar olduğu gibi gider
+        self.akis = False       # True: export akışı, eşik beklenmez
+
+    async def gonder(self, mesaj):
+        if mesaj["type"] == "http.response.start":
+            await self._baslangic(mesaj)
+        elif mesaj["type"] == "http.response.body" and not self.aktar:
+            await self._govde(mesaj)
+        else:
+            await self.send(mesaj)
+
+    async def _baslangic(self, mesaj):
+        basliklar = MutableHeaders(scope=mesaj)
+        if mesaj["status"] == 304:
+            # Gövdesiz, içerik türü yok; aynı kaynağın 200'ü Vary taşıdığı için bu da taşımalı
+            basliklar.add_vary_header("Accept-Encoding")
+            await self.send(mesaj)
+            return
+        if ("content-encoding" in basliklar
+                or not sikistirilabilir_mi(basliklar.get("content-type", ""))
+                or "no-transform" in basliklar.get("cache-control", "")):
+            await self.send(mesaj)
+            return
+        # Gövde istemcinin Accept-Encoding'ine göre değişebilir; sıkıştırılmasa da aradaki önbellekler bilmeli
+        basliklar.add_vary_header("Accept-Encoding")
+        if self.kodlama is None:
+            await self.send(mesaj)
+            return
+        self.baslangic = mesaj
+        self.aktar = False
+        self.akis = _tur(basliklar.get("content-type", "")) in AKIS_TURLERI
+
+    async def _govde(self, mesaj):
+        devam = mesaj.get("more_body", False)
+        if self.sikistirici is not None:
+            veri = mesaj.get("body", b"")
+            govde = self.sikistirici.parca(veri) if devam else self.sikistirici.bitir(veri)
+            await self.send({"type": "http.response.body", "body": govde, "more_body": devam})
+            return
+
+        self.tampon += mesaj.get("body", b"")
+        if devam and not self.akis and len(self.tampon) < self.ayar.min_boyut:
+            return  # eşik aşılana ya da cevap bitene kadar beklet
+        if not devam and len(self.tampon) < self.ayar.min_boyut:
+            # Küçük cevap: başlıklar dahil olduğu gibi
+            await self.send(self.baslangic)
+            await self.send({"type": "http.response.body", "body": self.tampon, "more_body": False})
+            return
+
+        self.sikistirici = Sikistirici(self.kodlama, self.ayar.gzip_seviyesi, self.ayar.brotli_seviyesi)
+        basliklar = MutableHeaders(scope=self.baslangic)
+        basliklar["Content-Encoding"] = self.kodlama
+        etag = basliklar.get("etag")
+        if etag and not etag.startswith("W/"):
+            basliklar["ETag"] = "W/" + etag
+        if devam:
+            # Akış: uzunluk baştan bilinmiyor, chunked gider
+            del basliklar["content-length"]
+            govde = self.sikistirici.parca(self.tampon)
+        else:
+            govde = self.sikistirici.bitir(self.tampon)
+            basliklar["Content-Length"] = str(len(govde))
+        self.tampon = b""
+        await self.send(self.baslangic)
+        await self.send({"type": "http.response.body", "body": govde, "more_body": devam})
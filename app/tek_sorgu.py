@@ -0,0 +1,33 @@
+"""
+Tek ifadelik PATCH ve DELETE (SQLite 3.35+ RETURNING).
+
+Eski yol nesneyi SELECT ile yükleyip alanları Python'da atıyor, commit ediyor ve
+`db.refresh` ile bir SELECT daha çalıştırıyordu. Burada
+
+    UPDATE kitaplar SET baslik = ? WHERE id = ? RETURNING id, baslik, ...
+    DELETE FROM kategoriler WHERE id = ? RETURNING id
+
+hem yazar hem de cevabı döndürür; satır yoksa None gelir ve handler mevcut 404'ünü verir.
+İfadeler ORM üzerinden çalıştığı için oturumda yüklü bir kopya varsa o da güncellenir.
+
+Bağlı satırların sayaçlarını Python tarafında düzelten silmeler (yazar, kitap,
+kullanıcı; bkz. sayaclar.py) ORM yolunda kalır.
+"""
+from typing import Optional
+
+from sqlalchemy import Row, delete, select, update
+from sqlalchemy.orm import Session
+
+
+def guncelle(db: Session, model, id: int, degerler: dict) -> Optional[Row]:
+    """Satırı günceller ve son hâlini döner; satır yoksa None."""
+    sutunlar = model.__table__.c
+    if not degerler:
+        # Boş PATCH: yazılacak bir şey yok, güncel hâli döner
+        return db.execute(select(*sutunlar).where(model.id == id)).first()
+    return db.execute(update(model).where(model.id == id).values(**degerler).returning(*sutunlar)).first()
+
+
+def sil(db: Session, model, id: int, *donecek) -> Optional[Row]:
+    """Satırı siler; `donecek` sütunlarını (ve id'yi) döner, satır yoksa None."""
+    return db.execute(delete(model).where(model.id == id).returning(model.id, *donecek)).first()
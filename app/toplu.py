@@ -0,0 +1,150 @@
+"""
+Toplu yükleme (bulk import) yardımcıları.
+
+Kayıtlar JSON dizi ya da satır satır NDJSON olarak alınır, partiler hâlinde
+Pydantic şemasıyla doğrulanır ve her parti tek bir executemany INSERT ile,
+kendi transaction'ında yazılır. Hatalı satırlar tüm yüklemeyi durdurmaz,
+cevapta satır numarasıyla raporlanır.
+
+Event loop'ta sadece gövde okunur. JSON çözme, doğrulama ve yazma parti parti
+threadpool'da çalışır; büyük bir yükleme aynı worker'daki diğer istekleri bekletmez.
+"""
+import json
+import os
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import schemas
+
+PARTI_BOYUTU = int(os.getenv("TOPLU_PARTI_BOYUTU", 1000))
+
+NDJSON_TURLERI = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def _ndjson_satirlari(request: Request):
+    # Gövdeyi belleğe almadan satır satır okur
+    tampon = b""
+    async for parca in request.stream():
+        tampon += parca
+        *satirlar, tampon = tampon.split(b"\n")
+        for satir in satirlar:
+            yield satir
+    yield tampon
+
+
+async def kayitlari_oku(request: Request):
+    """
+    (satir_no, veri) ikilileri üretir. NDJSON'da veri çözülmemiş satırın baytlarıdır,
+    partiyle birlikte threadpool'da çözülür.
+    """
+    icerik_turu = request.headers.get("content-type", "").split(";")[0].strip()
+    if icerik_turu in NDJSON_TURLERI:
+        satir_no = 0
+        async for satir in _ndjson_satirlari(request):
+            if not satir.strip():
+                continue
+            satir_no += 1
+            yield satir_no, satir
+        return
+
+    govde = await request.body()
+    try:
+        veri = await run_in_threadpool(json.loads, govde)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Gövde geçerli bir JSON değil")
+    if not isinstance(veri, list):
+        raise HTTPException(status_code=400, detail="JSON dizi veya NDJSON bekleniyor")
+    for satir_no, kayit in enumerate(veri, start=1):
+        yield satir_no, kayit
+
+
+def _dogrulama_hatasi(hata: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc']) or 'kayit'}: {e['msg']}" for e in hata.errors()
+    )
+
+
+def _parti_dogrula(ham_parti: list, sema: type[BaseModel], ek_kontrol, sonuc: schemas.TopluYuklemeSonucu) -> list:
+    """Satırları çözüp doğrular; hatalıları `sonuc`a yazar, geçerlilerin (satir_no, dict) listesini döner."""
+    parti = []
+    for satir_no, veri in ham_parti:
+        if isinstance(veri, bytes):
+            try:
+                veri = json.loads(veri)
+            except ValueError as e:
+                sonuc.hatalar.append(schemas.TopluHata(satir=satir_no, hata=f"Geçersiz JSON: {e}"))
+                continue
+        try:
+            nesne = sema.model_validate(veri)
+        except ValidationError as e:
+            sonuc.hatalar.append(schemas.TopluHata(satir=satir_no, hata=_dogrulama_hatasi(e)))
+            continue
+        mesaj = ek_kontrol(nesne) if ek_kontrol else None
+        if mesaj:
+            sonuc.hatalar.append(schemas.TopluHata(satir=satir_no, hata=mesaj))
+            continue
+        parti.append((satir_no, nesne.model_dump()))
+    return parti
+
+
+def _parti_isle(db: Session, model, sema: type[BaseModel], ek_kontrol, ham_parti: list,
+                sonuc: schemas.TopluYuklemeSonucu):
+    parti = _parti_dogrula(ham_parti, sema, ek_kontrol, sonuc)
+    if parti:
+        _parti_yaz(db, model, parti, sonuc)
+
+
+def _parti_yaz(db: Session, model, parti: list, sonuc: schemas.TopluYuklemeSonucu):
+    """
+    Partiyi tek executemany ile yazar. Parti içinde unique ihlali gibi bir hata
+    varsa partiyi geri alıp satırları savepoint'lerle tek tek dener; böylece
+    sadece sorunlu satırlar reddedilir.
+    """
+    try:
+        db.execute(insert(model), [kayit for _, kayit in parti])
+        db.commit()
+        sonuc.eklenen += len(parti)
+        return
+    except IntegrityError:
+        db.rollback()
+
+    # pysqlite SAVEPOINT'ten önce BEGIN göndermiyor; dış transaction olmadan her RELEASE
+    # satırı ayrı commit ederdi. Satırlar ve savepoint'leri tek transaction'da commit edilsin.
+    db.connection().exec_driver_sql("BEGIN")
+    for satir_no, kayit in parti:
+        try:
+            with db.begin_nested():
+                db.execute(insert(model), [kayit])
+            sonuc.eklenen += 1
+        except IntegrityError as e:
+            sonuc.hatalar.append(schemas.TopluHata(satir=satir_no, hata=str(e.orig)))
+    db.commit()
+
+
+async def toplu_yukle(request: Request, db: Session, model, sema: type[BaseModel],
+                      ek_kontrol: Optional[Callable[[BaseModel], Optional[str]]] = None
+                      ) -> schemas.TopluYuklemeSonucu:
+    """
+    İsteği okuyup `model` tablosuna toplu ekleme yapar.
+    `ek_kontrol` şema dışı bir kural ihlalinde hata mesajı, aksi hâlde None döner.
+    """
+    sonuc = schemas.TopluYuklemeSonucu()
+    parti = []
+    async for satir in kayitlari_oku(request):
+        parti.append(satir)
+        if len(parti) >= PARTI_BOYUTU:
+            await run_in_threadpool(_parti_isle, db, model, sema, ek_kontrol, parti, sonuc)
+            parti = []
+
+    if parti:
+        await run_in_threadpool(_parti_isle, db, model, sema, ek_kontrol, parti, sonuc)
+
+    sonuc.hatalar.sort(key=lambda h: h.satir)
+    sonuc.hatali = len(sonuc.hatalar)
+    return sonuc
@@ -0,0 +1,32 @@
+"""
+Birden fazla kaydı id listesiyle tek istekte getirme (POST /<kaynak>/batch-get).
+
+İstemcinin N ayrı GET yerine bir istek atması için: id'ler tekrarsız hâle getirilip
+`IN (...)` sorgusuyla parça parça okunur, cevap istekteki sırayla kurulur ve
+bulunamayan id'ler açıkça işaretlenir.
+"""
+import os
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from . import schemas
+
+# Eski SQLite sürümlerinde sorgu başına en fazla 999 parametre var; her parça tek sorgu
+PARCA_BOYUTU = 500
+TOPLU_GETIR_SINIRI = int(os.getenv("TOPLU_GETIR_SINIRI", 1000))
+
+
+def idlerle_getir(db: Session, model, sema: type, idler: List[int]) -> schemas.TopluGetirSonucu:
+    if len(idler) > TOPLU_GETIR_SINIRI:
+        raise HTTPException(status_code=400, detail=f"Tek istekte en fazla {TOPLU_GETIR_SINIRI} id istenebilir")
+    benzersiz = list(dict.fromkeys(idler))
+    bulunan = {}
+    for i in range(0, len(benzersiz), PARCA_BOYUTU):
+        for kayit in db.query(model).filter(model.id.in_(benzersiz[i:i + PARCA_BOYUTU])):
+            bulunan[kayit.id] = sema.model_validate(kayit)
+    return schemas.TopluGetirSonucu[sema](
+        sonuclar=[schemas.TopluGetirOge[sema](id=i, bulundu=i in bulunan, kayit=bulunan.get(i)) for i in idler],
+        bulunamayan=[i for i in benzersiz if i not in bulunan],
+    )
@@ -1,3 +1,4 @@
+import re
 from datetime import date, datetime
 
 def tarih_formatla_turkce(tarih: date) -> str:
@@ -14,6 +15,17 @@ def tarih_formatla_turkce(tarih: date) -> str:
     
     return f"{tarih.day} {aylar[tarih.month]} {tarih.year}"
 
+def isbn_kontrol_basamagi(ilk_on_iki: str) -> int:
+    """ISBN-13'ün ilk 12 hanesinden kontrol basamağını hesaplar (1, 3, 1, 3 ... ağırlıklı)."""
+    toplam = 0
+    for i, digit in enumerate(ilk_on_iki):
+        n = int(digit)
+        if i % 2 == 0:
+            toplam += n
+        else:
+            toplam += n * 3
+    return (10 - (toplam % 10)) % 10
+
 def isbn_dogrula(isbn: str) -> bool:
     """
     Basit bir ISBN-13 doğrulama algoritması.
@@ -27,16 +39,30 @@ def isbn_dogrula(isbn: str) -> bool:
     if not isbn.isdigit():
         return False
         
-    toplam = 0
-    for i, digit in enumerate(isbn[:-1]):
-        n = int(digit)
-        if i % 2 == 0:
-            toplam += n
-        else:
-            toplam += n * 3
-            
-    kontrol_basamagi = (10 - (toplam % 10)) % 10
-    return kontrol_basamagi == int(isbn[-1])
+    return isbn_kontrol_basamagi(isbn[:-1]) == int(isbn[-1])
+
+def isbn_uret(sira: int, onek: str = "978") -> str:
+    """Sıra numarasından geçerli bir ISBN-13 üretir (sentetik veri ve yük testleri için)."""
+    govde = f"{onek}{sira:09d}"
+    return govde + str(isbn_kontrol_basamagi(govde))
+
+def tr_katla(metin: str) -> str:
+    """
+    Türkçe kurallarıyla küçük harfe çevirir (arama karşılaştırmaları için).
+    str.lower() 'I' harfini 'i', 'İ' harfini 'i̇' yapar; Türkçede doğrusu 'ı' ve 'i'.
+    Örnek: "IŞIK İLBER" -> "ışık ilber"
+    """
+    return metin.replace("İ", "i").replace("I", "ı").lower()
+
+def fts_sorgusu(metin: str) -> str:
+    """
+    Kullanıcının arama metnini FTS5 MATCH ifadesine çevirir.
+    Her kelime tırnağa alınıp önek araması yapılır, kelimeler AND ile bağlanır;
+    böylece FTS5 operatörleri (NEAR, OR, -, ^ ...) kullanıcıdan gelemez.
+    Örnek: "Orhan pam" -> '"orhan"* "pam"*'
+    """
+    kelimeler = re.findall(r"\w+", tr_katla(metin))
+    return " ".join(f'"{k}"*' for k in kelimeler)
 
 def metin_ozeti_cikar(metin: str, uzunluk: int = 100) -> str:
     """
@@ -0,0 +1,139 @@
+"""
+Ödünç yazmaları için grup commit kuyruğu (isteğe bağlı, `YAZMA_KUYRUGU=acik`).
+
+SQLite'ta tek yazar var ve her commit bir fsync demek; açılış saatinde bütün şube
+kiosklarının ödünç/teslim istekleri aynı anda gelince verim commit gecikmesine
+takılıyor, bekleyenler `database is locked` alıyor. Kuyruk açıkken:
+
+- handler yazma işini (oturumu alıp sonucu dönen bir fonksiyon) kuyruğa bırakır ve bekler,
+- tek bir yazar thread'i ilk işten sonra `YAZMA_KUYRUGU_BEKLEME_MS` boyunca ya da
+  `YAZMA_KUYRUGU_GRUP_BOYUTU` işe ulaşana kadar gelenleri toplar,
+- grubu `BEGIN IMMEDIATE` ile açılan tek transaction'da, her işi kendi SAVEPOINT'inde çalıştırır
+  ve bir kez commit eder.
+
+Hata veren iş (açık ödünç çakışması, olmayan kitap, 404) sadece kendi SAVEPOINT'ini geri alır,
+istisna o isteğe döner; diğerleri etkilenmez. Sonuçlar commit başarılı olduktan sonra teslim
+edilir, commit düşerse gruptaki herkes hatayı alır. İş, kuyruğa bırakan isteğin context'inde
+çalışır; sorguları o isteğin metriklerine (Server-Timing, sorgu sayısı) yazılır. Kuyruk worker başınadır; birden fazla
+uvicorn worker'ı varsa her biri kendi grubunu commit eder.
+"""
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from .asenkron import senkron_kalsin
+from .database import SessionLocal
+
+# "acik": ödünç oluşturma/güncelleme grup commit kuyruğundan geçer
+YAZMA_KUYRUGU = os.getenv("YAZMA_KUYRUGU", "kapali")
+YAZMA_KUYRUGU_BEKLEME_MS = float(os.getenv("YAZMA_KUYRUGU_BEKLEME_MS", 2))
+YAZMA_KUYRUGU_GRUP_BOYUTU = int(os.getenv("YAZMA_KUYRUGU_GRUP_BOYUTU", 100))
+
+_DUR = object()
+
+
+class YazmaKuyrugu:
+    def __init__(self, oturum_fabrikasi: Callable[[], Session] = SessionLocal,
+                 bekleme_ms: float = YAZMA_KUYRUGU_BEKLEME_MS, grup_boyutu: int = YAZMA_KUYRUGU_GRUP_BOYUTU):
+        self.oturum_fabrikasi = oturum_fabrikasi
+        self.bekleme = bekleme_ms / 1000
+        self.grup_boyutu = grup_boyutu
+        self._kuyruk = queue.Queue()
+        self._kilit = threading.Lock()
+        self._yazar = None
+        self.grup_sayisi = 0
+        self.is_sayisi = 0
+
+    def calistir(self, is_: Callable[[Session], object]):
+        """`is_`'i bir sonraki grupta çalıştırır; commit'ten sonra sonucunu döner ya da istisnasını fırlatır."""
+        gelecek = Future()
+        self._baslat()
+        # Yazar thread'i isteğin ContextVar'larını (metrikler.aktif_olcum) görsün
+        self._kuyruk.put((is_, gelecek, contextvars.copy_context()))
+        return gelecek.result()
+
+    def durdur(self):
+        """Kuyruktaki işleri yazıp yazar thread'ini durdurur."""
+        with self._kilit:
+            yazar, self._yazar = self._yazar, None
+        if yazar is not None:
+            self._kuyruk.put(_DUR)
+            yazar.join()
+
+    def _baslat(self):
+        if self._yazar is not None:
+            return
+        with self._kilit:
+            if self._yazar is None:
+                self._yazar = threading.Thread(target=self._dongu, name="yazma-kuyrugu", daemon=True)
+                self._yazar.start()
+
+    def _dongu(self):
+        while True:
+            ilk = self._kuyruk.get()
+            if ilk is _DUR:
+                return
+            grup, dur = [ilk], False
+            son = time.monotonic() + self.bekleme
+            while len(grup) < self.grup_boyutu:
+                kalan = son - time.monotonic()
+                try:
+                    # Süre dolduysa sadece hazırda bekleyenler alınır
+                    oge = self._kuyruk.get(timeout=kalan) if kalan > 0 else self._kuyruk.get_nowait()
+                except queue.Empty:
+                    break
+                if oge is _DUR:
+                    dur = True
+                    break
+                grup.append(oge)
+            self._grubu_yaz(grup)
+            if dur:
+                return
+
+    def _grubu_yaz(self, grup: list):
+        oturum = self.oturum_fabrikasi()
+        basarili = []
+        try:
+            # Yazma kilidi baştan alınır; pysqlite'ın kendi BEGIN'i yerine geçer, SAVEPOINT'ler bunun içinde kalır
+            oturum.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            for is_, gelecek, baglam in grup:
+                try:
+                    with oturum.begin_nested():
+                        sonuc = baglam.run(is_, oturum)
+                except Exception as hata:
+                    gelecek.set_exception(hata)
+                else:
+                    basarili.append((gelecek, sonuc))
+            oturum.commit()
+        except Exception as hata:
+            oturum.rollback()
+            for gelecek, _ in basarili:
+                gelecek.set_exception(hata)
+            # BEGIN düştüyse işler hiç çalışmadı
+            for _, gelecek, _ in grup:
+                if not gelecek.done():
+                    gelecek.set_exception(hata)
+        else:
+            for gelecek, sonuc in basarili:
+                gelecek.set_result(sonuc)
+        finally:
+            oturum.close()
+            self.grup_sayisi += 1
+            self.is_sayisi += len(grup)
+
+
+kuyruk: Optional[YazmaKuyrugu] = YazmaKuyrugu() if YAZMA_KUYRUGU == "acik" else None
+
+
+def kuyruk_varsa_senkron(endpoint):
+    """
+    Kuyruk açıkken handler sonucu beklerken bloklanıyor; DB_MODU=async'te event loop'u
+    tıkamasın diye bu endpoint'ler threadpool'da kalır.
+    """
+    return senkron_kalsin(endpoint) if kuyruk is not None else endpoint
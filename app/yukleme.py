@@ -0,0 +1,26 @@
+"""
+İlişki yükleme stratejileri.
+
+Detay şemaları (örn. YazarDetayResponse) ilişkileri serileştirirken lazy yükleme
+her nesne için ayrı bir sorgu atar (N+1). Detay endpointleri ilişkiyi ana sorguyla
+birlikte yükler; strateji ILISKI_YUKLEME ortam değişkeniyle ya da istek başına
+`yukleme` parametresiyle seçilebilir.
+"""
+import os
+from typing import Literal, Optional
+
+from sqlalchemy.orm import joinedload, lazyload, selectinload
+
+# selectin: ana sorgu + tek bir "WHERE ... IN (...)" sorgusu (listelerde en iyisi)
+# joined:   tek sorgu, LEFT OUTER JOIN (tekil detaylarda bir tur daha az)
+# lazy:     eski davranış, erişildiğinde yükler
+Strateji = Literal["selectin", "joined", "lazy"]
+
+VARSAYILAN_STRATEJI: Strateji = os.getenv("ILISKI_YUKLEME", "selectin")
+
+_SECENEKLER = {"selectin": selectinload, "joined": joinedload, "lazy": lazyload}
+
+
+def iliski_yukle(iliski, strateji: Optional[Strateji] = None):
+    """Verilen ilişki için sorguya eklenecek yükleme seçeneğini döner."""
+    return _SECENEKLER[strateji or VARSAYILAN_STRATEJI](iliski)
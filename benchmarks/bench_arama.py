@@ -0,0 +1,83 @@
+"""
+FTS5 kitap aramasını `LIKE '%q%'` taramasıyla karşılaştırır.
+
+    python -m benchmarks.bench_arama
+    BENCH_KITAP_SAYISI=100000 python -m benchmarks.bench_arama
+
+LIKE her sorguda tüm tabloyu tarar; FTS5 ters indeksten okuduğu için
+katalog büyüdükçe aradaki fark açılmalı.
+"""
+import random
+
+from sqlalchemy import insert, or_, text
+
+from app import models, utils
+from .ortak import gecici_veritabani, ortam_sayisi, zamanla
+
+KELIMELER = [
+    "deniz", "şehir", "ışık", "gece", "kar", "masumiyet", "ağaç", "yol", "kitap", "zaman",
+    "çocuk", "göç", "istanbul", "dağ", "rüzgar", "sessiz", "kırmızı", "saat", "ev", "uzak",
+]
+ADLAR = ["Orhan", "Yaşar", "Sabahattin", "Oğuz", "İlber", "Elif", "Sait", "Halide", "Ahmet", "Peyami"]
+SOYADLAR = ["Pamuk", "Kemal", "Ali", "Atay", "Ortaylı", "Şafak", "Faik", "Edip", "Hamdi", "Safa"]
+# Sık geçen kelimelerde LIKE ilk 20 eşleşmeyi bulunca durur ama sıralama yapamaz;
+# FTS5 tüm eşleşmeleri alakaya göre sıralar. Asıl fark nadir kelimelerde görünür.
+NADIR = "sarnıç"
+ARANANLAR = ["istanbul", "pamuk", "ışık gece", "masum", NADIR]
+
+
+def veri_yukle(engine, adet: int):
+    rnd = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Yazar), [
+            {"ad": ad, "soyad": soyad} for ad in ADLAR for soyad in SOYADLAR
+        ])
+        parti = []
+        for i in range(1, adet + 1):
+            baslik = " ".join(rnd.choice(KELIMELER) for _ in range(3))
+            if i % 100_000 == 0:
+                baslik += " " + NADIR
+            parti.append({
+                "baslik": baslik.title(),
+                "isbn": str(i),
+                "yazar_id": rnd.randint(1, len(ADLAR) * len(SOYADLAR)),
+            })
+            if len(parti) == 50_000:
+                conn.execute(insert(models.Kitap), parti)
+                parti = []
+        if parti:
+            conn.execute(insert(models.Kitap), parti)
+
+
+def main():
+    adet = ortam_sayisi("BENCH_KITAP_SAYISI", 1_000_000)
+    with gecici_veritabani() as (engine, SessionLocal):
+        print(f"{adet} kitap yükleniyor (arama tablosu triggerlarla dolar)...")
+        veri_yukle(engine, adet)
+
+        db = SessionLocal()
+        print(f"{'sorgu':>12} | {'LIKE (ms)':>10} | {'FTS5 (ms)':>10}")
+        for q in ARANANLAR:
+            def like():
+                kosullar = [
+                    or_(models.Kitap.baslik.ilike(f"%{k}%"),
+                        models.Yazar.ad.ilike(f"%{k}%"), models.Yazar.soyad.ilike(f"%{k}%"))
+                    for k in q.split()
+                ]
+                return (db.query(models.Kitap).join(models.Yazar)
+                        .filter(*kosullar).limit(20).all())
+
+            def fts():
+                return (db.query(models.Kitap)
+                        .join(models.kitap_ara, models.kitap_ara.c.rowid == models.Kitap.id)
+                        .filter(text("kitap_ara MATCH :eslesme"))
+                        .order_by(text("bm25(kitap_ara, 2.0, 1.0)"))
+                        .params(eslesme=utils.fts_sorgusu(q))
+                        .limit(20).all())
+
+            print(f"{q:>12} | {zamanla(like, 5):>10.2f} | {zamanla(fts, 5):>10.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Ödünç yazmalarında istek başına commit ile grup commit kuyruğunun verimi.
+
+    python -m benchmarks.bench_grup_commit
+    BENCH_ESZAMANLI=64 BENCH_ISLEM_SAYISI=200 python -m benchmarks.bench_grup_commit
+
+Her thread bir kiosk gibi kendi kitaplarını sırayla ödünç alıp teslim eder (çakışma yok);
+handler'lar HTTP katmanı olmadan doğrudan çağrılır. Her yol "uretim" profilinde
+(WAL, synchronous=NORMAL) ve synchronous=FULL ile (her commit'te fsync) ölçülür;
+saniyedeki yazma ve hata sayısı raporlanır.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+
+from app import models, schemas, yazma_kuyrugu
+from app.routers import odunc
+from .ortak import gecici_veritabani, ortam_sayisi
+
+
+def _calistir(eszamanli: int, islem: int, synchronous: str, kuyruklu: bool):
+    os.environ["SQLITE_SYNCHRONOUS"] = synchronous
+    with gecici_veritabani("uretim") as (engine, Oturum):
+        with Oturum() as db:
+            db.add(models.Yazar(id=1, ad="Bench", soyad="Yazar"))
+            db.add_all([models.Kitap(id=i, baslik=f"K{i}", isbn=f"GC{i}", yazar_id=1) for i in range(1, eszamanli + 1)])
+            db.add_all([models.Kullanici(id=i, ad="K", soyad=str(i), email=f"k{i}@e.com")
+                        for i in range(1, eszamanli + 1)])
+            db.commit()
+
+        yazma_kuyrugu.kuyruk = yazma_kuyrugu.YazmaKuyrugu(Oturum) if kuyruklu else None
+        bugun = date.today()
+
+        def kiosk(no):
+            hata = 0
+            db = Oturum()
+            try:
+                for _ in range(islem // 2):
+                    try:
+                        kayit = odunc.create_odunc(schemas.OduncCreate(kullanici_id=no, kitap_id=no, alis_tarihi=bugun),
+                                                   db=db)
+                        odunc.update_odunc(kayit.id, schemas.OduncUpdate(teslim_tarihi=bugun), db=db)
+                    except (HTTPException, OperationalError):
+                        db.rollback()
+                        hata += 1
+            finally:
+                db.close()
+            return hata
+
+        basla = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=eszamanli) as havuz:
+            hatalar = sum(havuz.map(kiosk, range(1, eszamanli + 1)))
+        sure = time.perf_counter() - basla
+
+        gruplar = None
+        if kuyruklu:
+            kuyruk, yazma_kuyrugu.kuyruk = yazma_kuyrugu.kuyruk, None
+            kuyruk.durdur()
+            gruplar = kuyruk.is_sayisi / max(kuyruk.grup_sayisi, 1)
+        with Oturum() as db:
+            yazilan = db.query(models.OduncKayit).count() * 2
+    return yazilan / sure, hatalar, gruplar
+
+
+def main():
+    eszamanli = ortam_sayisi("BENCH_ESZAMANLI", 32)
+    islem = ortam_sayisi("BENCH_ISLEM_SAYISI", 100)
+    eski = os.environ.get("SQLITE_SYNCHRONOUS")
+    print(f"{eszamanli} eşzamanlı kiosk, kiosk başına {islem} yazma (ödünç + teslim)")
+    print(f"{'synchronous':>11} | {'yol':>15} | {'yazma/sn':>9} | {'hata':>5} | {'iş/grup':>7}")
+    try:
+        for synchronous in ("NORMAL", "FULL"):
+            for kuyruklu in (False, True):
+                hiz, hata, gruplar = _calistir(eszamanli, islem, synchronous, kuyruklu)
+                yol = "grup commit" if kuyruklu else "istek başına"
+                ortalama = f"{gruplar:.1f}" if gruplar else "-"
+                print(f"{synchronous:>11} | {yol:>15} | {hiz:>9.0f} | {hata:>5} | {ortalama:>7}")
+    finally:
+        if eski is None:
+            os.environ.pop("SQLITE_SYNCHRONOUS", None)
+        else:
+            os.environ["SQLITE_SYNCHRONOUS"] = eski
+
+
+if __name__ == "__main__":
+    main()
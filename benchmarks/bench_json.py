@@ -0,0 +1,71 @@
+"""
+Liste cevabının satır başına maliyeti: standart yol (ORM nesnesi + Pydantic doğrulama)
+ile hızlı yol (sütun tuple'ı + hazır serileştirici) karşılaştırması.
+
+    python -m benchmarks.bench_json
+    BENCH_SAYFA_BOYUTU=1000 python -m benchmarks.bench_json
+
+Süreler sorgu + serileştirme dahil, bir sayfa için; satır başına mikrosaniye de yazılır.
+"""
+from datetime import date, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+
+from app import hizli_json, models, schemas
+from .ortak import gecici_veritabani, ortam_sayisi, zamanla
+
+
+def veri_yukle(engine, adet: int):
+    bugun = date.today()
+    with engine.begin() as conn:
+        conn.execute(insert(models.Yazar), [{"ad": "Yazar", "soyad": str(i)} for i in range(1, 101)])
+        conn.execute(insert(models.Kitap), [{
+            "baslik": f"Kitap {i}",
+            "isbn": f"978{i:010d}",
+            "yayin_yili": 1900 + i % 120,
+            "yazar_id": i % 100 + 1,
+            "odunc_acik": i % 3 == 0,
+            "toplam_odunc": i % 17,
+            "son_odunc_tarihi": bugun - timedelta(days=i % 365),
+        } for i in range(1, adet + 1)])
+
+
+def main():
+    sayfa = ortam_sayisi("BENCH_SAYFA_BOYUTU", 100)
+    with gecici_veritabani() as (engine, SessionLocal):
+        veri_yukle(engine, sayfa)
+        db = SessionLocal()
+        sema = schemas.KitapResponse
+        liste_adaptoru = TypeAdapter(List[sema])
+        sutunlar = [getattr(models.Kitap, alan) for alan in hizli_json._alanlar(models.Kitap, sema)]
+
+        def standart():
+            # FastAPI'nin response_model ile yaptığı: doğrula, sonra JSON'a yaz
+            kayitlar = db.query(models.Kitap).limit(sayfa).all()
+            liste_adaptoru.dump_json(liste_adaptoru.validate_python(kayitlar, from_attributes=True))
+            db.expunge_all()
+
+        def satirlar():
+            return [s._asdict() for s in db.query(*sutunlar).limit(sayfa).all()]
+
+        def typeadapter():
+            hizli_json.satir_adaptoru(sema).dump_json(satirlar())
+
+        yollar = [("standart (ORM + doğrulama)", standart), ("hızlı (TypeAdapter)", typeadapter)]
+        if hizli_json.orjson is not None:
+            yollar.append(("hızlı (orjson)", lambda: hizli_json.orjson.dumps(satirlar())))
+        else:
+            print("orjson kurulu değil, sadece TypeAdapter yolu ölçülüyor.")
+
+        print(f"Sayfa boyutu: {sayfa}")
+        print(f"{'yol':>28} | {'sayfa (ms)':>10} | {'satır (µs)':>10}")
+        for ad, fn in yollar:
+            ms = zamanla(fn, tekrar=200)
+            print(f"{ad:>28} | {ms:>10.3f} | {ms * 1000 / sayfa:>10.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Ölçüm katmanının maliyeti: sorgu başına (cursor kancaları) ve istek başına (middleware).
+
+    python -m benchmarks.bench_metrikler
+
+İki sütun arasındaki fark ölçümün eklediği süredir; üretimde açık kalabilmesi için
+sorgu başına birkaç mikrosaniyenin altında kalmalı.
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.database import sql_olcumu_ekle
+from app.metrikler import MetrikMiddleware, metrikler
+from .ortak import gecici_veritabani, ortam_sayisi, zamanla
+
+
+def sorgu_maliyeti(adet: int):
+    with gecici_veritabani() as (engine, _):
+        yol = engine.url.database
+        duz = create_engine(f"sqlite:///{yol}")
+        olculen = create_engine(f"sqlite:///{yol}")
+        sql_olcumu_ekle(olculen)
+        print(f"{'':>10} | {'kancasız (µs)':>14} | {'kancalı (µs)':>13}")
+        with duz.connect() as c1, olculen.connect() as c2:
+            sorgu = text("SELECT id FROM kitaplar WHERE id = 1")
+
+            def calistir(conn):
+                return lambda: [conn.execute(sorgu).all() for _ in range(adet)]
+
+            ms_duz = zamanla(calistir(c1))
+            ms_olculen = zamanla(calistir(c2))
+        print(f"{'sorgu':>10} | {ms_duz * 1000 / adet:>14.2f} | {ms_olculen * 1000 / adet:>13.2f}")
+        duz.dispose()
+        olculen.dispose()
+
+
+def istek_maliyeti(adet: int):
+    def uygulama(olcumlu: bool):
+        app = FastAPI()
+
+        @app.get("/kitaplar/{kitap_id}")
+        def kitap(kitap_id: int):
+            return {"id": kitap_id}
+
+        if olcumlu:
+            app.add_middleware(MetrikMiddleware)
+        return TestClient(app)
+
+    sonuclar = []
+    for olcumlu in (False, True):
+        istemci = uygulama(olcumlu)
+        sonuclar.append(zamanla(lambda: [istemci.get("/kitaplar/1") for _ in range(adet)], tekrar=5))
+    print(f"{'istek':>10} | {sonuclar[0] * 1000 / adet:>14.2f} | {sonuclar[1] * 1000 / adet:>13.2f}")
+
+
+def main():
+    sorgu_maliyeti(ortam_sayisi("BENCH_SORGU_SAYISI", 5000))
+    istek_maliyeti(ortam_sayisi("BENCH_ISTEK_SAYISI", 1000))
+    metrikler.sifirla()
+
+
+if __name__ == "__main__":
+    main()
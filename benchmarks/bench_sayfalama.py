@@ -0,0 +1,66 @@
+"""
+OFFSET ile cursor (keyset) sayfalamanın derinliğe göre gecikmesini karşılaştırır.
+
+    python -m benchmarks.bench_sayfalama
+    BENCH_ODUNC_SAYISI=2000000 python -m benchmarks.bench_sayfalama
+
+OFFSET ile sayfa süresi derinlikle doğrusal artar, cursor modunda sabit kalmalı.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app import models
+from app.sayfalama import sayfala
+from .ortak import gecici_veritabani, ortam_sayisi, zamanla
+
+SAYFA_BOYUTU = 100
+
+
+def veri_yukle(engine, adet: int):
+    bugun = date.today()
+    with engine.begin() as conn:
+        # Foreign key'ler zorlanıyor; ödünçlerin gösterdiği kitap ve kullanıcılar var olmalı
+        conn.execute(insert(models.Yazar), [{"id": 1, "ad": "Bench", "soyad": "Yazar"}])
+        conn.execute(insert(models.Kitap), [
+            {"id": i, "baslik": f"Kitap {i}", "isbn": f"isbn-{i}", "yazar_id": 1} for i in range(1, 5001)
+        ])
+        conn.execute(insert(models.Kullanici), [
+            {"id": i, "ad": "Okur", "soyad": str(i), "email": f"okur{i}@ornek.com"} for i in range(1, 1001)
+        ])
+        parti = []
+        for i in range(1, adet + 1):
+            parti.append({
+                "kullanici_id": i % 1000 + 1,
+                "kitap_id": i % 5000 + 1,
+                "alis_tarihi": bugun - timedelta(days=i % 3650),
+                "teslim_tarihi": bugun,
+            })
+            if len(parti) == 50_000:
+                conn.execute(insert(models.OduncKayit), parti)
+                parti = []
+        if parti:
+            conn.execute(insert(models.OduncKayit), parti)
+
+
+def main():
+    adet = ortam_sayisi("BENCH_ODUNC_SAYISI", 500_000)
+    with gecici_veritabani() as (engine, SessionLocal):
+        print(f"{adet} ödünç kaydı yükleniyor...")
+        veri_yukle(engine, adet)
+
+        db = SessionLocal()
+        print(f"{'derinlik':>10} | {'offset (ms)':>12} | {'cursor (ms)':>12}")
+        derinlik = SAYFA_BOYUTU
+        while derinlik < adet:
+            sorgu = db.query(models.OduncKayit)
+            offset_ms = zamanla(lambda: sayfala(sorgu, models.OduncKayit, skip=derinlik, limit=SAYFA_BOYUTU))
+            # Aynı sayfanın cursor karşılığı: id'ler 1'den başlayıp ardışık
+            cursor_ms = zamanla(lambda: sayfala(sorgu, models.OduncKayit, limit=SAYFA_BOYUTU, after_id=derinlik))
+            print(f"{derinlik:>10} | {offset_ms:>12.3f} | {cursor_ms:>12.3f}")
+            derinlik *= 4
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
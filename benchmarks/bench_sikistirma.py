@@ -0,0 +1,74 @@
+"""
+Sıkıştırmanın kablodaki bayt ve istek başına CPU maliyeti.
+
+    python -m benchmarks.bench_sikistirma
+    BENCH_KITAP_SAYISI=200000 python -m benchmarks.bench_sikistirma
+
+İki tipik cevap ölçülür: 100 satırlık kitap listesi sayfası ve tüm kitapların NDJSON
+export'u. Export, middleware'in yaptığı gibi parti parti sıkıştırılıp her partide flush edilir.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app import disa_aktar, hizli_json, models, schemas
+from app.sikistirma import Sikistirici, brotli
+from .ortak import gecici_veritabani, ortam_sayisi, zamanla
+
+AYARLAR = [("gzip", 1), ("gzip", 6), ("gzip", 9), ("br", 4), ("br", 11)]
+
+
+def veri_yukle(engine, adet: int):
+    bugun = date.today()
+    with engine.begin() as conn:
+        conn.execute(insert(models.Yazar), [{"ad": "Yazar", "soyad": str(i)} for i in range(1, 1001)])
+        conn.execute(insert(models.Kitap), [{
+            "baslik": f"Kitap başlığı {i}",
+            "isbn": f"978{i:010d}",
+            "yayin_yili": 1900 + i % 120,
+            "yazar_id": i % 1000 + 1,
+            "kategori_id": None,
+            "odunc_acik": i % 3 == 0,
+            "toplam_odunc": i % 17,
+            "son_odunc_tarihi": bugun - timedelta(days=i % 365),
+        } for i in range(1, adet + 1)])
+
+
+def olc(ad: str, parcalar: list, tekrar: int):
+    duz = sum(len(p) for p in parcalar)
+    print(f"\n{ad}: {duz:,} bayt, {len(parcalar)} parça")
+    print(f"{'kodlama':>10} | {'bayt':>12} | {'oran':>6} | {'CPU (ms)':>9}")
+    for kodlama, seviye in AYARLAR:
+        if kodlama == "br" and brotli is None:
+            continue
+
+        def sikistir():
+            s = Sikistirici(kodlama, gzip_seviyesi=seviye, brotli_seviyesi=seviye)
+            cikti = [s.parca(p) for p in parcalar[:-1]]
+            cikti.append(s.bitir(parcalar[-1]))
+            return cikti
+
+        boyut = sum(len(p) for p in sikistir())
+        ms = zamanla(sikistir, tekrar=tekrar)
+        print(f"{kodlama + '-' + str(seviye):>10} | {boyut:>12,} | {duz / boyut:>5.1f}x | {ms:>9.3f}")
+
+
+def main():
+    adet = ortam_sayisi("BENCH_KITAP_SAYISI", 50_000)
+    if brotli is None:
+        print("brotli kurulu değil, sadece gzip ölçülüyor.")
+    with gecici_veritabani() as (engine, SessionLocal):
+        veri_yukle(engine, adet)
+        db = SessionLocal()
+        sema = schemas.KitapResponse
+        sutunlar = [getattr(models.Kitap, alan) for alan in hizli_json._alanlar(models.Kitap, sema)]
+        sayfa = [s._asdict() for s in db.query(*sutunlar).order_by(models.Kitap.id).limit(100)]
+        olc("Liste sayfası (100 kitap)", [hizli_json.serilestir(sayfa, sema)], tekrar=50)
+
+        export = [p.encode() for p in disa_aktar._ndjson(db, models.Kitap, list(sema.model_fields))]
+        olc(f"NDJSON export ({adet} kitap)", export, tekrar=3)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Çok kitaplı bir yazarı silmenin maliyeti: ORM cascade'i ile veritabanı cascade'i.
+
+    python -m benchmarks.bench_silme
+    BENCH_KITAP_SAYISI=1000 BENCH_ODUNC_SAYISI=100000 python -m benchmarks.bench_silme
+
+Tek yazarlı bir veritabanı (varsayılan 10 bin kitap, 1 milyon ödünç) bir kez üretilir,
+her yol kendi kopyasında ayrı bir süreçte çalışır; süre ve sürecin en yüksek belleği raporlanır.
+
+- orm: eski `cascade="all, delete"` davranışı; her kitap ve her ödünç oturuma yüklenip tek tek silinir
+- veritabani: `db.delete(yazar)`; bağlı satırları ON DELETE CASCADE siler (passive_deletes)
+"""
+import multiprocessing
+import os
+import resource
+import shutil
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+import seed
+from app import models, sayaclar  # noqa: F401  (sayaclar: silmede ödünç sayaçlarını günceller)
+from app.database import motor_olustur
+from .ortak import gecici_veritabani, ortam_sayisi
+
+
+def _sil(yol: str, yontem: str):
+    engine = motor_olustur(f"sqlite:///{yol}")
+    db = sessionmaker(autoflush=False, bind=engine)()
+    basla = time.perf_counter()
+    yazar = db.get(models.Yazar, 1)
+    if yontem == "orm":
+        for kitap in yazar.kitaplar:
+            for kayit in kitap.odunc_kayitlari:
+                db.delete(kayit)
+            db.delete(kitap)
+    db.delete(yazar)
+    db.commit()
+    sure = time.perf_counter() - basla
+    kalan = db.query(models.OduncKayit).count()
+    db.close()
+    engine.dispose()
+    # ru_maxrss Linux'ta KB
+    return sure, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, kalan
+
+
+def main():
+    kitap = ortam_sayisi("BENCH_KITAP_SAYISI", 10_000)
+    odunc = ortam_sayisi("BENCH_ODUNC_SAYISI", 1_000_000)
+    baglam = multiprocessing.get_context("spawn")
+    with gecici_veritabani() as (engine, _):
+        kaynak = engine.url.database
+        seed.sentetik_yukle(engine, yazar=1, kategori=5, kitap=kitap, kullanici=max(kitap // 10, 1), odunc=odunc)
+        engine.dispose()
+        print(f"1 yazar, {kitap:,} kitap, {odunc:,} ödünç")
+        print(f"{'yol':>11} | {'süre (sn)':>10} | {'en yüksek bellek (MB)':>22}")
+        for yontem in ("orm", "veritabani"):
+            kopya = f"{kaynak}.{yontem}"
+            shutil.copy(kaynak, kopya)
+            with baglam.Pool(1) as havuz:
+                sure, bellek, kalan = havuz.apply(_sil, (kopya, yontem))
+            assert kalan == 0
+            print(f"{yontem:>11} | {sure:>10.2f} | {bellek:>22.0f}")
+            for dosya in (kopya, kopya + "-wal", kopya + "-shm"):
+                if os.path.exists(dosya):
+                    os.remove(dosya)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+"varsayilan" ve "uretim" SQLite profillerinin okuma/yazma verimini karşılaştırır.
+
+    python -m benchmarks.bench_sqlite_profil
+
+Yazma testi: her kitap ayrı bir transaction'da eklenir (POST /api/kitaplar/ gibi).
+Karışık test: bir yazar thread'i commit ederken okuyucu thread'ler id ile kitap çeker.
+"""
+import random
+import threading
+import time
+
+from app import models
+from .ortak import gecici_veritabani, ortam_sayisi
+
+
+def yazma_testi(SessionLocal, adet: int, baslangic: int = 0) -> float:
+    basla = time.perf_counter()
+    for i in range(baslangic, baslangic + adet):
+        db = SessionLocal()
+        db.add(models.Kitap(baslik=f"Kitap {i}", isbn=f"isbn-{i}", yazar_id=1))
+        db.commit()
+        db.close()
+    return adet / (time.perf_counter() - basla)
+
+
+def karisik_test(SessionLocal, okuyucu_sayisi: int, sure: float, max_id: int):
+    dur = threading.Event()
+    okumalar = [0] * okuyucu_sayisi
+    yazmalar = [0]
+
+    def okuyucu(no):
+        db = SessionLocal()
+        while not dur.is_set():
+            kid = random.randint(1, max_id)
+            db.query(models.Kitap).filter(models.Kitap.id == kid).first()
+            db.rollback()  # her okuma kendi snapshot'ını görsün
+            okumalar[no] += 1
+        db.close()
+
+    def yazar():
+        i = 0
+        while not dur.is_set():
+            db = SessionLocal()
+            db.add(models.Kitap(baslik=f"Yeni {i}", isbn=f"yeni-{i}", yazar_id=1))
+            db.commit()
+            db.close()
+            yazmalar[0] += 1
+            i += 1
+
+    threadler = [threading.Thread(target=okuyucu, args=(n,)) for n in range(okuyucu_sayisi)]
+    threadler.append(threading.Thread(target=yazar))
+    for t in threadler:
+        t.start()
+    time.sleep(sure)
+    dur.set()
+    for t in threadler:
+        t.join()
+    return sum(okumalar) / sure, yazmalar[0] / sure
+
+
+def main():
+    adet = ortam_sayisi("BENCH_YAZMA_SAYISI", 2000)
+    okuyucu = ortam_sayisi("BENCH_OKUYUCU_SAYISI", 4)
+    sure = ortam_sayisi("BENCH_SURE_SN", 5)
+
+    print(f"{'profil':>11} | {'yazma/sn':>10} | {'karışık okuma/sn':>17} | {'karışık yazma/sn':>17}")
+    for profil in ("varsayilan", "uretim"):
+        with gecici_veritabani(profil) as (engine, SessionLocal):
+            with SessionLocal() as db:
+                db.add(models.Yazar(ad="Bench", soyad="Yazar"))
+                db.commit()
+            yazma = yazma_testi(SessionLocal, adet)
+            okuma_sn, yazma_sn = karisik_test(SessionLocal, okuyucu, sure, adet)
+            print(f"{profil:>11} | {yazma:>10.0f} | {okuma_sn:>17.0f} | {yazma_sn:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
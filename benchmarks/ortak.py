@@ -0,0 +1,50 @@
+"""
+Benchmark betiklerinin ortak yardımcıları.
+
+Betikler repo kök dizininden modül olarak çalıştırılır:
+    python -m benchmarks.bench_sayfalama
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, motor_olustur
+from app import models  # noqa: F401  (tabloların metadata'ya kaydı için)
+
+
+@contextmanager
+def gecici_veritabani(profil: str = None):
+    """
+    Geçici bir SQLite dosyası üzerinde şemayı kurar, (engine, SessionLocal) döner.
+    Çıkışta dosya silinir.
+    """
+    klasor = tempfile.mkdtemp(prefix="kutuphane_bench_")
+    yol = os.path.join(klasor, "bench.db")
+    engine = motor_olustur(f"sqlite:///{yol}", profil)
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        engine.dispose()
+        for dosya in os.listdir(klasor):
+            os.remove(os.path.join(klasor, dosya))
+        os.rmdir(klasor)
+
+
+def zamanla(fn, tekrar: int = 20) -> float:
+    """Fonksiyonu `tekrar` kez çalıştırır, medyan süreyi milisaniye olarak döner."""
+    sureler = []
+    for _ in range(tekrar):
+        basla = time.perf_counter()
+        fn()
+        sureler.append((time.perf_counter() - basla) * 1000)
+    return statistics.median(sureler)
+
+
+def ortam_sayisi(ad: str, varsayilan: int) -> int:
+    """Benchmark boyutlarını ortam değişkeniyle küçültüp büyütebilmek için."""
+    return int(os.getenv(ad, varsayilan))
@@ -0,0 +1,367 @@
+"""
+API yük testi: bütün router'ları karışık okuma/yazma iş yüküyle çalıştırıp senaryo başına
+p50/p95/p99 gecikme ve saniyedeki istek sayısını raporlar.
+
+Süreç içinde (geçici bir veritabanı sentetik veriyle doldurulur, uygulama ASGI üzerinden çağrılır):
+
+    python -m benchmarks.yuk_testi --kitap 100000 --odunc 1000000 --sure 30
+    python -m benchmarks.yuk_testi --profil okuma --eszamanli 32 --cikti sonuc.json
+
+Çalışan bir sunucuya karşı (veri önceden `python seed.py --kitap ... --odunc ...` ile yüklenmiş olmalı):
+
+    uvicorn app.main:app --workers 4
+    python -m benchmarks.yuk_testi --url http://127.0.0.1:8000 --sure 60
+
+Sonuçlar `--cikti` ile JSON olarak yazılır. İki sonucu karşılaştırmak için:
+
+    python -m benchmarks.yuk_testi --karsilastir onceki.json sonraki.json --esik 0.10
+
+p95 gecikmesi eşikten fazla artan ya da RPS'i eşikten fazla düşen senaryolar gerileme sayılır,
+komut 1 ile çıkar. Süreç içi modda istemci ve uygulama aynı CPU'yu paylaştığı için mutlak
+değerler değil, aynı makinede commit'ler arası karşılaştırma anlamlıdır.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+
+# Senaryo: (ağırlık, yazma mı). Her senaryo tek bir HTTP isteği yapar.
+PROFILLER = {
+    "okuma": {"yazma_orani": 0.0},
+    "karisik": {"yazma_orani": 0.1},
+    "yazma": {"yazma_orani": 0.5},
+}
+
+ARAMA_KELIMELERI = ["kürk", "saat", "suç", "hayvan", "ince", "huzur", "beyaz", "yaban", "aşk", "dönüşüm"]
+
+
+class Baglam:
+    """Senaryoların paylaştığı durum: id aralıkları ve teslim edilmeyi bekleyen ödünçler."""
+
+    def __init__(self, kitap: int, yazar: int, kullanici: int, tohum: int):
+        self.kitap = kitap
+        self.yazar = yazar
+        self.kullanici = kullanici
+        self.rastgele = random.Random(tohum)
+        self.acik_odunclar = []
+        self.yeni_isbn = 0
+
+    def kitap_id(self):
+        return self.rastgele.randint(1, self.kitap)
+
+    def yazar_id(self):
+        return self.rastgele.randint(1, self.yazar)
+
+    def kullanici_id(self):
+        return self.rastgele.randint(1, self.kullanici)
+
+
+async def _kitap_detay(c, b):
+    return await c.get(f"/api/kitaplar/{b.kitap_id()}")
+
+
+async def _kitap_liste_filtre(c, b):
+    return await c.get("/api/kitaplar/", params={"yazar_id": b.yazar_id(), "limit": 20})
+
+
+async def _kitap_sayfa_cursor(c, b):
+    return await c.get("/api/kitaplar/", params={"after_id": b.kitap_id(), "limit": 50})
+
+
+async def _kitap_ara(c, b):
+    return await c.get("/api/kitaplar/ara", params={"q": b.rastgele.choice(ARAMA_KELIMELERI)})
+
+
+async def _yazar_detay(c, b):
+    return await c.get(f"/api/yazarlar/{b.yazar_id()}")
+
+
+async def _yazar_liste_kitaplariyla(c, b):
+    return await c.get("/api/yazarlar/detay", params={"after_id": b.yazar_id(), "limit": 20})
+
+
+async def _kategori_liste(c, b):
+    return await c.get("/api/kategoriler/")
+
+
+async def _kullanici_detay(c, b):
+    return await c.get(f"/api/kullanicilar/{b.kullanici_id()}")
+
+
+async def _odunc_gecmisi(c, b):
+    return await c.get("/api/odunc/", params={"kullanici_id": b.kullanici_id(), "siralama": "-alis_tarihi"})
+
+
+async def _istatistik_aylik(c, b):
+    bitis = date.today().replace(day=1) - timedelta(days=1)
+    return await c.get("/api/istatistik/aylik", params={"baslangic": str(bitis.replace(month=1, day=1)),
+                                                         "bitis": str(bitis)})
+
+
+async def _istatistik_en_cok(c, b):
+    bugun = date.today()
+    return await c.get("/api/istatistik/en-cok-odunc-alinan",
+                       params={"baslangic": str(bugun - timedelta(days=30)), "bitis": str(bugun)})
+
+
+async def _odunc_al(c, b):
+    res = await c.post("/api/odunc/", json={"kullanici_id": b.kullanici_id(), "kitap_id": b.kitap_id(),
+                                             "alis_tarihi": str(date.today())})
+    if res.status_code == 201:
+        b.acik_odunclar.append(res.json()["id"])
+    return res
+
+
+async def _odunc_teslim(c, b):
+    if not b.acik_odunclar:
+        return await _odunc_al(c, b)
+    odunc_id = b.acik_odunclar.pop(b.rastgele.randrange(len(b.acik_odunclar)))
+    return await c.patch(f"/api/odunc/{odunc_id}", json={"teslim_tarihi": str(date.today())})
+
+
+async def _kitap_ekle(c, b):
+    from app.utils import isbn_uret
+
+    b.yeni_isbn += 1
+    return await c.post("/api/kitaplar/", json={
+        "baslik": "Yük Testi " + " ".join(b.rastgele.sample(ARAMA_KELIMELERI, 2)),
+        "isbn": isbn_uret(b.rastgele.randrange(10 ** 9), onek="979"),
+        "yazar_id": b.yazar_id(),
+    })
+
+
+async def _kullanici_guncelle(c, b):
+    return await c.patch(f"/api/kullanicilar/{b.kullanici_id()}", json={"aktif_mi": True})
+
+
+OKUMA_SENARYOLARI = {
+    "kitap_detay": (20, _kitap_detay),
+    "kitap_liste_filtre": (10, _kitap_liste_filtre),
+    "kitap_sayfa_cursor": (5, _kitap_sayfa_cursor),
+    "kitap_ara": (8, _kitap_ara),
+    "yazar_detay": (8, _yazar_detay),
+    "yazar_liste_kitaplariyla": (3, _yazar_liste_kitaplariyla),
+    "kategori_liste": (4, _kategori_liste),
+    "kullanici_detay": (6, _kullanici_detay),
+    "odunc_gecmisi": (8, _odunc_gecmisi),
+    "istatistik_aylik": (2, _istatistik_aylik),
+    "istatistik_en_cok": (2, _istatistik_en_cok),
+}
+YAZMA_SENARYOLARI = {
+    "odunc_al": (5, _odunc_al),
+    "odunc_teslim": (5, _odunc_teslim),
+    "kitap_ekle": (1, _kitap_ekle),
+    "kullanici_guncelle": (1, _kullanici_guncelle),
+}
+
+
+def yuzdelik(sirali: list, oran: float) -> float:
+    """En yakın sıra yöntemiyle yüzdelik (sıralı liste)."""
+    if not sirali:
+        return 0.0
+    return sirali[min(len(sirali) - 1, max(0, round(oran * len(sirali) + 0.5) - 1))]
+
+
+def ozetle(sureler: list, hatalar: int, istemci_hatalari: int, gecen: float) -> dict:
+    sirali = sorted(sureler)
+    return {
+        "istek": len(sirali),
+        "hata_5xx": hatalar,
+        "hata_4xx": istemci_hatalari,
+        "rps": round(len(sirali) / gecen, 2) if gecen else 0.0,
+        "p50_ms": round(yuzdelik(sirali, 0.50) * 1000, 3),
+        "p95_ms": round(yuzdelik(sirali, 0.95) * 1000, 3),
+        "p99_ms": round(yuzdelik(sirali, 0.99) * 1000, 3),
+        "ort_ms": round(sum(sirali) / len(sirali) * 1000, 3) if sirali else 0.0,
+    }
+
+
+async def calistir(istemci: httpx.AsyncClient, baglam: Baglam, profil: str, eszamanli: int,
+                   sure: float, istek_sayisi: int = None) -> dict:
+    yazma_orani = PROFILLER[profil]["yazma_orani"]
+    okuma = list(OKUMA_SENARYOLARI.items())
+    yazma = list(YAZMA_SENARYOLARI.items())
+    kayitlar = {ad: ([], [0], [0]) for ad in {**OKUMA_SENARYOLARI, **YAZMA_SENARYOLARI}}
+    kalan = [istek_sayisi]
+    bitis = time.perf_counter() + sure
+
+    def sec():
+        senaryolar = yazma if baglam.rastgele.random() < yazma_orani else okuma
+        return baglam.rastgele.choices(senaryolar, weights=[a for _, (a, _) in senaryolar])[0]
+
+    async def isci():
+        while time.perf_counter() < bitis:
+            if kalan[0] is not None:
+                if kalan[0] <= 0:
+                    return
+                kalan[0] -= 1
+            ad, (_, senaryo) = sec()
+            sureler, hatalar, istemci_hatalari = kayitlar[ad]
+            basla = time.perf_counter()
+            try:
+                res = await senaryo(istemci, baglam)
+                durum = res.status_code
+            except httpx.HTTPError:
+                durum = 599
+            sureler.append(time.perf_counter() - basla)
+            if durum >= 500:
+                hatalar[0] += 1
+            elif durum >= 400 and durum != 404:
+                istemci_hatalari[0] += 1
+
+    basla = time.perf_counter()
+    await asyncio.gather(*(isci() for _ in range(eszamanli)))
+    gecen = time.perf_counter() - basla
+
+    senaryolar = {ad: ozetle(s, h[0], ih[0], gecen) for ad, (s, h, ih) in kayitlar.items() if s}
+    tum = [x for s, _, _ in kayitlar.values() for x in s]
+    toplam = ozetle(tum, sum(h[0] for _, h, _ in kayitlar.values()),
+                    sum(ih[0] for _, _, ih in kayitlar.values()), gecen)
+    return {"toplam": toplam, "senaryolar": senaryolar, "sure_sn": round(gecen, 3)}
+
+
+async def _en_buyuk_id(istemci: httpx.AsyncClient, yol: str) -> int:
+    res = await istemci.get(yol, params={"siralama": "-id", "limit": 1})
+    res.raise_for_status()
+    kayitlar = res.json()
+    if not kayitlar:
+        raise SystemExit(f"{yol} boş; önce veri yükleyin (python seed.py --kitap ... --odunc ...)")
+    return kayitlar[0]["id"]
+
+
+async def _baglam_kur(istemci: httpx.AsyncClient, tohum: int) -> Baglam:
+    return Baglam(
+        kitap=await _en_buyuk_id(istemci, "/api/kitaplar/"),
+        yazar=await _en_buyuk_id(istemci, "/api/yazarlar/"),
+        kullanici=await _en_buyuk_id(istemci, "/api/kullanicilar/"),
+        tohum=tohum,
+    )
+
+
+def _git_surumu() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "bilinmiyor"
+
+
+def _tablo(sonuc: dict):
+    print(f"{'senaryo':>26} | {'istek':>7} | {'rps':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'5xx':>4}")
+    satirlar = sorted(sonuc["senaryolar"].items()) + [("TOPLAM", sonuc["toplam"])]
+    for ad, s in satirlar:
+        print(f"{ad:>26} | {s['istek']:>7} | {s['rps']:>8.1f} | {s['p50_ms']:>8.2f} | {s['p95_ms']:>8.2f} | "
+              f"{s['p99_ms']:>8.2f} | {s['hata_5xx']:>4}")
+
+
+def karsilastir(onceki: dict, sonraki: dict, esik: float) -> list:
+    """p95'i `esik` oranından fazla artan ya da RPS'i fazla düşen senaryoların açıklamaları."""
+    gerilemeler = []
+    print(f"{'senaryo':>26} | {'p95 önce':>9} | {'p95 sonra':>9} | {'fark':>7} | {'rps fark':>8}")
+    tumu = [("TOPLAM", onceki["toplam"], sonraki["toplam"])] + [
+        (ad, onceki["senaryolar"][ad], s) for ad, s in sorted(sonraki["senaryolar"].items())
+        if ad in onceki["senaryolar"]
+    ]
+    for ad, a, b in tumu:
+        p95_fark = (b["p95_ms"] - a["p95_ms"]) / a["p95_ms"] if a["p95_ms"] else 0.0
+        rps_fark = (b["rps"] - a["rps"]) / a["rps"] if a["rps"] else 0.0
+        isaret = ""
+        if p95_fark > esik or rps_fark < -esik:
+            isaret = "  <-- gerileme"
+            gerilemeler.append(f"{ad}: p95 {p95_fark:+.1%}, rps {rps_fark:+.1%}")
+        print(f"{ad:>26} | {a['p95_ms']:>9.2f} | {b['p95_ms']:>9.2f} | {p95_fark:>+7.1%} | {rps_fark:>+8.1%}{isaret}")
+    return gerilemeler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KutuphaneAPI yük testi")
+    parser.add_argument("--url", help="Çalışan sunucu adresi; verilmezse uygulama süreç içinde çalıştırılır")
+    parser.add_argument("--profil", choices=sorted(PROFILLER), default="karisik")
+    parser.add_argument("--eszamanli", type=int, default=16, help="Eşzamanlı istemci sayısı")
+    parser.add_argument("--sure", type=float, default=20.0, help="Saniye")
+    parser.add_argument("--istek", type=int, help="Toplam istek sayısı (süreden önce biterse durur)")
+    parser.add_argument("--isinma", type=float, default=2.0, help="Ölçüm öncesi ısınma süresi (sn)")
+    parser.add_argument("--tohum", type=int, default=42)
+    parser.add_argument("--kitap", type=int, default=50_000, help="Süreç içi modda sentetik kitap sayısı")
+    parser.add_argument("--odunc", type=int, default=500_000, help="Süreç içi modda sentetik ödünç sayısı")
+    parser.add_argument("--kullanici", type=int, default=5_000)
+    parser.add_argument("--yazar", type=int, default=1_000)
+    parser.add_argument("--cikti", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--karsilastir", nargs=2, metavar=("ONCEKI", "SONRAKI"), help="İki JSON sonucunu karşılaştır")
+    parser.add_argument("--esik", type=float, default=0.10, help="Gerileme eşiği (oran)")
+    args = parser.parse_args(argv)
+
+    if args.karsilastir:
+        with open(args.karsilastir[0], encoding="utf-8") as f1, open(args.karsilastir[1], encoding="utf-8") as f2:
+            gerilemeler = karsilastir(json.load(f1), json.load(f2), args.esik)
+        if gerilemeler:
+            print("\nGerileme:\n  " + "\n  ".join(gerilemeler))
+            return 1
+        return 0
+
+    klasor = None
+    if args.url:
+        istemci = httpx.AsyncClient(base_url=args.url, timeout=30)
+        ortam = {"mod": "sunucu", "url": args.url}
+    else:
+        # Uygulama modülleri engine'i import sırasında kurduğu için ortam önceden ayarlanmalı
+        klasor = tempfile.mkdtemp(prefix="kutuphane_yuk_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(klasor, 'yuk.db')}"
+        os.environ["SEMA_KONTROLU"] = "kapali"
+        import seed
+        from app.main import app
+
+        print(f"Sentetik veri yükleniyor: kitap={args.kitap}, ödünç={args.odunc} ...")
+        basla = time.perf_counter()
+        seed.sifirla()
+        seed.sentetik_yukle(seed.engine, yazar=args.yazar, kitap=args.kitap, kullanici=args.kullanici,
+                            odunc=args.odunc, tohum=args.tohum)
+        print(f"Yükleme {time.perf_counter() - basla:.1f} sn sürdü.")
+        istemci = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://yuk-testi", timeout=30)
+        ortam = {"mod": "surec_ici", "kitap": args.kitap, "odunc": args.odunc, "kullanici": args.kullanici,
+                 "yazar": args.yazar}
+
+    async def kos():
+        async with istemci:
+            baglam = await _baglam_kur(istemci, args.tohum)
+            if args.isinma > 0:
+                await calistir(istemci, baglam, args.profil, args.eszamanli, args.isinma)
+            return await calistir(istemci, baglam, args.profil, args.eszamanli, args.sure, args.istek)
+
+    try:
+        sonuc = asyncio.run(kos())
+    finally:
+        if klasor is not None:
+            from app.database import engine
+            engine.dispose()
+            for dosya in os.listdir(klasor):
+                os.remove(os.path.join(klasor, dosya))
+            os.rmdir(klasor)
+
+    sonuc = {
+        "commit": _git_surumu(),
+        "zaman": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "profil": args.profil,
+        "eszamanli": args.eszamanli,
+        "ortam": {**ortam, "python": platform.python_version(), "platform": platform.platform()},
+        **sonuc,
+    }
+    _tablo(sonuc)
+    if args.cikti:
+        with open(args.cikti, "w", encoding="utf-8") as f:
+            json.dump(sonuc, f, ensure_ascii=False, indent=2)
+        print(f"\nSonuç {args.cikti} dosyasına yazıldı.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app import models  # noqa: F401  (tabloların metadata'ya kaydı için)
+from app.database import Base, SQLALCHEMY_DATABASE_URL, motor_olustur
+from app.migrasyon import autogenerate_filtresi, yabanci_anahtarlar_kapali
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("loglama", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+url = config.get_main_option("sqlalchemy.url") or SQLALCHEMY_DATABASE_URL
+
+
+def _ayarla(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        # SQLite ALTER TABLE'ı kısıtlı; sütun değişiklikleri tabloyu kopyalayarak yapılır
+        render_as_batch=True,
+        include_name=autogenerate_filtresi,
+        **kwargs,
+    )
+
+
+def run_migrations_offline():
+    _ayarla(url=url, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # Testler ve app.migrasyon hazır bir bağlantı verebilir
+    baglanti = config.attributes.get("connection")
+    if baglanti is not None:
+        _ayarla(connection=baglanti)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    engine = motor_olustur(url)
+    with engine.connect() as baglanti, yabanci_anahtarlar_kapali(baglanti):
+        _ayarla(connection=baglanti)
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,82 @@
+"""İlk şema: yazarlar, kategoriler, kitaplar, kullanıcılar, ödünç kayıtları
+
+Migrasyonlardan önce create_all ile kurulmuş veritabanları bu sürümle
+damgalanır (bkz. app.migrasyon).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "yazarlar",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ad", sa.String(), nullable=False),
+        sa.Column("soyad", sa.String(), nullable=False),
+        sa.Column("biyografi", sa.String(), nullable=True),
+    )
+    op.create_index("ix_yazarlar_id", "yazarlar", ["id"])
+    op.create_index("ix_yazarlar_ad", "yazarlar", ["ad"])
+    op.create_index("ix_yazarlar_soyad", "yazarlar", ["soyad"])
+
+    op.create_table(
+        "kategoriler",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ad", sa.String(), nullable=False),
+    )
+    op.create_index("ix_kategoriler_id", "kategoriler", ["id"])
+    op.create_index("ix_kategoriler_ad", "kategoriler", ["ad"], unique=True)
+
+    op.create_table(
+        "kitaplar",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("baslik", sa.String(), nullable=False),
+        sa.Column("isbn", sa.String(), nullable=False),
+        sa.Column("yayin_yili", sa.Integer(), nullable=True),
+        sa.Column("yazar_id", sa.Integer(), sa.ForeignKey("yazarlar.id"), nullable=True),
+        sa.Column("kategori_id", sa.Integer(), sa.ForeignKey("kategoriler.id"), nullable=True),
+    )
+    op.create_index("ix_kitaplar_id", "kitaplar", ["id"])
+    op.create_index("ix_kitaplar_baslik", "kitaplar", ["baslik"])
+    op.create_index("ix_kitaplar_isbn", "kitaplar", ["isbn"], unique=True)
+
+    op.create_table(
+        "kullanicilar",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ad", sa.String(), nullable=False),
+        sa.Column("soyad", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("aktif_mi", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_kullanicilar_id", "kullanicilar", ["id"])
+    op.create_index("ix_kullanicilar_ad", "kullanicilar", ["ad"])
+    op.create_index("ix_kullanicilar_soyad", "kullanicilar", ["soyad"])
+    op.create_index("ix_kullanicilar_email", "kullanicilar", ["email"], unique=True)
+
+    op.create_table(
+        "odunc_kayitlari",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kullanici_id", sa.Integer(), sa.ForeignKey("kullanicilar.id"), nullable=True),
+        sa.Column("kitap_id", sa.Integer(), sa.ForeignKey("kitaplar.id"), nullable=True),
+        sa.Column("alis_tarihi", sa.Date(), nullable=False),
+        sa.Column("teslim_tarihi", sa.Date(), nullable=True),
+    )
+    op.create_index("ix_odunc_kayitlari_id", "odunc_kayitlari", ["id"])
+
+
+def downgrade():
+    op.drop_table("odunc_kayitlari")
+    op.drop_table("kullanicilar")
+    op.drop_table("kitaplar")
+    op.drop_table("kategoriler")
+    op.drop_table("yazarlar")
@@ -0,0 +1,127 @@
+"""Performans nesneleri: açık ödünç ve geçmiş indeksleri, değişiklik sayaçları, FTS5 arama
+
+Migrasyonlar gelmeden önce create_all ile kurulmuş veritabanlarında bu nesnelerin
+bir kısmı zaten olabilir; bu yüzden her adım "yoksa oluştur" şeklinde.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+IZLENEN_TABLOLAR = ("yazarlar", "kategoriler", "kitaplar", "kullanicilar", "odunc_kayitlari")
+OLAYLAR = ("INSERT", "UPDATE", "DELETE")
+
+
+def _sayac_trigger(tablo, olay):
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{tablo}_{olay.lower()}_sayac AFTER {olay} ON {tablo}
+        BEGIN
+            INSERT INTO degisiklik_sayaclari (tablo, surum, degisme_zamani)
+            VALUES ('{tablo}', 1, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+            ON CONFLICT(tablo) DO UPDATE SET surum = surum + 1, degisme_zamani = excluded.degisme_zamani;
+        END
+    """
+
+
+def _tr_katla(ifade):
+    return f"replace(replace({ifade}, 'İ', 'i'), 'I', 'ı')"
+
+
+_YAZAR_ADI = "coalesce((SELECT ad || ' ' || soyad FROM yazarlar WHERE id = NEW.yazar_id), '')"
+
+ARAMA_TRIGGERLARI = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_kitaplar_ara_ekle AFTER INSERT ON kitaplar
+    BEGIN
+        INSERT INTO kitap_ara (rowid, baslik, yazar)
+        VALUES (NEW.id, {_tr_katla("NEW.baslik")}, {_tr_katla(_YAZAR_ADI)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_kitaplar_ara_guncelle AFTER UPDATE OF baslik, yazar_id ON kitaplar
+    BEGIN
+        UPDATE kitap_ara SET baslik = {_tr_katla("NEW.baslik")}, yazar = {_tr_katla(_YAZAR_ADI)}
+        WHERE rowid = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_kitaplar_ara_sil AFTER DELETE ON kitaplar
+    BEGIN
+        DELETE FROM kitap_ara WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_yazarlar_ara_guncelle AFTER UPDATE OF ad, soyad ON yazarlar
+    BEGIN
+        UPDATE kitap_ara SET yazar = {_tr_katla("NEW.ad || ' ' || NEW.soyad")}
+        WHERE rowid IN (SELECT id FROM kitaplar WHERE yazar_id = NEW.id);
+    END
+    """,
+]
+ARAMA_TRIGGER_ADLARI = (
+    "trg_kitaplar_ara_ekle", "trg_kitaplar_ara_guncelle", "trg_kitaplar_ara_sil", "trg_yazarlar_ara_guncelle",
+)
+
+
+def upgrade():
+    # Bir kitabın aynı anda tek açık ödüncü olabilir. Eski veride aynı kitap için
+    # birden fazla açık kayıt varsa bu adım hata verir; önce veri düzeltilmeli.
+    op.create_index("ux_odunc_acik_kitap", "odunc_kayitlari", ["kitap_id"], unique=True,
+                    sqlite_where=sa.text("teslim_tarihi IS NULL"), if_not_exists=True)
+    op.create_index("ix_odunc_kitap_teslim", "odunc_kayitlari", ["kitap_id", "teslim_tarihi"],
+                    if_not_exists=True)
+    op.create_index("ix_odunc_kullanici_alis", "odunc_kayitlari", ["kullanici_id", "alis_tarihi"],
+                    if_not_exists=True)
+    op.create_index("ix_odunc_acik_kullanici", "odunc_kayitlari", ["kullanici_id"],
+                    sqlite_where=sa.text("teslim_tarihi IS NULL"), if_not_exists=True)
+
+    op.create_table(
+        "degisiklik_sayaclari",
+        sa.Column("tablo", sa.String(), primary_key=True),
+        sa.Column("surum", sa.Integer(), nullable=False),
+        sa.Column("degisme_zamani", sa.String(), nullable=False),
+        if_not_exists=True,
+    )
+    for tablo in IZLENEN_TABLOLAR:
+        for olay in OLAYLAR:
+            op.execute(_sayac_trigger(tablo, olay))
+
+    bind = op.get_bind()
+    arama_var = bind.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'kitap_ara'"
+    ).first() is not None
+    op.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS kitap_ara
+        USING fts5(baslik, yazar, tokenize = 'unicode61 remove_diacritics 0')
+    """)
+    for sql in ARAMA_TRIGGERLARI:
+        op.execute(sql)
+    if not arama_var:
+        # Mevcut kitaplar triggerlardan önce eklendi, arama tablosuna bir kez kopyalanır
+        op.execute(f"""
+            INSERT INTO kitap_ara (rowid, baslik, yazar)
+            SELECT k.id, {_tr_katla("k.baslik")}, {_tr_katla("coalesce(y.ad || ' ' || y.soyad, '')")}
+            FROM kitaplar k LEFT JOIN yazarlar y ON y.id = k.yazar_id
+        """)
+
+
+def downgrade():
+    for ad in ARAMA_TRIGGER_ADLARI:
+        op.execute(f"DROP TRIGGER IF EXISTS {ad}")
+    op.execute("DROP TABLE IF EXISTS kitap_ara")
+    for tablo in IZLENEN_TABLOLAR:
+        for olay in OLAYLAR:
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{tablo}_{olay.lower()}_sayac")
+    op.drop_table("degisiklik_sayaclari")
+    op.drop_index("ix_odunc_acik_kullanici", table_name="odunc_kayitlari")
+    op.drop_index("ix_odunc_kullanici_alis", table_name="odunc_kayitlari")
+    op.drop_index("ix_odunc_kitap_teslim", table_name="odunc_kayitlari")
+    op.drop_index("ux_odunc_acik_kitap", table_name="odunc_kayitlari")
@@ -0,0 +1,45 @@
+"""Kitap ve kullanıcı tablolarına ödünç sayaçları
+
+Sütunlar eklendikten sonra mevcut ödünç kayıtlarından doldurulur.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("kitaplar", sa.Column("odunc_acik", sa.Boolean(), nullable=False, server_default="0"))
+    op.add_column("kitaplar", sa.Column("toplam_odunc", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("kitaplar", sa.Column("son_odunc_tarihi", sa.Date(), nullable=True))
+    op.add_column("kullanicilar", sa.Column("acik_odunc_sayisi", sa.Integer(), nullable=False, server_default="0"))
+
+    op.execute("""
+        UPDATE kitaplar SET
+            odunc_acik = EXISTS (SELECT 1 FROM odunc_kayitlari o
+                                 WHERE o.kitap_id = kitaplar.id AND o.teslim_tarihi IS NULL),
+            toplam_odunc = (SELECT count(*) FROM odunc_kayitlari o WHERE o.kitap_id = kitaplar.id),
+            son_odunc_tarihi = (SELECT max(o.alis_tarihi) FROM odunc_kayitlari o WHERE o.kitap_id = kitaplar.id)
+    """)
+    op.execute("""
+        UPDATE kullanicilar SET
+            acik_odunc_sayisi = (SELECT count(*) FROM odunc_kayitlari o
+                                 WHERE o.kullanici_id = kullanicilar.id AND o.teslim_tarihi IS NULL)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table("kullanicilar") as batch:
+        batch.drop_column("acik_odunc_sayisi")
+    with op.batch_alter_table("kitaplar") as batch:
+        batch.drop_column("son_odunc_tarihi")
+        batch.drop_column("toplam_odunc")
+        batch.drop_column("odunc_acik")
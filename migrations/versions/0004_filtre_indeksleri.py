@@ -0,0 +1,27 @@
+"""Liste filtreleri ve sıralamaları için indeksler
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_kitaplar_yazar_id", "kitaplar", ["yazar_id"])
+    op.create_index("ix_kitaplar_kategori_id", "kitaplar", ["kategori_id"])
+    op.create_index("ix_kitaplar_yayin_yili", "kitaplar", ["yayin_yili"])
+    op.create_index("ix_odunc_kayitlari_alis_tarihi", "odunc_kayitlari", ["alis_tarihi"])
+
+
+def downgrade():
+    op.drop_index("ix_odunc_kayitlari_alis_tarihi", table_name="odunc_kayitlari")
+    op.drop_index("ix_kitaplar_yayin_yili", table_name="kitaplar")
+    op.drop_index("ix_kitaplar_kategori_id", table_name="kitaplar")
+    op.drop_index("ix_kitaplar_yazar_id", table_name="kitaplar")
@@ -0,0 +1,71 @@
+"""Foreign key'lere ON DELETE CASCADE / SET NULL
+
+Yazar, kitap ve kullanıcı silmelerinde bağlı satırları artık veritabanı siliyor.
+SQLite var olan bir foreign key'i değiştiremediği için kitaplar ve odunc_kayitlari
+tabloları kopyalanarak yeniden kuruluyor. Tablo düşünce triggerları da gittiği için
+önce saklanıp sonra aynen geri kuruluyor. Migrasyon foreign key zorlaması kapalıyken
+çalışır (bkz. app.migrasyon.yabanci_anahtarlar_kapali); eski tablonun DROP'u cascade
+tetiklemez.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+TABLOLAR = ("kitaplar", "odunc_kayitlari")
+
+
+def _foreign_keyler(ondelete):
+    return {
+        "kitaplar": [
+            sa.Column("yazar_id", sa.Integer(), sa.ForeignKey("yazarlar.id", ondelete=ondelete["yazar"])),
+            sa.Column("kategori_id", sa.Integer(),
+                      sa.ForeignKey("kategoriler.id", ondelete=ondelete["kategori"]), nullable=True),
+        ],
+        "odunc_kayitlari": [
+            sa.Column("kullanici_id", sa.Integer(), sa.ForeignKey("kullanicilar.id", ondelete=ondelete["odunc"])),
+            sa.Column("kitap_id", sa.Integer(), sa.ForeignKey("kitaplar.id", ondelete=ondelete["odunc"])),
+        ],
+    }
+
+
+def _yeniden_kur(ondelete):
+    bind = op.get_bind()
+    # Yeniden kurulan tablolara bağlı ya da onları anan triggerlar (ör. trg_yazarlar_ara_guncelle);
+    # RENAME sırasında var olmayan bir tabloyu anan trigger hata verir
+    triggerlar = bind.exec_driver_sql(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' ORDER BY name"
+    ).all()
+    triggerlar = [(ad, sql) for ad, sql in triggerlar if any(t in sql for t in TABLOLAR)]
+    for ad, _ in triggerlar:
+        op.execute(f"DROP TRIGGER {ad}")
+
+    sutunlar = _foreign_keyler(ondelete)
+    for tablo in TABLOLAR:
+        # Verilen sütunların yansıtılan foreign key'leri atlanır, yerlerine bunlar kurulur
+        with op.batch_alter_table(tablo, recreate="always", reflect_args=sutunlar[tablo]):
+            pass
+
+    for _, sql in triggerlar:
+        op.execute(sql)
+
+    kopuk = bind.exec_driver_sql("PRAGMA foreign_key_check").all()
+    if kopuk:
+        # Zorlama kapalıyken yazılmış, var olmayan bir satırı gösteren kayıtlar
+        raise RuntimeError(f"Karşılığı olmayan foreign key'ler var, önce veri düzeltilmeli: {kopuk[:10]}")
+
+
+def upgrade():
+    _yeniden_kur({"yazar": "CASCADE", "kategori": "SET NULL", "odunc": "CASCADE"})
+
+
+def downgrade():
+    _yeniden_kur({"yazar": None, "kategori": None, "odunc": None})
@@ -12,6 +12,9 @@ if not exist "venv" (
     call venv\Scripts\activate
 )
 
+echo Veritabani guncelleniyor...
+python -m app.migrasyon
+
 echo Uygulama baslatiliyor...
 uvicorn app.main:app --reload
 pause
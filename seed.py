@@ -1,17 +1,184 @@
-from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine, Base
-from app import models
+"""
+Veritabanını sıfırdan kurup örnek ya da sentetik veriyle doldurur.
+
+    python seed.py                                             # birkaç örnek kayıt
+    python seed.py --kitap 1000000 --odunc 10000000            # yük testleri için sentetik veri
+    python seed.py --yazar 50000 --kullanici 200000 --odunc 1000000 --acik-oran 0.2 --tohum 7
+
+Sentetik yükleme hızlı olsun diye:
+- satırlar ORM nesnesi yerine tuple olarak üretilir ve tablo metadata'sından kurulan tek bir
+  INSERT ile sürücünün executemany'sine akıtılır (bellekte biriktirilmez),
+- yükleme boyunca journal ve fsync kapalı, cache büyük, foreign key kontrolü kapalıdır,
+- yüklenen tabloların ikincil indeksleri ve triggerları önce kaldırılıp veri girdikten sonra
+  bir kerede yeniden kurulur; arama tablosu, ödünç sayaçları ve değişiklik sayaçları da
+  satır satır değil, yükleme sonunda tek sorguyla doldurulur.
+
+Journal kapalı olduğu için yükleme yarıda kesilirse veritabanı bozulabilir; komutu yeniden çalıştırın.
+"""
+import argparse
+import itertools
+import random
+import time
 from datetime import date, timedelta
 
-# Veritabanı tablolarını sıfırdan oluştur (Temiz başlangıç için)
-Base.metadata.drop_all(bind=engine)
-Base.metadata.create_all(bind=engine)
+from sqlalchemy import text
+
+from app.database import SessionLocal, engine, Base
+from app import models, migrasyon, sayaclar, utils  # noqa: F401  (sayaclar: ödünç sayaçlarını günceller)
+
+# executemany'ye verilen parça; sadece ilerleme raporu için, transaction tek
+PARTI_BOYUTU = 1_000_000
+
+# Yükleme süresince bağlantıya uygulanan pragmalar (sonra eski değerlerine döner)
+YUKLEME_PRAGMALARI = {
+    "journal_mode": "OFF",
+    "synchronous": "OFF",
+    "cache_size": -262144,      # 256 MB
+    "temp_store": "MEMORY",
+    "foreign_keys": "OFF",
+}
+
+KELIMELER = [
+    "Kürk", "Mantolu", "Madonna", "Saatleri", "Ayarlama", "Enstitüsü", "Suç", "Ceza", "Hayvan", "Çiftliği",
+    "İnce", "Memed", "Kuyucaklı", "Yusuf", "Huzur", "Tutunamayanlar", "Beyaz", "Kale", "Masumiyet", "Müzesi",
+    "Yaban", "Çalıkuşu", "Sefiller", "Şeker", "Portakalı", "Dönüşüm", "Yüzyıllık", "Yalnızlık", "Serenad", "Aşk",
+]
+ADLAR = ["Ali", "Ayşe", "Mehmet", "Fatma", "Zeynep", "Mustafa", "Elif", "Emre", "İlber", "Işıl", "Çağla", "Ömer"]
+SOYADLAR = ["Yılmaz", "Demir", "Kaya", "Çelik", "Şahin", "Öztürk", "Aydın", "Arslan", "Doğan", "Kılıç"]
+
+# Ödünçlerin alış tarihleri bugünden en fazla bu kadar gün geriye yayılır
+ODUNC_GUN_ARALIGI = 5 * 365
+
+def sifirla():
+    """Veritabanı tablolarını sıfırdan oluşturur (temiz başlangıç için)."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # Şema modellerden kuruldu, migrasyonlar açısından son sürümde sayılır
+    migrasyon.damgala(engine)
+
+def _insert_sql(model, sutunlar):
+    tablo = model.__table__
+    return f"INSERT INTO {tablo.name} ({', '.join(sutunlar)}) VALUES ({', '.join('?' * len(sutunlar))})"
+
+def _yaz(cursor, model, sutunlar, satirlar, adet, ilerleme):
+    """Satır üretecini parça parça executemany'ye verir."""
+    sql = _insert_sql(model, sutunlar)
+    basla, yazilan = time.perf_counter(), 0
+    while yazilan < adet:
+        parca = min(PARTI_BOYUTU, adet - yazilan)
+        cursor.executemany(sql, itertools.islice(satirlar, parca))
+        yazilan += parca
+        ilerleme(f"  {model.__tablename__}: {yazilan:,}/{adet:,}  ({yazilan / (time.perf_counter() - basla):,.0f} satır/sn)")
+
+def _indeks_ve_triggerlari_kaldir(conn, tablolar) -> list:
+    """Tabloların ikincil indekslerini ve triggerlarını siler, yeniden kurmak için DDL'lerini döner."""
+    yer = ", ".join(f"'{t}'" for t in tablolar)
+    nesneler = conn.exec_driver_sql(
+        f"SELECT type, name, sql FROM sqlite_master WHERE tbl_name IN ({yer}) "
+        "AND type IN ('index', 'trigger') AND sql IS NOT NULL"  # UNIQUE kısıtlarının otomatik indeksleri kalır
+    ).all()
+    for tur, ad, _ in nesneler:
+        conn.exec_driver_sql(f"DROP {tur.upper()} {ad}")
+    return nesneler
+
+def sentetik_yukle(hedef_engine, yazar=1000, kategori=20, kitap=100_000, kullanici=10_000, odunc=1_000_000,
+                   acik_oran=0.1, tohum=42, ilerleme=lambda mesaj: None):
+    """
+    Boş bir şemaya verilen sayıda sentetik kayıt ekler. Ödünçlerin çoğu teslim edilmiş;
+    kitapların yaklaşık `acik_oran` kadarında tek bir açık ödünç var (kısmi unique indeks
+    kitap başına en fazla bir açık ödünce izin veriyor). Id'ler 1'den başlar.
+    """
+    r = random.Random(tohum).random
+    bugun = date.today()
+    # Tarihleri her satırda hesaplamak yerine gün farkından metne hazır tablo
+    gunler = [(bugun - timedelta(days=i)).isoformat() for i in range(ODUNC_GUN_ARALIGI + 31)]
+    acik = min(int(kitap * acik_oran), odunc)
+
+    def kategoriler():
+        return ((i, f"Kategori {i}") for i in range(1, kategori + 1))
+
+    def yazarlar():
+        for i in range(1, yazar + 1):
+            yield i, ADLAR[int(r() * len(ADLAR))], SOYADLAR[int(r() * len(SOYADLAR))]
 
-db = SessionLocal()
+    def kitaplar():
+        n = len(KELIMELER)
+        for i in range(1, kitap + 1):
+            baslik = f"{KELIMELER[int(r() * n)]} {KELIMELER[int(r() * n)]} {KELIMELER[int(r() * n)]}"
+            yield (i, baslik, utils.isbn_uret(i), 1850 + int(r() * (bugun.year - 1849)),
+                   1 + int(r() * yazar), 1 + int(r() * kategori))
 
-def veri_ekle():
+    def kullanicilar():
+        for i in range(1, kullanici + 1):
+            yield i, ADLAR[int(r() * len(ADLAR))], SOYADLAR[int(r() * len(SOYADLAR))], f"kullanici{i}@ornek.com", 1
+
+    def odunc_kayitlari():
+        # Teslim edilmişler: alış 30 günden eski, teslim 1-30 gün sonra
+        for i in range(1, odunc - acik + 1):
+            alis = 30 + int(r() * ODUNC_GUN_ARALIGI)
+            yield i, 1 + int(r() * kullanici), 1 + int(r() * kitap), gunler[alis], gunler[alis - 1 - int(r() * 29)]
+        # Açık ödünçler: her biri farklı bir kitapta, son 30 gün içinde alınmış
+        adim = kitap / acik if acik else 0
+        for j in range(acik):
+            yield (odunc - acik + 1 + j, 1 + int(r() * kullanici), 1 + int(j * adim), gunler[int(r() * 30)], None)
+
+    tablolar = ("kategoriler", "yazarlar", "kitaplar", "kullanicilar", "odunc_kayitlari")
+    with hedef_engine.connect() as conn:
+        onceki = {ad: conn.exec_driver_sql(f"PRAGMA {ad}").scalar() for ad in YUKLEME_PRAGMALARI}
+        for ad, deger in YUKLEME_PRAGMALARI.items():
+            conn.exec_driver_sql(f"PRAGMA {ad}={deger}")
+        conn.commit()
+        try:
+            nesneler = _indeks_ve_triggerlari_kaldir(conn, tablolar)
+            cursor = conn.connection.dbapi_connection.cursor()
+            _yaz(cursor, models.Kategori, ("id", "ad"), kategoriler(), kategori, ilerleme)
+            _yaz(cursor, models.Yazar, ("id", "ad", "soyad"), yazarlar(), yazar, ilerleme)
+            _yaz(cursor, models.Kitap, ("id", "baslik", "isbn", "yayin_yili", "yazar_id", "kategori_id"),
+                 kitaplar(), kitap, ilerleme)
+            _yaz(cursor, models.Kullanici, ("id", "ad", "soyad", "email", "aktif_mi"), kullanicilar(), kullanici,
+                 ilerleme)
+            _yaz(cursor, models.OduncKayit, ("id", "kullanici_id", "kitap_id", "alis_tarihi", "teslim_tarihi"),
+                 odunc_kayitlari(), odunc, ilerleme)
+            cursor.close()
+
+            basla = time.perf_counter()
+            for tur, _, sql in nesneler:
+                if tur == "index":
+                    conn.exec_driver_sql(sql)
+            ilerleme(f"  indeksler kuruldu ({time.perf_counter() - basla:.1f} sn)")
+            # Triggerlar henüz yokken: sayaç güncellemeleri satır başına trigger çalıştırmasın
+            basla = time.perf_counter()
+            sayaclar.kitaplari_yeniden_hesapla(conn)
+            sayaclar.kullanicilari_yeniden_hesapla(conn)
+            yazar_adi = "coalesce(y.ad || ' ' || y.soyad, '')"
+            conn.execute(text(
+                "INSERT INTO kitap_ara (rowid, baslik, yazar) "
+                f"SELECT k.id, {models._tr_katla_sql('k.baslik')}, {models._tr_katla_sql(yazar_adi)} "
+                "FROM kitaplar k LEFT JOIN yazarlar y ON y.id = k.yazar_id"
+            ))
+            for tablo in tablolar:
+                # Liste ETag'leri eskimesin: triggerların yapacağı artışı tablo başına bir kez yap
+                conn.execute(text(
+                    "INSERT INTO degisiklik_sayaclari (tablo, surum, degisme_zamani) "
+                    "VALUES (:tablo, 1, strftime('%Y-%m-%d %H:%M:%f', 'now')) "
+                    "ON CONFLICT(tablo) DO UPDATE SET surum = surum + 1, degisme_zamani = excluded.degisme_zamani"
+                ), {"tablo": tablo})
+            for tur, _, sql in nesneler:
+                if tur == "trigger":
+                    conn.exec_driver_sql(sql)
+            ilerleme(f"  sayaçlar ve arama tablosu dolduruldu ({time.perf_counter() - basla:.1f} sn)")
+            conn.commit()
+        finally:
+            for ad, deger in onceki.items():
+                conn.exec_driver_sql(f"PRAGMA {ad}={deger}")
+            conn.commit()
+        conn.exec_driver_sql("PRAGMA optimize")
+
+def veri_ekle(db):
     print("Veri girişi başlıyor...")
 
+    # Gruplar arasında sadece flush; id'ler atanır, commit en sonda bir kez
+
     # --- KATEGORİLER ---
     kategoriler = [
         models.Kategori(ad="Türk Edebiyatı"),
@@ -21,7 +188,7 @@ def veri_ekle():
         models.Kategori(ad="Kişisel Gelişim")
     ]
     db.add_all(kategoriler)
-    db.commit()
+    db.flush()
     print(f"{len(kategoriler)} kategori eklendi.")
 
     # --- YAZARLAR ---
@@ -33,7 +200,7 @@ def veri_ekle():
         models.Yazar(ad="İlber", soyad="Ortaylı", biyografi="Türk tarihçi ve yazar.")
     ]
     db.add_all(yazarlar)
-    db.commit()
+    db.flush()
     print(f"{len(yazarlar)} yazar eklendi.")
 
     # --- KİTAPLAR ---
@@ -52,7 +219,7 @@ def veri_ekle():
         models.Kitap(baslik="Bir Ömür Nasıl Yaşanır?", isbn="9786057635117", yayin_yili=2019, yazar_id=5, kategori_id=5)
     ]
     db.add_all(kitaplar)
-    db.commit()
+    db.flush()
     print(f"{len(kitaplar)} kitap eklendi.")
 
     # --- KULLANICILAR ---
@@ -62,7 +229,7 @@ def veri_ekle():
         models.Kullanici(ad="Mehmet", soyad="Kaya", email="mehmet.kaya@example.com")
     ]
     db.add_all(kullanicilar)
-    db.commit()
+    db.flush()
     print(f"{len(kullanicilar)} kullanıcı eklendi.")
 
     # --- ÖDÜNÇ KAYITLARI ---
@@ -75,15 +242,38 @@ def veri_ekle():
         models.OduncKayit(kullanici_id=3, kitap_id=4, alis_tarihi=date.today())
     ]
     db.add_all(odunc_kayitlari)
-    db.commit()
+    db.flush()
     print(f"{len(odunc_kayitlari)} ödünç kaydı eklendi.")
 
+    # Hepsi tek transaction: yarıda hata olursa veritabanı boş kalır
+    db.commit()
     print("Veri girişi başarıyla tamamlandı!")
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Veritabanını sıfırlayıp örnek ya da sentetik veriyle doldurur.")
+    for ad in ("yazar", "kategori", "kitap", "kullanici", "odunc"):
+        parser.add_argument(f"--{ad}", type=int, help=f"Sentetik {ad} sayısı")
+    parser.add_argument("--acik-oran", type=float, default=0.1, help="Açık ödüncü olan kitapların oranı")
+    parser.add_argument("--tohum", type=int, default=42, help="Rastgele üretecin tohumu")
+    args = parser.parse_args(argv)
+
+    sifirla()
+    sayilar = {ad: getattr(args, ad) for ad in ("yazar", "kategori", "kitap", "kullanici", "odunc")}
+    if any(v is not None for v in sayilar.values()):
+        verilen = {ad: v for ad, v in sayilar.items() if v is not None}
+        print("Sentetik veri yükleniyor: " + ", ".join(f"{ad}={v:,}" for ad, v in verilen.items()))
+        basla = time.perf_counter()
+        sentetik_yukle(engine, acik_oran=args.acik_oran, tohum=args.tohum, ilerleme=print, **verilen)
+        print(f"Sentetik veri {time.perf_counter() - basla:.1f} sn'de yüklendi.")
+        return
+
+    db = SessionLocal()
     try:
-        veri_ekle()
+        veri_ekle(db)
     except Exception as e:
         print(f"Hata oluştu: {e}")
     finally:
         db.close()
+
+if __name__ == "__main__":
+    main()
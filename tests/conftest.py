@@ -1,11 +1,18 @@
+import os
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# Testler şemayı create_all ile kendisi kuruyor, açılıştaki migrasyon kontrolü gereksiz
+os.environ["SEMA_KONTROLU"] = "kapali"
+
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, sql_olcumu_ekle, sqlite_pragmalari, sqlite_pragmalarini_uygula
+from app.onbellek import istatistik_onbellegi, onbellek
 
 # Test için in-memory SQLite veritabanı
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -15,8 +22,20 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+# Uygulamanın engine'i gibi foreign key'ler zorlansın ve sorgu süreleri metriklere yazılsın
+sqlite_pragmalarini_uygula(engine, sqlite_pragmalari("varsayilan"))
+sql_olcumu_ekle(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@pytest.fixture(autouse=True)
+def onbellek_temizle():
+    """Her test boş veritabanıyla başlıyor; önbellekte önceki testin id'leri kalmasın."""
+    onbellek.temizle()
+    istatistik_onbellegi.temizle()
+    yield
+    onbellek.temizle()
+    istatistik_onbellegi.temizle()
+
 @pytest.fixture(scope="function")
 def db():
     """Her test için yeni bir veritabanı oturumu oluşturur."""
@@ -41,3 +60,30 @@ def client(db):
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+
+@pytest.fixture
+def sorgu_sayaci():
+    """
+    Blok içinde çalışan SQL sorgularını sayar, sınır aşılırsa testi düşürür.
+    N+1 regresyonlarını yakalamak için:
+
+        with sorgu_sayaci(en_fazla=2):
+            client.get("/api/yazarlar/detay")
+    """
+    @contextmanager
+    def say(en_fazla):
+        sorgular = []
+
+        def kaydet(conn, cursor, statement, parameters, context, executemany):
+            sorgular.append(statement)
+
+        event.listen(engine, "before_cursor_execute", kaydet)
+        try:
+            yield sorgular
+        finally:
+            event.remove(engine, "before_cursor_execute", kaydet)
+        assert len(sorgular) <= en_fazla, (
+            f"{len(sorgular)} sorgu çalıştı, en fazla {en_fazla} bekleniyordu:\n" + "\n".join(sorgular)
+        )
+
+    return say
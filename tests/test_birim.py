@@ -1,8 +1,13 @@
+import json
 import pytest
 from datetime import date, timedelta
 from unittest.mock import MagicMock
 from sqlalchemy.orm import Session
-from app import schemas, models, utils
+from app import hizli_json, schemas, models, utils, sayfalama
+from app.filtreler import FiltreTanimi
+from app.metrikler import IstekOlcumu, Metrikler
+from app.onbellek import Onbellek
+from app.sikistirma import kodlama_sec
 from app.routers import kitaplar, yazarlar, kategoriler, kullanicilar, odunc
 from fastapi import HTTPException
 
@@ -107,27 +112,28 @@ def test_kategori_ekle_basarili(mock_db):
 
 def test_odunc_sil_bulunamadi(mock_db):
     """Olmayan ödünç kaydı silinirken 404 dönmeli"""
-    mock_db.query.return_value.filter.return_value.first.return_value = None
+    # DELETE ... RETURNING satır döndürmedi
+    mock_db.execute.return_value.first.return_value = None
     with pytest.raises(HTTPException) as exc:
         odunc.delete_odunc(id=999, db=mock_db)
     assert exc.value.status_code == 404
 
 def test_kategori_sil_basarili(mock_db):
-    """Kategori başarıyla silinmeli"""
-    mock_kategori = models.Kategori(id=1, ad="Silinecek")
-    mock_db.query.return_value.filter.return_value.first.return_value = mock_kategori
-    
+    """Kategori önce yüklenmeden tek DELETE ile silinmeli"""
     kategoriler.delete_kategori(id=1, db=mock_db)
     
-    mock_db.delete.assert_called_once_with(mock_kategori)
+    ifade = str(mock_db.execute.call_args.args[0])
+    assert ifade.startswith("DELETE FROM kategoriler") and "RETURNING kategoriler.id" in ifade
+    mock_db.query.assert_not_called()
     mock_db.commit.assert_called_once()
 
 def test_kategori_sil_bulunamadi(mock_db):
     """Olmayan kategori silinirken 404 dönmeli"""
-    mock_db.query.return_value.filter.return_value.first.return_value = None
+    mock_db.execute.return_value.first.return_value = None
     with pytest.raises(HTTPException) as exc:
         kategoriler.delete_kategori(id=999, db=mock_db)
     assert exc.value.status_code == 404
+    mock_db.commit.assert_not_called()
 
 def test_yazar_sil_basarili(mock_db):
     """Yazar başarıyla silinmeli"""
@@ -149,6 +155,32 @@ def test_kullanici_sil_basarili(mock_db):
     mock_db.delete.assert_called_once_with(mock_user)
     mock_db.commit.assert_called_once()
 
+def test_kitap_guncelle_tek_ifade(mock_db):
+    """PATCH tek bir UPDATE ... RETURNING ile yapılmalı, nesne yüklenmemeli"""
+    mock_db.execute.return_value.first.return_value = models.Kitap(
+        id=1, baslik="Yeni", isbn="111", yazar_id=1, odunc_acik=False, toplam_odunc=0,
+    )
+    result = kitaplar.update_kitap(id=1, kitap_update=schemas.KitapUpdate(baslik="Yeni"), db=mock_db)
+
+    ifade = str(mock_db.execute.call_args.args[0])
+    assert ifade.startswith("UPDATE kitaplar SET baslik=") and "RETURNING kitaplar.id" in ifade
+    mock_db.query.assert_not_called()
+    mock_db.refresh.assert_not_called()
+    assert result.baslik == "Yeni"
+
+def test_guncelle_bulunamadi(mock_db):
+    """Güncellenen satır yoksa mevcut 404'ler dönmeli"""
+    mock_db.execute.return_value.first.return_value = None
+    for guncelle, guncelleme in (
+        (lambda g: yazarlar.update_yazar(id=9, yazar_update=g, db=mock_db), schemas.YazarUpdate(ad="X")),
+        (lambda g: kullanicilar.update_kullanici(id=9, kullanici_update=g, db=mock_db), schemas.KullaniciUpdate(ad="X")),
+        (lambda g: odunc.update_odunc(id=9, odunc_update=g, db=mock_db), schemas.OduncUpdate(teslim_tarihi=date(2025, 1, 1))),
+    ):
+        with pytest.raises(HTTPException) as exc:
+            guncelle(guncelleme)
+        assert exc.value.status_code == 404
+    mock_db.commit.assert_not_called()
+
 # --- YARDIMCI FONKSİYON TESTLERİ (UTILITIES) ---
 
 def test_tarih_formatla():
@@ -169,6 +201,19 @@ def test_isbn_dogrula():
     # Checksum hatası
     assert utils.isbn_dogrula("978-975-08-0714-0") is False
 
+def test_isbn_uret():
+    assert utils.isbn_uret(316148410, onek="978") == "9783161484100"
+    uretilenler = [utils.isbn_uret(i) for i in range(1000)]
+    assert all(utils.isbn_dogrula(isbn) for isbn in uretilenler)
+    assert len(set(uretilenler)) == 1000
+
+def test_tr_katla_ve_fts_sorgusu():
+    assert utils.tr_katla("IŞIK İLBER Çağ") == "ışık ilber çağ"
+    assert utils.fts_sorgusu("Orhan  PAM") == '"orhan"* "pam"*'
+    # FTS5 operatörleri ve tırnaklar sorguya sızmamalı
+    assert utils.fts_sorgusu('a" OR -b*') == '"a"* "or"* "b"*'
+    assert utils.fts_sorgusu("  --  ") == ""
+
 def test_metin_ozeti():
     # Kısa metin
     assert utils.metin_ozeti_cikar("kısa", 10) == "kısa"
@@ -195,3 +240,133 @@ def test_dosya_boyutu():
     assert utils.dosya_boyutu_formatla(500) == "500.00 B"
     assert utils.dosya_boyutu_formatla(1024) == "1.00 KB"
     assert utils.dosya_boyutu_formatla(1024 * 1024 * 2.5) == "2.50 MB"
+
+# --- FİLTRELER ---
+
+def test_filtre_tanimi_modeli_dogrulamali():
+    with pytest.raises(ValueError, match="alanı yok"):
+        FiltreTanimi(models.Kitap, esit=("yazar",))
+    # biyografi indekssiz, sıralamaya izin verilmemeli
+    with pytest.raises(ValueError, match="indeksli değil"):
+        FiltreTanimi(models.Yazar, siralanabilir=("biyografi",))
+    # teslim_tarihi sadece bileşik/kısmi indekslerde, tek başına sıralanamaz
+    with pytest.raises(ValueError, match="indeksli değil"):
+        FiltreTanimi(models.OduncKayit, siralanabilir=("teslim_tarihi",))
+
+def test_filtre_kosul_ve_siralama():
+    tanim = FiltreTanimi(models.Kitap, esit=("yazar_id",), aralik=("yayin_yili",), siralanabilir=("id", "baslik"))
+    filtre = tanim(yazar_id=3, yayin_yili_min=1950, yayin_yili_max=None, siralama="-baslik")
+    assert [str(k) for k in filtre.kosullar] == ["kitaplar.yazar_id = :yazar_id_1", "kitaplar.yayin_yili >= :yayin_yili_1"]
+    assert [str(s) for s in filtre.siralama] == ["kitaplar.baslik DESC", "kitaplar.id DESC"]
+
+    with pytest.raises(HTTPException) as hata:
+        tanim(siralama="isbn")
+    assert hata.value.status_code == 400
+
+    # Parametresiz filtre sorguya dokunmamalı
+    sorgu = MagicMock()
+    assert tanim().uygula(sorgu) is sorgu
+    sorgu.filter.assert_not_called()
+
+# --- SAYFALAMA ---
+
+def test_cursor_gidis_donus():
+    """Cursor çözüldüğünde aynı id geri gelmeli"""
+    cursor = sayfalama.cursor_olustur(1234)
+    assert sayfalama.cursor_coz(cursor) == 1234
+
+def test_cursor_bozuk():
+    """Bozuk cursor 400 dönmeli"""
+    with pytest.raises(HTTPException) as exc:
+        sayfalama.cursor_coz("bozuk-cursor!")
+    assert exc.value.status_code == 400
+
+# --- ÖNBELLEK ---
+
+def test_onbellek_lru_tahliye():
+    """Kapasite aşılınca en uzun süredir kullanılmayan kayıt düşmeli"""
+    ob = Onbellek(boyut=2)
+    ob.koy("a", 1)
+    ob.koy("b", 2)
+    ob.getir("a")
+    ob.koy("c", 3)
+    assert ob.getir("b") is None
+    assert ob.getir("a") == 1
+    assert ob.getir("c") == 3
+
+def test_onbellek_ttl():
+    """Süresi dolan kayıt ıska sayılmalı"""
+    simdi = [0.0]
+    ob = Onbellek(boyut=10, ttl=5, saat=lambda: simdi[0])
+    ob.koy("a", 1)
+    simdi[0] = 4.9
+    assert ob.getir("a") == 1
+    simdi[0] = 5.1
+    assert ob.getir("a") is None
+    assert ob.istatistik()["isabet"] == 1
+    assert ob.istatistik()["iska"] == 1
+
+def test_onbellek_yukleme_sirasinda_gecersiz_kilma():
+    """Yükleme sürerken kayıt geçersiz kılınırsa eski değer önbelleğe yazılmamalı"""
+    ob = Onbellek()
+
+    def yukle():
+        ob.sil(("kitap", 1))  # yükleme sırasında başka bir istek güncelleme yaptı
+        return "eski"
+
+    assert ob.getir_veya_yukle(("kitap", 1), yukle) == "eski"
+    assert ob.getir(("kitap", 1)) is None
+
+def test_onbellek_varlik_temizleme():
+    ob = Onbellek()
+    ob.koy(("kitap", 1), "k")
+    ob.koy(("yazar", 1), "y")
+    ob.temizle("kitap")
+    assert ob.getir(("kitap", 1)) is None
+    assert ob.getir(("yazar", 1)) == "y"
+
+def test_hizli_json_serilestirici(monkeypatch):
+    """TypeAdapter yedeği orjson ile aynı JSON'u üretmeli, şemada olmayan sütun kabul edilmemeli"""
+    satirlar = [{"id": 1, "kullanici_id": 2, "kitap_id": 3, "alis_tarihi": date(2025, 1, 2), "teslim_tarihi": None}]
+    beklenen = [{"id": 1, "kullanici_id": 2, "kitap_id": 3, "alis_tarihi": "2025-01-02", "teslim_tarihi": None}]
+    monkeypatch.setattr(hizli_json, "orjson", None)
+    assert json.loads(hizli_json.serilestir(satirlar, schemas.OduncResponse)) == beklenen
+
+    class FazlaAlanli(schemas.KitapResponse):
+        puan: float = 0
+    with pytest.raises(ValueError):
+        hizli_json._alanlar(models.Kitap, FazlaAlanli)
+
+def test_kodlama_secimi():
+    assert kodlama_sec("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert kodlama_sec("gzip, deflate", ("br", "gzip")) == "gzip"
+    assert kodlama_sec("br;q=0, gzip;q=0.5", ("br", "gzip")) == "gzip"
+    assert kodlama_sec("*", ("gzip",)) == "gzip"
+    assert kodlama_sec("*, gzip;q=0", ("gzip",)) is None
+    assert kodlama_sec("identity", ("br", "gzip")) is None
+    assert kodlama_sec("", ("gzip",)) is None
+
+def test_metrikler_en_yavas_sorgular():
+    """Liste dolunca en hızlı ifade yerini daha yavaş olana bırakmalı"""
+    m = Metrikler(yavas_sorgu_sayisi=2)
+    m.sorgu_kaydet("SELECT 1", 0.010)
+    m.sorgu_kaydet("SELECT 2", 0.030)
+    m.sorgu_kaydet("SELECT 3", 0.001)   # listeye giremez
+    m.sorgu_kaydet("SELECT 1", 0.050)   # zaten listede, en yüksek süre güncellenir
+    m.sorgu_kaydet("SELECT  4\n", 0.040)  # SELECT 2 düşer
+    assert [(sql, adet) for sql, _, adet in m.yavas_sorgular()] == [("SELECT 1", 2), ("SELECT 4", 1)]
+
+def test_metrikler_histogram_kovalari():
+    m = Metrikler()
+    olcum = IstekOlcumu()
+    olcum.sorgu_sayisi = 3
+    m.istek_kaydet("GET", "/a", 200, 0.004, olcum)
+    m.istek_kaydet("GET", "/a", 200, 0.2, olcum)
+    m.istek_kaydet("GET", "/a", 500, 20.0, olcum)
+    metin = m.prometheus()
+    assert 'kutuphane_istek_suresi_saniye_bucket{method="GET",route="/a",le="0.005"} 1' in metin
+    assert 'kutuphane_istek_suresi_saniye_bucket{method="GET",route="/a",le="0.25"} 2' in metin
+    assert 'kutuphane_istek_suresi_saniye_bucket{method="GET",route="/a",le="10.0"} 2' in metin
+    assert 'kutuphane_istek_suresi_saniye_bucket{method="GET",route="/a",le="+Inf"} 3' in metin
+    assert 'kutuphane_istek_sorgu_sayisi_bucket{method="GET",route="/a",le="5"} 3' in metin
+    assert 'kutuphane_istek_toplam{method="GET",route="/a",durum="500"} 1' in metin
@@ -1,5 +1,24 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app import arsiv, database, hizli_json, migrasyon, models, sayaclar, schemas, toplu_getir, yazma_kuyrugu
+from app.database import Base, motor_olustur
+from app.metrikler import metrikler
+from app.onbellek import istatistik_onbellegi
+from app.sikistirma import SikistirmaMiddleware
+from app.routers import istatistik, kategoriler, kitaplar, kullanicilar, odunc, yazarlar
 
 
 
@@ -193,3 +212,1210 @@ def test_odunc_kitap_musait_degil(client):
     })
     assert res.status_code == 400
     assert res.json()["detail"] == "Kitap şu an başkasında"
+
+
+def test_kategori_cursor_sayfalama(client):
+    """Cursor ile sayfalama tüm kayıtları tekrarsız ve sırayla dolaşmalı."""
+    for i in range(5):
+        client.post("/api/kategoriler/", json={"ad": f"Sayfa {i}"})
+
+    gorulen = []
+    res = client.get("/api/kategoriler/", params={"after_id": 0, "limit": 2})
+    while True:
+        assert res.status_code == 200
+        gorulen.extend(k["id"] for k in res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        res = client.get("/api/kategoriler/", params={"cursor": cursor, "limit": 2})
+
+    assert len(gorulen) == 5
+    assert gorulen == sorted(gorulen)
+
+def test_gecersiz_cursor(client):
+    """Bozuk cursor 400 dönmeli."""
+    res = client.get("/api/kitaplar/", params={"cursor": "%%%"})
+    assert res.status_code == 400
+
+
+def test_odunc_es_zamanli_tek_kazanan(tmp_path):
+    """
+    Aynı kitaba yüzlerce paralel ödünç isteği gelirse yalnızca biri başarılı olmalı,
+    kalanlar 400 almalı (kısmi unique indeks garantisi).
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'yaris.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=20, max_overflow=0,
+    )
+    Base.metadata.create_all(bind=engine)
+    Oturum = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Oturum() as db:
+        yazar = models.Yazar(ad="Yarış", soyad="Durumu")
+        db.add(yazar)
+        db.flush()
+        kitap = models.Kitap(baslik="Tek Nüsha", isbn="9789750807147", yazar_id=yazar.id)
+        db.add(kitap)
+        db.add_all([models.Kullanici(ad="U", soyad=str(i), email=f"u{i}@e.com") for i in range(200)])
+        db.commit()
+        kitap_id = kitap.id
+
+    def odunc_al(kullanici_id):
+        db = Oturum()
+        try:
+            istek = schemas.OduncCreate(kullanici_id=kullanici_id, kitap_id=kitap_id, alis_tarihi=date.today())
+            odunc.create_odunc(odunc=istek, db=db)
+            return 201
+        except HTTPException as e:
+            return e.status_code
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=20) as havuz:
+        sonuclar = list(havuz.map(odunc_al, range(1, 201)))
+
+    assert sonuclar.count(201) == 1
+    assert sonuclar.count(400) == 199
+    with Oturum() as db:
+        assert db.query(models.OduncKayit).filter(models.OduncKayit.kitap_id == kitap_id).count() == 1
+    engine.dispose()
+
+def test_kuyruklu_yazmanin_sorgulari_istege_sayilir(client, db, monkeypatch):
+    """Yazar thread'inde çalışan iş, isteğin Server-Timing sorgu sayısına yazılmalı."""
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "K", "soyad": "Y"}).json()["id"]
+    kitap_id = client.post("/api/kitaplar/", json={"baslik": "KY", "isbn": "KY1", "yazar_id": yazar_id}).json()["id"]
+    user_id = client.post("/api/kullanicilar/", json={"ad": "K", "soyad": "Y", "email": "ky@e.com"}).json()["id"]
+    kuyruk = yazma_kuyrugu.YazmaKuyrugu(sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind()),
+                                        bekleme_ms=0)
+    monkeypatch.setattr(yazma_kuyrugu, "kuyruk", kuyruk)
+    try:
+        res = client.post("/api/odunc/", json={"kullanici_id": user_id, "kitap_id": kitap_id,
+                                               "alis_tarihi": str(date.today())})
+    finally:
+        kuyruk.durdur()
+    assert res.status_code == 201
+    assert kuyruk.is_sayisi == 1
+    sorgu = int(re.search(r'desc="(\d+) sorgu"', res.headers["server-timing"]).group(1))
+    assert sorgu >= 1
+
+def test_yazma_kuyrugu_grup_commit(tmp_path, monkeypatch):
+    """
+    Kuyruk açıkken paralel ödünç/teslim istekleri gruplar hâlinde commit edilmeli;
+    her istek yine kendi sonucunu ya da hatasını almalı.
+    """
+    # Uygulamanın engine'i: foreign key zorlaması açık, olmayan kitaba ödünç 404 dönmeli
+    engine = motor_olustur(f"sqlite:///{tmp_path / 'kuyruk.db'}")
+    Base.metadata.create_all(bind=engine)
+    Oturum = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    kuyruk = yazma_kuyrugu.YazmaKuyrugu(Oturum, bekleme_ms=5)
+    monkeypatch.setattr(yazma_kuyrugu, "kuyruk", kuyruk)
+
+    with Oturum() as db:
+        db.add(models.Yazar(id=1, ad="Grup", soyad="Commit"))
+        db.add_all([models.Kitap(id=i, baslik=f"K{i}", isbn=f"GC{i}", yazar_id=1) for i in range(1, 101)])
+        db.add_all([models.Kullanici(id=i, ad="U", soyad=str(i), email=f"g{i}@e.com") for i in range(1, 101)])
+        db.commit()
+
+    def istek(islem):
+        db = Oturum()
+        try:
+            return islem(db)
+        except HTTPException as e:
+            return e.status_code
+        finally:
+            db.close()
+
+    def odunc_al(kitap_id, kullanici_id):
+        govde = schemas.OduncCreate(kullanici_id=kullanici_id, kitap_id=kitap_id, alis_tarihi=date.today())
+        return istek(lambda db: odunc.create_odunc(odunc=govde, db=db))
+
+    with ThreadPoolExecutor(max_workers=20) as havuz:
+        # 1-50 farklı kitaplar, 51. kitaba 50 kişi birden, olmayan kitap
+        farkli = list(havuz.map(odunc_al, range(1, 51), range(1, 51)))
+        ayni = list(havuz.map(lambda k: odunc_al(51, k), range(51, 101)))
+        kopuk = odunc_al(999, 1)
+        teslim = list(havuz.map(
+            lambda r: istek(lambda db: odunc.update_odunc(r.id, schemas.OduncUpdate(teslim_tarihi=date.today()), db=db)),
+            farkli[:25],
+        ))
+    kuyruk.durdur()
+
+    assert all(isinstance(r, schemas.OduncResponse) for r in farkli)
+    assert sorted(r.kitap_id for r in farkli) == list(range(1, 51))
+    assert sum(isinstance(r, schemas.OduncResponse) for r in ayni) == 1
+    assert ayni.count(400) == 49
+    assert kopuk == 404
+    assert all(r.teslim_tarihi == date.today() for r in teslim)
+    # İşler toplu commit edildi ve sayaçlar her iş için doğru güncellendi
+    assert kuyruk.grup_sayisi < kuyruk.is_sayisi == 126
+    with Oturum() as db:
+        assert db.query(models.OduncKayit).count() == 51
+        assert db.query(models.Kitap).filter(models.Kitap.odunc_acik).count() == 26
+        assert sayaclar.tutarsizliklar(db.connection()) == {"kitaplar": [], "kullanicilar": []}
+    engine.dispose()
+
+def test_odunc_iade_sonrasi_tekrar_alinabilir(client):
+    """Teslim edilen kitap tekrar ödünç verilebilmeli, tekrar açmak ise 400 dönmeli."""
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "I", "soyad": "A"}).json()["id"]
+    kitap_id = client.post("/api/kitaplar/", json={"baslik": "Iade", "isbn": "444", "yazar_id": yazar_id}).json()["id"]
+    user_id = client.post("/api/kullanicilar/", json={"ad": "I", "soyad": "U", "email": "iu@e.com"}).json()["id"]
+    bugun = str(date.today())
+
+    ilk = client.post("/api/odunc/", json={"kullanici_id": user_id, "kitap_id": kitap_id, "alis_tarihi": bugun}).json()
+    client.patch(f"/api/odunc/{ilk['id']}", json={"teslim_tarihi": bugun})
+
+    ikinci = client.post("/api/odunc/", json={"kullanici_id": user_id, "kitap_id": kitap_id, "alis_tarihi": bugun})
+    assert ikinci.status_code == 201
+
+    # İlk kaydı yeniden açmak iki açık ödünç demek
+    res = client.patch(f"/api/odunc/{ilk['id']}", json={"teslim_tarihi": None})
+    assert res.status_code == 400
+
+def test_async_mod_crud(tmp_path):
+    """DB_MODU=async ile çevrilen router'lar aynı davranışı göstermeli."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.asenkron import asenkron_router
+    from app.database import get_async_db
+    from app.routers import kitaplar, yazarlar
+
+    yol = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{yol}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{yol}", poolclass=NullPool)
+    AsyncOturum = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncOturum() as db:
+            yield db
+
+    async_app = FastAPI()
+    async_app.include_router(asenkron_router(yazarlar.router))
+    async_app.include_router(asenkron_router(kitaplar.router))
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+
+    with TestClient(async_app) as c:
+        yazar_id = c.post("/api/yazarlar/", json={"ad": "Async", "soyad": "Yazar"}).json()["id"]
+        res = c.post("/api/kitaplar/", json={"baslik": "Async Kitap", "isbn": "555", "yazar_id": yazar_id})
+        assert res.status_code == 201
+
+        # Lazy 'kitaplar' ilişkisi greenlet içinde serileştirilmeli
+        detay = c.get(f"/api/yazarlar/{yazar_id}")
+        assert detay.status_code == 200
+        assert [k["baslik"] for k in detay.json()["kitaplar"]] == ["Async Kitap"]
+
+        assert c.patch(f"/api/yazarlar/{yazar_id}", json={"ad": "Yeni"}).json()["ad"] == "Yeni"
+        assert c.get("/api/kitaplar/", params={"after_id": 0}).status_code == 200
+        assert c.get("/api/kitaplar/99999").status_code == 404
+        assert c.delete(f"/api/yazarlar/{yazar_id}").status_code == 204
+        assert c.get(f"/api/yazarlar/{yazar_id}").status_code == 404
+
+def test_toplu_kitap_yukleme_json(client):
+    """JSON dizi ile toplu yüklemede hatalı satırlar raporlanmalı, geçerliler eklenmeli."""
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "Toplu", "soyad": "Yazar"}).json()["id"]
+    kitaplar = [
+        {"baslik": "Bir", "isbn": "978-975-363-802-9", "yazar_id": yazar_id},
+        {"baslik": "İki", "isbn": "9783161484100", "yazar_id": yazar_id},
+        {"baslik": "Kötü ISBN", "isbn": "978-975-08-0714-0", "yazar_id": yazar_id},
+        {"baslik": "Yazarsız", "isbn": "9780306406157"},
+        {"baslik": "Tekrar", "isbn": "9783161484100", "yazar_id": yazar_id},
+    ]
+    res = client.post("/api/kitaplar/bulk", json=kitaplar)
+    assert res.status_code == 200
+    sonuc = res.json()
+    assert sonuc["eklenen"] == 2
+    assert sonuc["hatali"] == 3
+    assert [h["satir"] for h in sonuc["hatalar"]] == [3, 4, 5]
+    assert len(client.get("/api/kitaplar/").json()) == 2
+
+def test_toplu_yukleme_satir_satir_denemesi_tek_transaction(client, db):
+    """Parti hatası sonrası satır satır deneme her satırı ayrı commit etmemeli."""
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "Tek", "soyad": "Commit"}).json()["id"]
+    release_sonrasi = []
+
+    def kaydet(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("RELEASE SAVEPOINT"):
+            release_sonrasi.append(conn.connection.dbapi_connection.in_transaction)
+
+    event.listen(db.get_bind(), "after_cursor_execute", kaydet)
+    try:
+        res = client.post("/api/kitaplar/bulk", json=[
+            {"baslik": "Bir", "isbn": _gecerli_isbn(1), "yazar_id": yazar_id},
+            {"baslik": "Tekrar", "isbn": _gecerli_isbn(1), "yazar_id": yazar_id},
+            {"baslik": "İki", "isbn": _gecerli_isbn(2), "yazar_id": yazar_id},
+        ])
+    finally:
+        event.remove(db.get_bind(), "after_cursor_execute", kaydet)
+    assert res.json()["eklenen"] == 2
+    # Her RELEASE'ten sonra dış transaction hâlâ açık
+    assert release_sonrasi and all(release_sonrasi)
+
+def test_toplu_kullanici_yukleme_ndjson(client):
+    """NDJSON akışında bozuk satır ve tekrar eden e-posta tüm yüklemeyi durdurmamalı."""
+    govde = "\n".join([
+        '{"ad": "A", "soyad": "B", "email": "a@b.com"}',
+        '{bozuk json',
+        '{"ad": "C", "soyad": "D", "email": "a@b.com"}',
+        '{"ad": "E", "soyad": "F", "email": "e@f.com"}',
+    ])
+    res = client.post("/api/kullanicilar/bulk", content=govde,
+                      headers={"Content-Type": "application/x-ndjson"})
+    sonuc = res.json()
+    assert sonuc["eklenen"] == 2
+    assert [h["satir"] for h in sonuc["hatalar"]] == [2, 3]
+
+def test_toplu_yukleme_gecersiz_govde(client):
+    """Dizi olmayan JSON gövde 400 dönmeli."""
+    res = client.post("/api/yazarlar/bulk", json={"ad": "Tek"})
+    assert res.status_code == 400
+
+def test_toplu_yukleme_dogrulamasi_event_loop_disinda(client, monkeypatch):
+    """Satır çözme ve doğrulama threadpool'da çalışmalı; büyük yükleme event loop'u tıkamamalı."""
+    donguler = []
+
+    def kontrol(kitap):
+        try:
+            asyncio.get_running_loop()
+            donguler.append(True)
+        except RuntimeError:
+            donguler.append(False)
+        return None
+
+    monkeypatch.setattr(kitaplar, "_isbn_kontrol", kontrol)
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "E", "soyad": "L"}).json()["id"]
+    govde = "\n".join(json.dumps({"baslik": f"K{i}", "isbn": f"EL{i}", "yazar_id": yazar_id}) for i in range(3))
+    res = client.post("/api/kitaplar/bulk", content=govde, headers={"Content-Type": "application/x-ndjson"})
+    assert res.json()["eklenen"] == 3
+    assert donguler == [False, False, False]
+
+def test_kitap_export_ndjson_ve_csv(client):
+    """Export endpointi tüm kitapları NDJSON ve CSV olarak akıtmalı."""
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "Ex", "soyad": "Port"}).json()["id"]
+    for i in range(3):
+        client.post("/api/kitaplar/", json={"baslik": f"Kitap {i}", "isbn": f"EX{i}", "yazar_id": yazar_id})
+
+    res = client.get("/api/kitaplar/export")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    satirlar = [json.loads(s) for s in res.text.splitlines()]
+    assert [s["isbn"] for s in satirlar] == ["EX0", "EX1", "EX2"]
+
+    res = client.get("/api/kitaplar/export", params={"bicim": "csv"})
+    satirlar = list(csv.DictReader(io.StringIO(res.text)))
+    assert len(satirlar) == 3
+    assert satirlar[0]["baslik"] == "Kitap 0"
+
+def test_odunc_export_tarih_alanlari(client):
+    """Ödünç export'unda tarihler ISO formatında, boş teslim tarihi null olmalı."""
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "O", "soyad": "E"}).json()["id"]
+    kitap_id = client.post("/api/kitaplar/", json={"baslik": "OE", "isbn": "OE1", "yazar_id": yazar_id}).json()["id"]
+    user_id = client.post("/api/kullanicilar/", json={"ad": "O", "soyad": "E", "email": "oe@e.com"}).json()["id"]
+    client.post("/api/odunc/", json={"kullanici_id": user_id, "kitap_id": kitap_id, "alis_tarihi": "2024-01-02"})
+
+    kayit = json.loads(client.get("/api/odunc/export").text.splitlines()[0])
+    assert kayit["alis_tarihi"] == "2024-01-02"
+    assert kayit["teslim_tarihi"] is None
+
+def _yazarlar_ve_kitaplar(client, yazar_sayisi=5, kitap_sayisi=3):
+    for y in range(yazar_sayisi):
+        yazar_id = client.post("/api/yazarlar/", json={"ad": f"Y{y}", "soyad": "N"}).json()["id"]
+        for k in range(kitap_sayisi):
+            client.post("/api/kitaplar/", json={"baslik": f"K{y}-{k}", "isbn": f"N{y}-{k}", "yazar_id": yazar_id})
+
+@pytest.mark.parametrize("yukleme", ["selectin", "joined"])
+def test_yazar_detay_listesi_n_arti_bir_yok(client, sorgu_sayaci, yukleme):
+    """Detay listesi yazar sayısından bağımsız, sabit sayıda sorguyla dönmeli."""
+    _yazarlar_ve_kitaplar(client)
+
+    # değişiklik sayacı + yazarlar + (selectin ise) kitaplar
+    with sorgu_sayaci(en_fazla=3):
+        res = client.get("/api/yazarlar/detay", params={"yukleme": yukleme})
+    assert res.status_code == 200
+    assert len(res.json()) == 5
+    assert all(len(y["kitaplar"]) == 3 for y in res.json())
+
+def test_yazar_detay_tek_sorgu(client, sorgu_sayaci):
+    """joined stratejisinde yazar detayı tek sorguyla gelmeli."""
+    _yazarlar_ve_kitaplar(client, yazar_sayisi=1)
+
+    with sorgu_sayaci(en_fazla=1):
+        res = client.get("/api/yazarlar/1", params={"yukleme": "joined"})
+    assert len(res.json()["kitaplar"]) == 3
+
+def test_sorgu_sayaci_lazy_yuklemeyi_yakalar(client, sorgu_sayaci):
+    """Lazy yükleme N+1 üretir; yardımcı bunu yakalamalı."""
+    _yazarlar_ve_kitaplar(client)
+
+    with pytest.raises(AssertionError):
+        with sorgu_sayaci(en_fazla=3):
+            client.get("/api/yazarlar/detay", params={"yukleme": "lazy"})
+
+def test_onbellek_isabet_ve_gecersiz_kilma(client, sorgu_sayaci):
+    """Tekrarlanan GET'ler DB'ye gitmemeli, PATCH sonrası güncel veri dönmeli."""
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "Ön", "soyad": "Bellek"}).json()["id"]
+    kitap_id = client.post("/api/kitaplar/", json={"baslik": "Eski", "isbn": "OB1", "yazar_id": yazar_id}).json()["id"]
+
+    client.get(f"/api/kitaplar/{kitap_id}")
+    with sorgu_sayaci(en_fazla=0):
+        for _ in range(5):
+            assert client.get(f"/api/kitaplar/{kitap_id}").json()["baslik"] == "Eski"
+
+    client.patch(f"/api/kitaplar/{kitap_id}", json={"baslik": "Yeni"})
+    assert client.get(f"/api/kitaplar/{kitap_id}").json()["baslik"] == "Yeni"
+    # yazar detayındaki kitap listesi de güncellenmeli
+    assert client.get(f"/api/yazarlar/{yazar_id}").json()["kitaplar"][0]["baslik"] == "Yeni"
+
+    istatistik = client.get("/api/onbellek").json()
+    assert istatistik["isabet"] >= 5
+
+def test_onbellek_yazar_silinince_kitaplar_dusmeli(client):
+    """Yazar silinince cascade ile silinen kitaplar önbellekten de düşmeli."""
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "C", "soyad": "D"}).json()["id"]
+    kitap_id = client.post("/api/kitaplar/", json={"baslik": "Cascade", "isbn": "CD1", "yazar_id": yazar_id}).json()["id"]
+    assert client.get(f"/api/kitaplar/{kitap_id}").status_code == 200
+
+    client.delete(f"/api/yazarlar/{yazar_id}")
+    assert client.get(f"/api/kitaplar/{kitap_id}").status_code == 404
+
+def test_kitap_etag_304(client):
+    """If-None-Match güncel ETag ile gelirse gövdesiz 304 dönmeli, değişince 200."""
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "E", "soyad": "Tag"}).json()["id"]
+    kitap_id = client.post("/api/kitaplar/", json={"baslik": "ETag", "isbn": "ET1", "yazar_id": yazar_id}).json()["id"]
+
+    ilk = client.get(f"/api/kitaplar/{kitap_id}")
+    etag = ilk.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    tekrar = client.get(f"/api/kitaplar/{kitap_id}", headers={"If-None-Match": etag})
+    assert tekrar.status_code == 304
+    assert tekrar.content == b""
+
+    client.patch(f"/api/kitaplar/{kitap_id}", json={"baslik": "Yeni ETag"})
+    degisti = client.get(f"/api/kitaplar/{kitap_id}", headers={"If-None-Match": etag})
+    assert degisti.status_code == 200
+    assert degisti.headers["ETag"] != etag
+
+def test_liste_etag_ve_last_modified(client, db, sorgu_sayaci):
+    """Değişmeyen koleksiyon tek sayaç okumasıyla 304 dönmeli."""
+    client.post("/api/kategoriler/", json={"ad": "Önce"})
+    # Bu saniyedeki değişiklik için Last-Modified verilmez; sayacı geçmişe çekiyoruz
+    db.execute(text("UPDATE degisiklik_sayaclari SET degisme_zamani = '2020-01-01 10:00:00.250'"))
+    db.commit()
+    ilk = client.get("/api/kategoriler/")
+    etag = ilk.headers["ETag"]
+    assert "Last-Modified" in ilk.headers
+
+    with sorgu_sayaci(en_fazla=1):
+        res = client.get("/api/kategoriler/", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+    res = client.get("/api/kategoriler/", headers={"If-Modified-Since": ilk.headers["Last-Modified"]})
+    assert res.status_code == 304
+
+    # Farklı sayfa farklı ETag
+    assert client.get("/api/kategoriler/", params={"limit": 1}).headers["ETag"] != etag
+
+    client.post("/api/kategoriler/", json={"ad": "Sonra"})
+    res = client.get("/api/kategoriler/", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert len(res.json()) == 2
+
+def test_last_modified_saniye_icindeki_degisikligi_kacirmamali(client, db):
+    """Last-Modified yukarı yuvarlanmalı, henüz bitmemiş saniyedeki değişiklik için verilmemeli."""
+    client.post("/api/kategoriler/", json={"ad": "Saniye"})
+
+    def zaman(deger):
+        db.execute(text("UPDATE degisiklik_sayaclari SET degisme_zamani = :z"), {"z": deger})
+        db.commit()
+
+    zaman("2020-01-01 10:00:00.250")
+    res = client.get("/api/kategoriler/")
+    assert res.headers["Last-Modified"] == "Wed, 01 Jan 2020 10:00:01 GMT"
+    eski = {"If-Modified-Since": "Wed, 01 Jan 2020 10:00:00 GMT"}
+    assert client.get("/api/kategoriler/", headers=eski).status_code == 200
+    assert client.get("/api/kategoriler/", headers={"If-Modified-Since": res.headers["Last-Modified"]}).status_code == 304
+
+    # Saniyesi dolmamış değişiklik: aynı saniyedeki sonraki yazmayla ayırt edilemez
+    zaman("2999-01-01 10:00:00.250")
+    res = client.get("/api/kategoriler/", headers={"If-Modified-Since": "Fri, 01 Jan 2999 10:00:01 GMT"})
+    assert res.status_code == 200
+    assert "Last-Modified" not in res.headers
+    assert "ETag" in res.headers
+
+def test_odunc_listesi_etag_kitap_degisince_sabit(client):
+    """Başka tablodaki değişiklik ödünç listesinin ETag'ini değiştirmemeli."""
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "O", "soyad": "L"}).json()["id"]
+    kitap_id = client.post("/api/kitaplar/", json={"baslik": "OL", "isbn": "OL1", "yazar_id": yazar_id}).json()["id"]
+    user_id = client.post("/api/kullanicilar/", json={"ad": "O", "soyad": "L", "email": "ol@e.com"}).json()["id"]
+    client.post("/api/odunc/", json={"kullanici_id": user_id, "kitap_id": kitap_id, "alis_tarihi": str(date.today())})
+
+    etag = client.get("/api/odunc/").headers["ETag"]
+    client.post("/api/yazarlar/", json={"ad": "Baska", "soyad": "Tablo"})
+    assert client.get("/api/odunc/", headers={"If-None-Match": etag}).status_code == 304
+
+# --- TAM METİN ARAMA ---
+
+def test_kitap_arama_turkce_ve_onek(client):
+    ilber = client.post("/api/yazarlar/", json={"ad": "İlber", "soyad": "Ortaylı"}).json()["id"]
+    orhan = client.post("/api/yazarlar/", json={"ad": "Orhan", "soyad": "Pamuk"}).json()["id"]
+    isikli = client.post("/api/kitaplar/", json={"baslik": "IŞIKLI ŞEHİR", "isbn": "FTS1", "yazar_id": ilber}).json()["id"]
+    kar = client.post("/api/kitaplar/", json={"baslik": "Kar", "isbn": "FTS2", "yazar_id": orhan}).json()["id"]
+
+    def ara(q):
+        res = client.get("/api/kitaplar/ara", params={"q": q})
+        assert res.status_code == 200
+        return [k["id"] for k in res.json()]
+
+    assert ara("ışıklı şehir") == [isikli]
+    assert ara("İLBER") == [isikli]
+    assert ara("ilber") == [isikli]
+    # Türkçede büyük I, ı'dır; "ILBER" "ılber" olarak aranır
+    assert ara("ILBER") == []
+    assert ara("pam") == [kar]
+    assert ara("kar pamuk") == [kar]
+    assert ara('"; DROP TABLE kitaplar --') == []
+
+    # Yazar adı değişince arama tablosu triggerla güncellenmeli
+    client.patch(f"/api/yazarlar/{orhan}", json={"soyad": "Kemal"})
+    assert ara("pamuk") == []
+    assert ara("kemal") == [kar]
+
+    client.delete(f"/api/kitaplar/{kar}")
+    assert ara("kar") == []
+
+def test_kitap_arama_siralama(client):
+    yazar = client.post("/api/yazarlar/", json={"ad": "Deniz", "soyad": "Yazar"}).json()["id"]
+    diger = client.post("/api/yazarlar/", json={"ad": "Deniz", "soyad": "Kıyı"}).json()["id"]
+    # Başlıkta eşleşme yazar adındaki eşleşmeden önce gelmeli
+    yazar_eslesmesi = client.post("/api/kitaplar/", json={"baslik": "Mavi", "isbn": "FTS3", "yazar_id": diger}).json()["id"]
+    baslik_eslesmesi = client.post("/api/kitaplar/", json={"baslik": "Kıyı", "isbn": "FTS4", "yazar_id": yazar}).json()["id"]
+
+    res = client.get("/api/kitaplar/ara", params={"q": "kıyı"})
+    assert [k["id"] for k in res.json()] == [baslik_eslesmesi, yazar_eslesmesi]
+    res = client.get("/api/kitaplar/ara", params={"q": "kıyı", "skip": 1, "limit": 1})
+    assert [k["id"] for k in res.json()] == [yazar_eslesmesi]
+    assert client.get("/api/kitaplar/ara", params={"q": ""}).status_code == 422
+
+# --- ÖDÜNÇ İNDEKSLERİ ---
+
+OK = models.OduncKayit
+SICAK_SORGULAR = {
+    # create_odunc'un çakışma kontrolü ve kitabın müsaitliği
+    "kitap_acik_odunc": select(OK).where(OK.kitap_id == 1, OK.teslim_tarihi.is_(None)),
+    "kitap_gecmisi": select(OK).where(OK.kitap_id == 1).order_by(OK.teslim_tarihi),
+    "kullanici_gecmisi": select(OK).where(OK.kullanici_id == 1).order_by(OK.alis_tarihi.desc()),
+    "kullanici_acik_oduncleri": select(OK).where(OK.kullanici_id == 1, OK.teslim_tarihi.is_(None)),
+    "kullanici_acik_sayisi": select(OK.id).where(OK.kullanici_id == 1, OK.teslim_tarihi.is_(None)),
+}
+
+@pytest.mark.parametrize("ad", sorted(SICAK_SORGULAR))
+def test_odunc_sicak_sorgular_tam_tarama_yapmamali(db, ad):
+    sql = str(SICAK_SORGULAR[ad].compile(compile_kwargs={"literal_binds": True}))
+    plan = [satir[-1] for satir in db.execute(text("EXPLAIN QUERY PLAN " + sql))]
+    assert not any(adim.startswith("SCAN odunc_kayitlari") for adim in plan), plan
+    assert not any("TEMP B-TREE" in adim for adim in plan), plan
+    assert any("USING" in adim and "INDEX" in adim for adim in plan), plan
+
+def test_odunc_listesi_filtreler(client):
+    yazar_id = client.post("/api/yazarlar/", json={"ad": "F", "soyad": "L"}).json()["id"]
+    k1 = client.post("/api/kitaplar/", json={"baslik": "F1", "isbn": "F1", "yazar_id": yazar_id}).json()["id"]
+    k2 = client.post("/api/kitaplar/", json={"baslik": "F2", "isbn": "F2", "yazar_id": yazar_id}).json()["id"]
+    u1 = client.post("/api/kullanicilar/", json={"ad": "F", "soyad": "1", "email": "f1@e.com"}).json()["id"]
+    u2 = client.post("/api/kullanicilar/", json={"ad": "F", "soyad": "2", "email": "f2@e.com"}).json()["id"]
+    bugun = str(date.today())
+    iade = client.post("/api/odunc/", json={"kullanici_id": u1, "kitap_id": k1, "alis_tarihi": bugun}).json()["id"]
+    client.patch(f"/api/odunc/{iade}", json={"teslim_tarihi": bugun})
+    acik1 = client.post("/api/odunc/", json={"kullanici_id": u1, "kitap_id": k2, "alis_tarihi": bugun}).json()["id"]
+    acik2 = client.post("/api/odunc/", json={"kullanici_id": u2, "kitap_id": k1, "alis_tarihi": bugun}).json()["id"]
+
+    def idler(**params):
+        return sorted(o["id"] for o in client.get("/api/odunc/", params=params).json())
+
+    assert idler(kullanici_id=u1) == sorted([iade, acik1])
+    assert idler(kitap_id=k1) == sorted([iade, acik2])
+    assert idler(acik=True) == sorted([acik1, acik2])
+    assert idler(kullanici_id=u1, acik=False) == [iade]
+
+# --- MİGRASYONLAR ---
+
+def _sema_nesneleri(engine):
+    with engine.connect() as conn:
+        return set(conn.execute(text(
+            "SELECT type, name, tbl_name FROM sqlite_master WHERE tbl_name != 'alembic_version'"
+        )))
+
+def test_migrasyonlar_modellerle_ayni_semayi_kurmali(tmp_path):
+    from alembic.autogenerate import compare_metadata
+    from alembic.runtime.migration import MigrationContext
+
+    migrasyonlu = create_engine(f"sqlite:///{tmp_path / 'migrasyon.db'}")
+    migrasyon.yukselt(migrasyonlu)
+    modelden = create_engine(f"sqlite:///{tmp_path / 'model.db'}")
+    Base.metadata.create_all(bind=modelden)
+
+    # Tablolar, indeksler, triggerlar ve FTS tabloları birebir aynı olmalı
+    assert _sema_nesneleri(migrasyonlu) == _sema_nesneleri(modelden)
+    with migrasyonlu.connect() as conn:
+        ctx = MigrationContext.configure(conn, opts={"include_name": migrasyon.autogenerate_filtresi})
+        assert compare_metadata(ctx, Base.metadata) == []
+    assert migrasyon.mevcut_surum(migrasyonlu) == migrasyon.son_surum()
+    migrasyon.sema_dogrula(migrasyonlu)
+
+def test_cascade_migrasyonu_veriyi_korumali(tmp_path):
+    # Uygulamanın engine'i gibi foreign key zorlaması açık; tablo kopyalanırken DROP cascade tetiklememeli
+    engine = motor_olustur(f"sqlite:///{tmp_path / 'cascade.db'}", "varsayilan")
+    migrasyon.yukselt(engine, hedef="0004")
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO yazarlar (id, ad, soyad) VALUES (1, 'Orhan', 'Pamuk')"))
+        conn.execute(text("INSERT INTO kitaplar (id, baslik, isbn, yazar_id) VALUES (1, 'Kar', '1', 1)"))
+        conn.execute(text("INSERT INTO kullanicilar (id, ad, soyad, email) VALUES (1, 'A', 'B', 'a@b.com')"))
+        conn.execute(text("INSERT INTO odunc_kayitlari (kullanici_id, kitap_id, alis_tarihi) VALUES (1, 1, '2025-01-01')"))
+
+    migrasyon.yukselt(engine)
+    with engine.begin() as conn:
+        assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+        assert conn.execute(text("SELECT count(*) FROM odunc_kayitlari")).scalar() == 1
+        conn.execute(text("DELETE FROM yazarlar WHERE id = 1"))
+        assert conn.execute(text("SELECT count(*) FROM odunc_kayitlari")).scalar() == 0
+        assert conn.execute(text("SELECT count(*) FROM kitap_ara")).scalar() == 0
+    engine.dispose()
+
+def test_migrasyon_eski_veritabanini_damgalayip_yukseltmeli(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'eski.db'}")
+    # create_all ile kurulmuş, sürüm tablosu olmayan ve ilk şemada kalmış veritabanı
+    migrasyon.yukselt(engine, hedef="0001")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(text("INSERT INTO yazarlar (id, ad, soyad) VALUES (1, 'Orhan', 'Pamuk')"))
+        conn.execute(text("INSERT INTO kitaplar (id, baslik, isbn, yazar_id) VALUES (1, 'Kar', '1', 1)"))
+    with pytest.raises(RuntimeError, match="app.migrasyon"):
+        migrasyon.sema_dogrula(engine)
+
+    migrasyon.yukselt(engine)
+    migrasyon.sema_dogrula(engine)
+    with engine.connect() as conn:
+        # Eski kitaplar arama tablosuna aktarılmış olmalı
+        bulunan = conn.execute(text("SELECT rowid FROM kitap_ara WHERE kitap_ara MATCH 'pamuk'")).all()
+    assert bulunan == [(1,)]
+
+# --- İSTATİSTİK ---
+
+def _istatistik_verisi(client):
+    yazar = client.post("/api/yazarlar/", json={"ad": "İ", "soyad": "S"}).json()["id"]
+    roman = client.post("/api/kategoriler/", json={"ad": "Roman"}).json()["id"]
+    tarih = client.post("/api/kategoriler/", json={"ad": "Tarih"}).json()["id"]
+    k1 = client.post("/api/kitaplar/", json={"baslik": "A", "isbn": "IS1", "yazar_id": yazar, "kategori_id": roman}).json()["id"]
+    k2 = client.post("/api/kitaplar/", json={"baslik": "B", "isbn": "IS2", "yazar_id": yazar, "kategori_id": tarih}).json()["id"]
+    u1 = client.post("/api/kullanicilar/", json={"ad": "Ali", "soyad": "V", "email": "is1@e.com"}).json()["id"]
+    u2 = client.post("/api/kullanicilar/", json={"ad": "Ayşe", "soyad": "Y", "email": "is2@e.com"}).json()["id"]
+    odunc = [
+        # (kullanıcı, kitap, alış, teslim)
+        (u1, k1, date(2025, 1, 5), date(2025, 1, 10)),
+        (u1, k1, date(2025, 1, 20), date(2025, 3, 1)),   # geç teslim
+        (u2, k1, date(2025, 2, 3), date(2025, 2, 4)),
+        (u2, k2, date(2025, 2, 10), None),              # hâlâ teslim edilmedi
+    ]
+    idler = []
+    for kullanici, kitap, alis, teslim in odunc:
+        res = client.post("/api/odunc/", json={"kullanici_id": kullanici, "kitap_id": kitap, "alis_tarihi": str(alis),
+                                                "teslim_tarihi": str(teslim) if teslim else None})
+        assert res.status_code == 201
+        idler.append(res.json()["id"])
+    return {"k1": k1, "k2": k2, "u1": u1, "u2": u2, "roman": roman, "tarih": tarih, "odunc": idler}
+
+def test_istatistik_endpointleri(client):
+    v = _istatistik_verisi(client)
+
+    res = client.get("/api/istatistik/en-cok-odunc-alinan")
+    assert [(r["kitap_id"], r["odunc_sayisi"]) for r in res.json()] == [(v["k1"], 3), (v["k2"], 1)]
+    res = client.get("/api/istatistik/en-cok-odunc-alinan", params={"baslangic": "2025-02-01", "bitis": "2025-02-28"})
+    assert [(r["kitap_id"], r["odunc_sayisi"]) for r in res.json()] == [(v["k1"], 1), (v["k2"], 1)]
+
+    res = client.get("/api/istatistik/aktif-okuyucular")
+    assert [(r["ad"], r["odunc_sayisi"], r["acik_odunc"]) for r in res.json()] == [("Ali", 2, 0), ("Ayşe", 2, 1)]
+
+    res = client.get("/api/istatistik/geciken-kategoriler", params={"gun": 14})
+    assert [(r["kategori"], r["toplam_odunc"], r["geciken"]) for r in res.json()] == [("Roman", 3, 1), ("Tarih", 1, 1)]
+
+    res = client.get("/api/istatistik/aylik", params={"baslangic": "2025-01-01"})
+    assert res.json() == [{"ay": "2025-01", "odunc_sayisi": 2}, {"ay": "2025-02", "odunc_sayisi": 2}]
+
+    res = client.get("/api/istatistik/aylik", params={"baslangic": "2025-03-01", "bitis": "2025-01-01"})
+    assert res.status_code == 400
+
+    # limit sınırlı; SQLite'ta -1 "sınırsız" demek olurdu
+    for limit in (-1, 0, 101):
+        assert client.get("/api/istatistik/en-cok-odunc-alinan", params={"limit": limit}).status_code == 422
+        assert client.get("/api/istatistik/aktif-okuyucular", params={"limit": limit}).status_code == 422
+    res = client.get("/api/istatistik/en-cok-odunc-alinan", params={"limit": 1})
+    assert [r["kitap_id"] for r in res.json()] == [v["k1"]]
+
+    # gun sınırlı; tarih aritmetiği taşıp 500 vermemeli
+    for gun in (-1, 3651, 100000000):
+        assert client.get("/api/istatistik/geciken-kategoriler", params={"gun": gun}).status_code == 422
+    res = client.get("/api/istatistik/geciken-kategoriler", params={"bitis": "9999-12-31", "gun": 3650})
+    assert res.status_code == 200
+    assert [(r["kategori"], r["toplam_odunc"]) for r in res.json()] == [("Roman", 3), ("Tarih", 1)]
+
+def test_istatistik_kapali_aralik_onbellekte(client, sorgu_sayaci):
+    v = _istatistik_verisi(client)
+    params = {"baslangic": "2025-01-01", "bitis": "2025-01-31"}
+    ilk = client.get("/api/istatistik/aylik", params=params).json()
+    assert ilk == [{"ay": "2025-01", "odunc_sayisi": 2}]
+
+    # Tekrar eden istek sadece sayaç sürümünü okur
+    with sorgu_sayaci(en_fazla=1):
+        assert client.get("/api/istatistik/aylik", params=params).json() == ilk
+    assert istatistik_onbellegi.istatistik()["isabet"] == 1
+
+    # Geçmiş bir kayıt düzeltilince eski sonuç kullanılmamalı
+    client.patch(f"/api/odunc/{v['odunc'][2]}", json={"alis_tarihi": "2025-01-15"})
+    assert client.get("/api/istatistik/aylik", params=params).json() == [{"ay": "2025-01", "odunc_sayisi": 3}]
+
+    # Bitişi olmayan (açık) aralıklar önbelleğe alınmaz
+    istatistik_onbellegi.temizle()
+    client.get("/api/istatistik/aylik", params={"baslangic": "2025-01-01"})
+    assert istatistik_onbellegi.istatistik()["kayit_sayisi"] == 0
+
+# --- ÖDÜNÇ SAYAÇLARI ---
+
+def _sayaclar(client, db, kitap_id, kullanici_id):
+    kitap = client.get(f"/api/kitaplar/{kitap_id}").json()
+    kullanici = db.get(models.Kullanici, kullanici_id)
+    db.refresh(kullanici)
+    return (kitap["odunc_acik"], kitap["toplam_odunc"], kitap["son_odunc_tarihi"]), kullanici.acik_odunc_sayisi
+
+def test_odunc_sayaclari_yazmalarla_guncel_kalmali(client, db):
+    yazar = client.post("/api/yazarlar/", json={"ad": "S", "soyad": "Y"}).json()["id"]
+    kitap = client.post("/api/kitaplar/", json={"baslik": "Sayaç", "isbn": "SY1", "yazar_id": yazar}).json()["id"]
+    u1 = client.post("/api/kullanicilar/", json={"ad": "S", "soyad": "1", "email": "sy1@e.com"}).json()["id"]
+    u2 = client.post("/api/kullanicilar/", json={"ad": "S", "soyad": "2", "email": "sy2@e.com"}).json()["id"]
+
+    # Önbelleğe alınmış kitap cevabı da güncellenmeli
+    assert _sayaclar(client, db, kitap, u1) == ((False, 0, None), 0)
+
+    o1 = client.post("/api/odunc/", json={"kullanici_id": u1, "kitap_id": kitap, "alis_tarihi": "2025-05-01"}).json()["id"]
+    assert _sayaclar(client, db, kitap, u1) == ((True, 1, "2025-05-01"), 1)
+
+    client.patch(f"/api/odunc/{o1}", json={"teslim_tarihi": "2025-05-10"})
+    assert _sayaclar(client, db, kitap, u1) == ((False, 1, "2025-05-01"), 0)
+
+    o2 = client.post("/api/odunc/", json={"kullanici_id": u2, "kitap_id": kitap, "alis_tarihi": "2025-06-01"}).json()["id"]
+    assert _sayaclar(client, db, kitap, u2) == ((True, 2, "2025-06-01"), 1)
+
+    # Ödünç başka kullanıcıya taşınınca iki kullanıcı da düzelmeli
+    client.patch(f"/api/odunc/{o2}", json={"kullanici_id": u1})
+    assert _sayaclar(client, db, kitap, u1)[1] == 1
+    assert _sayaclar(client, db, kitap, u2)[1] == 0
+
+    client.delete(f"/api/odunc/{o2}")
+    assert _sayaclar(client, db, kitap, u1) == ((False, 1, "2025-05-01"), 0)
+
+    # Kullanıcı silinince cascade ile giden ödünçler de sayılmamalı
+    client.post("/api/odunc/", json={"kullanici_id": u2, "kitap_id": kitap, "alis_tarihi": "2025-07-01"})
+    client.delete(f"/api/kullanicilar/{u2}")
+    assert _sayaclar(client, db, kitap, u1) == ((False, 1, "2025-05-01"), 0)
+
+    assert sayaclar.tutarsizliklar(db.connection()) == {"kitaplar": [], "kullanicilar": []}
+
+def test_odunc_yazar_detay_onbellegini_dusurmeli(client):
+    # Yazar detayı kitapların sayaçlarını da gösteriyor; ödünç/teslimden sonra önbellekte eski kalmamalı
+    yazar = client.post("/api/yazarlar/", json={"ad": "O", "soyad": "B"}).json()["id"]
+    kitap = client.post("/api/kitaplar/", json={"baslik": "Önbellek", "isbn": "OB1", "yazar_id": yazar}).json()["id"]
+    kullanici = client.post("/api/kullanicilar/", json={"ad": "O", "soyad": "B", "email": "ob@e.com"}).json()["id"]
+    ilk = client.get(f"/api/yazarlar/{yazar}")
+    assert ilk.json()["kitaplar"][0]["odunc_acik"] is False
+
+    kayit = client.post("/api/odunc/", json={"kullanici_id": kullanici, "kitap_id": kitap,
+                                            "alis_tarihi": str(date.today())}).json()
+    res = client.get(f"/api/yazarlar/{yazar}", headers={"If-None-Match": ilk.headers["ETag"]})
+    assert res.status_code == 200
+    assert (res.json()["kitaplar"][0]["odunc_acik"], res.json()["kitaplar"][0]["toplam_odunc"]) == (True, 1)
+
+    client.patch(f"/api/odunc/{kayit['id']}", json={"teslim_tarihi": str(date.today())})
+    assert client.get(f"/api/yazarlar/{yazar}").json()["kitaplar"][0]["odunc_acik"] is False
+
+def test_silmeler_veritabani_cascade_ile_yapilmali(client, db, sorgu_sayaci):
+    """Bağlı kitap ve ödünçler oturuma yüklenmeden silinmeli, sayaçlar yine tutarlı kalmalı."""
+    yazar = client.post("/api/yazarlar/", json={"ad": "C", "soyad": "Y"}).json()["id"]
+    diger = client.post("/api/yazarlar/", json={"ad": "D", "soyad": "Y"}).json()["id"]
+    kategori = client.post("/api/kategoriler/", json={"ad": "Cascade"}).json()["id"]
+    kitaplar = [client.post("/api/kitaplar/", json={
+        "baslik": f"C{i}", "isbn": f"CS{i}", "yazar_id": yazar if i < 10 else diger, "kategori_id": kategori,
+    }).json()["id"] for i in range(11)]
+    u1 = client.post("/api/kullanicilar/", json={"ad": "C", "soyad": "1", "email": "c1@e.com"}).json()["id"]
+    u2 = client.post("/api/kullanicilar/", json={"ad": "C", "soyad": "2", "email": "c2@e.com"}).json()["id"]
+    for i, kitap in enumerate(kitaplar):
+        client.post("/api/odunc/", json={"kullanici_id": u1 if i % 2 else u2, "kitap_id": kitap, "alis_tarihi": "2025-01-01"})
+    db.expunge_all()
+
+    # Kitap sayısından bağımsız: yazar, etkilenen kullanıcılar, DELETE, sayaç güncellemesi
+    with sorgu_sayaci(en_fazla=4):
+        assert client.delete(f"/api/yazarlar/{yazar}").status_code == 204
+    assert db.query(models.Kitap).count() == 1
+    assert db.query(models.OduncKayit).count() == 1
+    assert [db.get(models.Kullanici, u).acik_odunc_sayisi for u in (u1, u2)] == [0, 1]
+
+    # Kullanıcı silinince kalan kitabın sayaçları da düşmeli
+    client.get(f"/api/kitaplar/{kitaplar[-1]}")
+    client.delete(f"/api/kullanicilar/{u2}")
+    assert client.get(f"/api/kitaplar/{kitaplar[-1]}").json()["toplam_odunc"] == 0
+    assert sayaclar.tutarsizliklar(db.connection()) == {"kitaplar": [], "kullanicilar": []}
+
+    client.delete(f"/api/kategoriler/{kategori}")
+    assert client.get(f"/api/kitaplar/{kitaplar[-1]}").json()["kategori_id"] is None
+
+    # Olmayan satıra bağlanan kayıtlar 500 değil 404 dönmeli
+    assert client.post("/api/kitaplar/", json={"baslik": "Y", "isbn": "CSX", "yazar_id": yazar}).status_code == 404
+    assert client.patch(f"/api/kitaplar/{kitaplar[-1]}", json={"kategori_id": kategori}).status_code == 404
+    assert client.post("/api/odunc/", json={
+        "kullanici_id": u2, "kitap_id": kitaplar[-1], "alis_tarihi": "2025-01-01",
+    }).status_code == 404
+
+def test_patch_ve_delete_tek_ifade(client, db, sorgu_sayaci):
+    """PATCH ve DELETE satırı önce yüklemeden UPDATE/DELETE ... RETURNING ile yapılmalı."""
+    yazar = client.post("/api/yazarlar/", json={"ad": "R", "soyad": "Y"}).json()["id"]
+    kategori = client.post("/api/kategoriler/", json={"ad": "Returning"}).json()["id"]
+    kitap = client.post("/api/kitaplar/", json={"baslik": "Eski", "isbn": "RT1", "yazar_id": yazar}).json()["id"]
+    kullanici = client.post("/api/kullanicilar/", json={"ad": "R", "soyad": "K", "email": "r@e.com"}).json()["id"]
+    kayit = client.post("/api/odunc/", json={"kullanici_id": kullanici, "kitap_id": kitap, "alis_tarihi": "2025-01-01"}).json()["id"]
+    client.get(f"/api/kitaplar/{kitap}")
+
+    with sorgu_sayaci(en_fazla=1):
+        res = client.patch(f"/api/kitaplar/{kitap}", json={"baslik": "Yeni", "kategori_id": kategori})
+    assert res.json()["baslik"] == "Yeni" and res.json()["odunc_acik"] is True
+    assert client.get(f"/api/kitaplar/{kitap}").json()["baslik"] == "Yeni"
+    assert client.patch(f"/api/kitaplar/{kitap}", json={}).json()["baslik"] == "Yeni"
+
+    # Teslim: UPDATE ... RETURNING + kitap ve kullanıcı sayaçları
+    with sorgu_sayaci(en_fazla=3):
+        res = client.patch(f"/api/odunc/{kayit}", json={"teslim_tarihi": "2025-01-05"})
+    assert res.json()["teslim_tarihi"] == "2025-01-05"
+    assert client.get(f"/api/kitaplar/{kitap}").json()["odunc_acik"] is False
+
+    with sorgu_sayaci(en_fazla=3):
+        assert client.delete(f"/api/odunc/{kayit}").status_code == 204
+    assert client.get(f"/api/kitaplar/{kitap}").json()["toplam_odunc"] == 0
+    assert sayaclar.tutarsizliklar(db.connection()) == {"kitaplar": [], "kullanicilar": []}
+
+    with sorgu_sayaci(en_fazla=1):
+        assert client.delete(f"/api/kategoriler/{kategori}").status_code == 204
+    assert client.get(f"/api/kitaplar/{kitap}").json()["kategori_id"] is None
+
+    # Etkilenen satır yoksa eski 404'ler
+    assert client.patch("/api/kitaplar/999", json={"baslik": "X"}).status_code == 404
+    assert client.patch("/api/yazarlar/999", json={"ad": "X"}).status_code == 404
+    assert client.patch("/api/odunc/999", json={"teslim_tarihi": "2025-01-05"}).status_code == 404
+    assert client.delete(f"/api/odunc/{kayit}").status_code == 404
+    assert client.delete(f"/api/kategoriler/{kategori}").status_code == 404
+
+def test_odunc_sayaclari_kontrol_ve_yenileme(db):
+    db.add(models.Yazar(id=1, ad="T", soyad="Y"))
+    db.add(models.Kitap(id=1, baslik="T", isbn="T1", yazar_id=1))
+    db.add(models.Kullanici(id=1, ad="T", soyad="K", email="t@e.com"))
+    db.commit()
+    # Core insert ORM olaylarından geçmez, sayaçlar geride kalır
+    db.execute(models.OduncKayit.__table__.insert(), [
+        {"kullanici_id": 1, "kitap_id": 1, "alis_tarihi": date(2025, 1, 1), "teslim_tarihi": date(2025, 1, 2)},
+        {"kullanici_id": 1, "kitap_id": 1, "alis_tarihi": date(2025, 2, 1), "teslim_tarihi": None},
+    ])
+    assert sayaclar.tutarsizliklar(db.connection()) == {"kitaplar": [1], "kullanicilar": [1]}
+
+    sayaclar.kitaplari_yeniden_hesapla(db.connection())
+    sayaclar.kullanicilari_yeniden_hesapla(db.connection())
+    db.commit()
+    kitap = db.get(models.Kitap, 1)
+    assert (kitap.odunc_acik, kitap.toplam_odunc, kitap.son_odunc_tarihi) == (True, 2, date(2025, 2, 1))
+    assert db.get(models.Kullanici, 1).acik_odunc_sayisi == 1
+    assert sayaclar.tutarsizliklar(db.connection()) == {"kitaplar": [], "kullanicilar": []}
+
+def test_odunc_arsivi(tmp_path, monkeypatch):
+    # Eski teslimler arşive taşınır; okumalar istenirse arşive de bakar, sayaçlar geçmişi kaybetmez
+    monkeypatch.setattr(database, "ARSIV_YOLU", str(tmp_path / "arsiv.db"))
+    engine = motor_olustur(f"sqlite:///{tmp_path / 'sicak.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # Uygulama açılışta kurar
+        arsiv.arsiv_kur(conn)
+    Oturum = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    gecen_yil, gecen_ay = date.today() - timedelta(days=400), date.today() - timedelta(days=30)
+    with Oturum() as db:
+        db.add(models.Yazar(id=1, ad="A", soyad="R"))
+        db.add_all([models.Kitap(id=i, baslik=f"K{i}", isbn=f"AR{i}", yazar_id=1) for i in (1, 2)])
+        db.add_all([models.Kullanici(id=i, ad="A", soyad=str(i), email=f"a{i}@e.com") for i in (1, 2)])
+        db.add_all([
+            models.OduncKayit(id=1, kitap_id=1, kullanici_id=1, alis_tarihi=gecen_yil, teslim_tarihi=gecen_yil),
+            models.OduncKayit(id=2, kitap_id=1, kullanici_id=2, alis_tarihi=gecen_yil + timedelta(days=5),
+                              teslim_tarihi=gecen_yil + timedelta(days=9)),
+            models.OduncKayit(id=3, kitap_id=2, kullanici_id=2, alis_tarihi=gecen_yil, teslim_tarihi=gecen_ay),
+            models.OduncKayit(id=4, kitap_id=2, kullanici_id=1, alis_tarihi=gecen_ay),
+        ])
+        db.commit()
+
+    def raporlar():
+        with Oturum() as db:
+            dun = date.today() - timedelta(days=1)
+            return [
+                istatistik.en_cok_odunc_alinan(bitis=dun, limit=10, db=db),
+                istatistik.aktif_okuyucular(bitis=dun, limit=10, db=db),
+                istatistik.geciken_kategoriler(gun=istatistik.ODUNC_SURESI_GUN, db=db),
+                istatistik.aylik_odunc(bitis=dun, db=db),
+            ]
+
+    once = raporlar()
+    assert arsiv.tasi(engine, yas_gun=365, parca=1, ara_ms=0) == 2
+    # Raporlar arşivi de kapsar; geçmiş aralıkların sonuçları taşımayla değişmez
+    assert raporlar() == once
+    # Yarıda kalmış bir taşımanın kopyası: ana tablodaki esas alınır, iki kez listelenmez
+    with engine.begin() as conn:
+        conn.execute(models.arsiv_odunc.insert().values(id=3, kitap_id=2, kullanici_id=2, alis_tarihi=gecen_yil))
+
+    with Oturum() as db:
+        assert [k.id for k in odunc.get_odunc_kayitlari(db=db)] == [3, 4]
+        assert [k.id for k in odunc.get_odunc_kayitlari(arsiv=True, db=db)] == [1, 2, 3, 4]
+        filtre = odunc.ODUNC_FILTRESI(kullanici_id=2, siralama="-alis_tarihi")
+        assert [k.id for k in odunc.get_odunc_kayitlari(filtre=filtre, arsiv=True, db=db)] == [2, 3]
+        assert [k.id for k in odunc.get_odunc_kayitlari(after_id=1, limit=2, arsiv=True, db=db)] == [2, 3]
+        with pytest.raises(HTTPException):
+            odunc.get_odunc(1, db=db)
+        assert odunc.get_odunc(2, arsiv=True, db=db).teslim_tarihi == gecen_yil + timedelta(days=9)
+        kitap = db.get(models.Kitap, 1)
+        assert (kitap.toplam_odunc, kitap.son_odunc_tarihi) == (2, gecen_yil + timedelta(days=5))
+
+        # Teslimde sayaçlar yeniden hesaplanırken arşiv de sayılır
+        yeni = odunc.create_odunc(schemas.OduncCreate(kitap_id=1, kullanici_id=1, alis_tarihi=date.today()), db=db)
+        odunc.update_odunc(yeni.id, schemas.OduncUpdate(teslim_tarihi=date.today()), db=db)
+        db.refresh(kitap)
+        assert (kitap.toplam_odunc, kitap.odunc_acik) == (3, False)
+
+        # Silinen kullanıcının arşivdeki ödünçleri de gider
+        db.delete(db.get(models.Kullanici, 2))
+        db.commit()
+        db.refresh(kitap)
+        assert kitap.toplam_odunc == 2
+        assert [k.id for k in odunc.get_odunc_kayitlari(arsiv=True, db=db)] == [1, 4, yeni.id]
+        assert sayaclar.tutarsizliklar(db.connection()) == {"kitaplar": [], "kullanicilar": []}
+
+    # Arşiv kullanılmış bir veritabanında arşivsiz sayaç yenileme reddedilir
+    monkeypatch.setattr(database, "ARSIV_YOLU", "")
+    monkeypatch.setattr(sayaclar, "SessionLocal", Oturum)
+    assert sayaclar.main(["yenile"]) == 2
+    with engine.connect() as conn, pytest.raises(RuntimeError):
+        arsiv.bagli_olmali(conn)
+    with Oturum() as db:
+        assert db.get(models.Kitap, 1).toplam_odunc == 2
+    engine.dispose()
+
+# --- FİLTRE VE SIRALAMA ---
+
+def test_kitap_filtre_ve_siralama(client):
+    y1 = client.post("/api/yazarlar/", json={"ad": "F", "soyad": "1"}).json()["id"]
+    y2 = client.post("/api/yazarlar/", json={"ad": "F", "soyad": "2"}).json()["id"]
+    kat = client.post("/api/kategoriler/", json={"ad": "Filtre"}).json()["id"]
+    kitaplar_ = [("C", 1950, y1, kat), ("A", 1980, y1, None), ("B", 2001, y2, kat), ("D", 1980, y2, None)]
+    idler = {}
+    for baslik, yil, yazar, kategori in kitaplar_:
+        idler[baslik] = client.post("/api/kitaplar/", json={
+            "baslik": baslik, "isbn": f"FL{baslik}", "yayin_yili": yil, "yazar_id": yazar, "kategori_id": kategori,
+        }).json()["id"]
+    kullanici = client.post("/api/kullanicilar/", json={"ad": "F", "soyad": "K", "email": "fk@e.com"}).json()["id"]
+    client.post("/api/odunc/", json={"kullanici_id": kullanici, "kitap_id": idler["B"], "alis_tarihi": str(date.today())})
+
+    def basliklar(**params):
+        res = client.get("/api/kitaplar/", params=params)
+        assert res.status_code == 200, res.text
+        return [k["baslik"] for k in res.json()]
+
+    assert basliklar(yazar_id=y1) == ["C", "A"]
+    assert basliklar(kategori_id=kat, siralama="baslik") == ["B", "C"]
+    assert basliklar(yayin_yili_min=1960, yayin_yili_max=2000, siralama="-baslik") == ["D", "A"]
+    assert basliklar(yayin_yili=1980, siralama="yayin_yili") == ["A", "D"]
+    assert basliklar(odunc_acik=True) == ["B"]
+    assert basliklar(siralama="-yayin_yili,baslik", limit=2) == ["B", "A"]
+    assert basliklar(siralama="-yayin_yili,baslik", skip=2) == ["D", "C"]
+
+    res = client.get("/api/kitaplar/", params={"siralama": "isbn"})
+    assert res.status_code == 400
+    assert "baslik" in res.json()["detail"]
+    assert client.get("/api/kitaplar/", params={"siralama": "baslik", "after_id": 0}).status_code == 400
+
+def test_odunc_filtre_alis_araligi(client):
+    yazar = client.post("/api/yazarlar/", json={"ad": "A", "soyad": "R"}).json()["id"]
+    kitap = client.post("/api/kitaplar/", json={"baslik": "AR", "isbn": "AR1", "yazar_id": yazar}).json()["id"]
+    kullanici = client.post("/api/kullanicilar/", json={"ad": "A", "soyad": "R", "email": "ar@e.com"}).json()["id"]
+    for alis in ("2025-01-10", "2025-02-10", "2025-03-10"):
+        client.post("/api/odunc/", json={"kullanici_id": kullanici, "kitap_id": kitap, "alis_tarihi": alis,
+                                         "teslim_tarihi": alis})
+    res = client.get("/api/odunc/", params={"alis_tarihi_min": "2025-02-01", "siralama": "-alis_tarihi"})
+    assert [o["alis_tarihi"] for o in res.json()] == ["2025-03-10", "2025-02-10"]
+
+FILTRE_TANIMLARI = [
+    kitaplar.KITAP_FILTRESI, yazarlar.YAZAR_FILTRESI, kategoriler.KATEGORI_FILTRESI,
+    kullanicilar.KULLANICI_FILTRESI, odunc.ODUNC_FILTRESI,
+]
+
+@pytest.mark.parametrize("tanim", FILTRE_TANIMLARI, ids=lambda t: t.model.__tablename__)
+def test_siralanabilir_alanlar_indeksten_okunmali(db, tanim):
+    """Her sıralanabilir alan için ORDER BY ... LIMIT geçici B-tree'ye düşmemeli."""
+    for alan in tanim.siralanabilir:
+        for yon in ("", "-"):
+            sorgu = select(tanim.model).order_by(*tanim(siralama=yon + alan).siralama).limit(100)
+            sql = str(sorgu.compile(compile_kwargs={"literal_binds": True}))
+            plan = [satir[-1] for satir in db.execute(text("EXPLAIN QUERY PLAN " + sql))]
+            assert not any("TEMP B-TREE" in adim for adim in plan), (alan, yon, plan)
+
+# --- HIZLI JSON ---
+
+@pytest.mark.parametrize("orjson_var", [True, False], ids=["orjson", "typeadapter"])
+def test_hizli_json_standart_ile_ayni(client, db, monkeypatch, orjson_var):
+    yazar = client.post("/api/yazarlar/", json={"ad": "J", "soyad": "S"}).json()["id"]
+    for i in range(3):
+        client.post("/api/kitaplar/", json={"baslik": f"Json {i}", "isbn": f"JS{i}", "yazar_id": yazar,
+                                            "yayin_yili": 2000 + i})
+    kullanici = client.post("/api/kullanicilar/", json={"ad": "J", "soyad": "K", "email": "jk@e.com"}).json()["id"]
+    client.post("/api/odunc/", json={"kullanici_id": kullanici, "kitap_id": 1, "alis_tarihi": "2025-01-02"})
+    adresler = ["/api/kitaplar/?after_id=0&limit=2", "/api/odunc/", "/api/kullanicilar/", "/api/yazarlar/",
+                "/api/kategoriler/", "/api/kitaplar/?siralama=-yayin_yili"]
+    # Last-Modified değişikliğin saniyesi dolunca verilir; iki tur arasında değişmesin
+    db.execute(text("UPDATE degisiklik_sayaclari SET degisme_zamani = '2020-01-01 10:00:00.250'"))
+    db.commit()
+    standart = {adres: client.get(adres) for adres in adresler}
+
+    monkeypatch.setattr(hizli_json, "JSON_MODU", "hizli")
+    if not orjson_var:
+        monkeypatch.setattr(hizli_json, "orjson", None)
+    for adres, beklenen in standart.items():
+        res = client.get(adres)
+        assert res.status_code == 200
+        assert res.json() == beklenen.json(), adres
+        assert res.headers["content-type"] == "application/json"
+        # Handler'ın yazdığı başlıklar kaybolmamalı
+        for baslik in ("ETag", "Last-Modified", "X-Next-Cursor"):
+            assert res.headers.get(baslik) == beklenen.headers.get(baslik), (adres, baslik)
+    assert client.get("/api/kitaplar/", headers={"If-None-Match": standart["/api/kitaplar/?siralama=-yayin_yili"].headers["ETag"]},
+                      params={"siralama": "-yayin_yili"}).status_code == 304
+
+# --- SIKIŞTIRMA ---
+
+def _gecerli_isbn(sira):
+    govde = f"978{sira:09d}"
+    toplam = sum(int(r) * (1 if i % 2 == 0 else 3) for i, r in enumerate(govde))
+    return govde + str((10 - toplam % 10) % 10)
+
+
+def _kitaplar_ekle(client, adet):
+    yazar = client.post("/api/yazarlar/", json={"ad": "S", "soyad": "K"}).json()["id"]
+    res = client.post("/api/kitaplar/bulk", json=[
+        {"baslik": f"Sıkıştırma Kitabı {i}", "isbn": _gecerli_isbn(i), "yazar_id": yazar} for i in range(adet)
+    ])
+    assert res.json()["eklenen"] == adet
+
+
+def test_buyuk_liste_gzip_ile_gider(client):
+    _kitaplar_ekle(client, 50)
+    duz = client.get("/api/kitaplar/", params={"limit": 50}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in duz.headers
+    assert duz.headers["vary"] == "Accept-Encoding"
+
+    res = client.get("/api/kitaplar/", params={"limit": 50}, headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["vary"] == "Accept-Encoding"
+    assert int(res.headers["content-length"]) < len(duz.content)
+    assert res.json() == duz.json()
+    # Zayıf ETag iki gösterimde aynı, koşullu GET sıkıştırmadan etkilenmez
+    assert res.headers["etag"] == duz.headers["etag"]
+    bos = client.get("/api/kitaplar/", params={"limit": 50},
+                     headers={"Accept-Encoding": "gzip", "If-None-Match": res.headers["etag"]})
+    assert bos.status_code == 304
+    assert "content-encoding" not in bos.headers
+    assert bos.headers["vary"] == "Accept-Encoding"
+
+
+def test_kucuk_cevap_ve_q_sifir_sikistirilmaz(client):
+    res = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in res.headers
+    _kitaplar_ekle(client, 50)
+    res = client.get("/api/kitaplar/", params={"limit": 50}, headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in res.headers
+
+
+def test_export_akisi_sikistirilir(client):
+    _kitaplar_ekle(client, 200)
+    res = client.get("/api/kitaplar/export", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert "content-length" not in res.headers
+    satirlar = [json.loads(s) for s in res.text.splitlines()]
+    assert len(satirlar) == 200
+
+
+def _akis_uygulamasi(parcalar, media_type="application/json", **ayar):
+    uygulama = FastAPI()
+
+    @uygulama.get("/akis")
+    def akis():
+        return StreamingResponse(iter(parcalar), media_type=media_type)
+
+    @uygulama.get("/guclu")
+    def guclu():
+        return PlainTextResponse("x" * 2000, headers={"ETag": '"abc"'})
+
+    @uygulama.get("/gorsel")
+    def gorsel():
+        return PlainTextResponse("x" * 2000, media_type="image/png")
+
+    uygulama.add_middleware(SikistirmaMiddleware, kodlamalar=("gzip",), **ayar)
+    return TestClient(uygulama)
+
+
+def test_akis_esik_asilana_kadar_bekletilir():
+    parcalar = [b"a" * 100 + b"\n" for _ in range(5)]
+    # Toplam eşiğin altında: sıkıştırılmadan
+    res = _akis_uygulamasi(parcalar, min_boyut=1000).get("/akis", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in res.headers
+    assert res.content == b"".join(parcalar)
+
+    # Eşik üçüncü parçada aşılır, her parça ayrı flush edilir
+    istemci = _akis_uygulamasi(parcalar, min_boyut=250)
+    with istemci.stream("GET", "/akis", headers={"Accept-Encoding": "gzip"}) as res:
+        assert res.headers["content-encoding"] == "gzip"
+        ham = b"".join(res.iter_raw())
+    assert gzip.decompress(ham) == b"".join(parcalar)
+
+
+@pytest.mark.parametrize("media_type", ["application/x-ndjson", "text/csv; charset=utf-8"])
+def test_export_akisi_ilk_parcayi_beklemeden_gonderir(media_type):
+    gonderilen = []
+
+    async def uygulama(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", media_type.encode())]})
+        await send({"type": "http.response.body", "body": b"id,baslik\n", "more_body": True})
+        # Başlıklar ve ilk parça, sonraki parça üretilmeden istemciye gitmiş olmalı
+        assert [m["type"] for m in gonderilen] == ["http.response.start", "http.response.body"]
+        await send({"type": "http.response.body", "body": b"1,a\n", "more_body": False})
+
+    async def kaydet(mesaj):
+        gonderilen.append(mesaj)
+
+    ara_katman = SikistirmaMiddleware(uygulama, min_boyut=1024, kodlamalar=("gzip",))
+    asyncio.run(ara_katman({"type": "http", "headers": [(b"accept-encoding", b"gzip")]}, None, kaydet))
+    assert (b"content-encoding", b"gzip") in gonderilen[0]["headers"]
+    assert gzip.decompress(b"".join(m["body"] for m in gonderilen[1:])) == b"id,baslik\n1,a\n"
+
+
+def test_guclu_etag_zayiflar_ve_ikili_turler_atlanir():
+    istemci = _akis_uygulamasi([], min_boyut=100)
+    res = istemci.get("/guclu", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["etag"] == 'W/"abc"'
+    assert istemci.get("/guclu", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"abc"'
+    res = istemci.get("/gorsel", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in res.headers
+    assert "vary" not in res.headers
+
+
+def test_brotli_kuruluysa_tercih_edilir(client):
+    pytest.importorskip("brotli")
+    _kitaplar_ekle(client, 50)
+    res = client.get("/api/kitaplar/", params={"limit": 50}, headers={"Accept-Encoding": "gzip, br"})
+    assert res.headers["content-encoding"] == "br"
+
+# --- METRİKLER ---
+
+def test_server_timing_ve_metrics(client):
+    metrikler.sifirla()
+    client.post("/api/yazarlar/", json={"ad": "M", "soyad": "K"})
+    sorgu_sayilari = []
+    for _ in range(2):
+        res = client.get("/api/yazarlar/")
+        eslesme = re.fullmatch(r'db;dur=[\d.]+;desc="(\d+) sorgu", app;dur=[\d.]+', res.headers["server-timing"])
+        assert eslesme, res.headers["server-timing"]
+        sorgu_sayilari.append(int(eslesme.group(1)))
+    assert all(sayi >= 1 for sayi in sorgu_sayilari)
+    client.get("/yok/olan/bir/adres")
+
+    res = client.get("/metrics")
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    metin = res.text
+    assert 'kutuphane_istek_toplam{method="GET",route="/api/yazarlar/",durum="200"} 2' in metin
+    assert 'kutuphane_istek_toplam{method="GET",route="eslesmeyen",durum="404"} 1' in metin
+    assert 'kutuphane_istek_suresi_saniye_count{method="GET",route="/api/yazarlar/"} 2' in metin
+    assert 'kutuphane_istek_suresi_saniye_bucket{method="GET",route="/api/yazarlar/",le="+Inf"} 2' in metin
+    assert (f'kutuphane_istek_sorgu_sayisi_sum{{method="GET",route="/api/yazarlar/"}} '
+            f'{sum(sorgu_sayilari)}.000000') in metin
+    assert "kutuphane_yavas_sorgu_saniye{sql=" in metin
+    assert any("FROM yazarlar" in sql for sql, _, _ in metrikler.yavas_sorgular())
+
+
+# --- SENTETİK VERİ ---
+
+def test_sentetik_veri_tutarli(tmp_path):
+    import seed
+    from app import utils
+
+    hedef = create_engine(f"sqlite:///{tmp_path / 'sentetik.db'}")
+    Base.metadata.create_all(bind=hedef)
+    # PRAGMA optimize'ın yazdığı istatistik tablosu hariç
+    sema_sql = "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_stat%' ORDER BY name"
+    with hedef.connect() as conn:
+        sema_once = conn.exec_driver_sql(sema_sql).all()
+        journal_once = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+
+    seed.sentetik_yukle(hedef, yazar=10, kategori=3, kitap=200, kullanici=20, odunc=1000, acik_oran=0.1)
+    with hedef.connect() as conn:
+        # Yükleme için kaldırılan indeks ve triggerlar aynen geri gelmeli, pragmalar eski hâline dönmeli
+        assert conn.exec_driver_sql(sema_sql).all() == sema_once
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == journal_once
+        assert conn.execute(text("SELECT count(*) FROM odunc_kayitlari")).scalar() == 1000
+        assert conn.execute(text("SELECT count(*) FROM odunc_kayitlari WHERE teslim_tarihi IS NULL")).scalar() == 20
+        assert all(utils.isbn_dogrula(i) for i in conn.execute(text("SELECT isbn FROM kitaplar")).scalars())
+        assert sayaclar.tutarsizliklar(conn) == {"kitaplar": [], "kullanicilar": []}
+        assert conn.execute(text("SELECT count(*) FROM kitap_ara")).scalar() == 200
+        assert conn.execute(text("SELECT count(*) FROM degisiklik_sayaclari")).scalar() == 5
+        # Arama tablosu yazar adıyla ve Türkçe katlamayla dolmuş olmalı
+        yazar = conn.execute(text("SELECT ad, soyad FROM yazarlar WHERE id = (SELECT yazar_id FROM kitaplar WHERE id = 1)")).one()
+        eslesme = utils.fts_sorgusu(f"{yazar.ad} {yazar.soyad}")
+        assert conn.execute(text("SELECT count(*) FROM kitap_ara WHERE kitap_ara MATCH :q AND rowid = 1"),
+                            {"q": eslesme}).scalar() == 1
+    hedef.dispose()
+
+
+def test_batch_get_istek_sirasi_ve_bulunamayanlar(client, sorgu_sayaci):
+    _kitaplar_ekle(client, 5)
+
+    with sorgu_sayaci(en_fazla=1):
+        res = client.post("/api/kitaplar/batch-get", json={"ids": [3, 99, 1, 3, 5]})
+    assert res.status_code == 200
+    sonuc = res.json()
+    assert [o["id"] for o in sonuc["sonuclar"]] == [3, 99, 1, 3, 5]
+    assert [o["bulundu"] for o in sonuc["sonuclar"]] == [True, False, True, True, True]
+    assert sonuc["sonuclar"][1]["kayit"] is None
+    assert sonuc["sonuclar"][0]["kayit"] == client.get("/api/kitaplar/3").json()
+    assert sonuc["bulunamayan"] == [99]
+
+
+def test_batch_get_parcali_sorgu_ve_sinir(client, sorgu_sayaci):
+    _kitaplar_ekle(client, 3)
+    idler = list(range(1, toplu_getir.TOPLU_GETIR_SINIRI + 1))
+
+    with sorgu_sayaci(en_fazla=2):
+        res = client.post("/api/kitaplar/batch-get", json={"ids": idler})
+    assert sum(o["bulundu"] for o in res.json()["sonuclar"]) == 3
+    assert len(res.json()["bulunamayan"]) == len(idler) - 3
+
+    res = client.post("/api/kitaplar/batch-get", json={"ids": idler + [len(idler) + 1]})
+    assert res.status_code == 400
+
+
+@pytest.mark.parametrize("kaynak", ["kitaplar", "yazarlar", "kategoriler", "kullanicilar", "odunc"])
+def test_batch_get_her_router(client, kaynak):
+    res = client.post(f"/api/{kaynak}/batch-get", json={"ids": [1]})
+    assert res.status_code == 200
+    assert res.json()["bulunamayan"] == [1]
+    assert client.post(f"/api/{kaynak}/batch-get", json={"ids": "1,2"}).status_code == 422